@@ -0,0 +1,205 @@
+"""作答记录：每次作答追加一条定长二进制记录，供统计正确率、最慢/最常错的题目和每日作答量。
+
+* xxx.history：每条 RECORD.size（32）字节 —— 时间戳、qid、用时（秒）、是否答对、得分、题型、作答文本的位置和长度
+* xxx.history.answers：作答文本（UTF-8），只追加；多个值（多选/填空）用 \\x1f 分隔
+两个文件都只追加不改写：先写作答文本再写记录，中途断电最多留下半条记录，打开时截掉。
+记录先攒在内存里，flush() 时一次写入（由 autosave 的写入线程调用），作答本身不碰磁盘。
+
+统计时把整个文件读入按列存放的 array（HistoryColumns）：每一列用跨步切片从定长记录中整体取出，
+不逐条解析；汇总也尽量交给 Counter / map 在 C 中完成。作答文本只在需要时按位置读取。
+"""
+import bisect
+import heapq
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+from collections import Counter, defaultdict, namedtuple
+from itertools import compress
+
+# 时间戳, qid, 用时, 是否答对 (1/0/-1 无法判分), 得分 (百分制, 255 表示无), 题型编号, 作答文本位置, 长度
+RECORD = struct.Struct("<dIfbBBxQI")
+# HistoryColumns 各列在记录中的字节偏移和 array 类型
+COLUMN_LAYOUT = (("timestamp", 0, "d"), ("qid", 8, "I"), ("elapsed", 12, "f"), ("correct", 16, "b"), ("q_type", 18, "B"))
+ANSWERS_SUFFIX = ".answers"
+ANSWER_SEPARATOR = "\x1f"
+Q_TYPE_CODES = {"单选题": 1, "多选题": 2, "填空题": 3, "判断题": 4} # 0 为未知
+Q_TYPE_NAMES = {code: name for name, code in Q_TYPE_CODES.items()}
+NO_SCORE = 255
+MAX_ELAPSED = 3600.0 # 用时超过一小时（抽到题后离开了）按一小时计
+TOP_N = 10
+
+Attempt = namedtuple("Attempt", "timestamp qid elapsed correct score q_type answer")
+HistoryColumns = namedtuple("HistoryColumns", "timestamp qid elapsed correct q_type")
+# by_type：[(题型, 作答次数, 答对次数, 正确率)]；slowest：[(qid, 平均用时, 作答次数)]；
+# most_missed：[(qid, 答错次数, 作答次数)]；daily：[(日期 "YYYY-MM-DD", 作答次数)]，按日期排列
+HistoryReport = namedtuple("HistoryReport", "attempts by_type slowest most_missed daily")
+
+
+def encode_response(response):
+    if response is None:
+        return ""
+    if isinstance(response, str):
+        return response
+    return ANSWER_SEPARATOR.join(str(item) for item in response)
+
+
+def empty_columns():
+    return HistoryColumns(*(array(typecode) for _name, _offset, typecode in COLUMN_LAYOUT))
+
+
+def _column(data, offset, typecode):
+    """从连续的定长记录中取出一列：按字节跨步切片再交错拼回，全部在 C 中完成"""
+    column = array(typecode)
+    width = column.itemsize
+    buf = bytearray(len(data) // RECORD.size * width)
+    for i in range(width):
+        buf[i::width] = data[offset + i::RECORD.size]
+    column.frombytes(buf)
+    if sys.byteorder == "big": # 记录是小端序
+        column.byteswap()
+    return column
+
+
+class AnswerHistory:
+    def __init__(self, path):
+        self.path = path
+        self.answers_path = path + ANSWERS_SUFFIX
+        self._pending = [] # 尚未写入的 (记录字段, 作答文本的 UTF-8)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._checked_tail = False
+
+    def append(self, qid, q_type, elapsed, correct, score, response, timestamp=None):
+        """记下一次作答（只放进内存）；correct 为 True/False/None，score 为 0~1 或 None"""
+        fields = (
+            time.time() if timestamp is None else timestamp,
+            qid,
+            min(max(elapsed or 0.0, 0.0), MAX_ELAPSED),
+            -1 if correct is None else int(bool(correct)),
+            NO_SCORE if score is None else round(score * 100),
+            Q_TYPE_CODES.get(q_type, 0),
+        )
+        with self._lock:
+            self._pending.append((fields, encode_response(response).encode("utf-8")))
+
+    def flush(self):
+        """把内存中的记录追加到文件；写入失败时保留，下次再试"""
+        with self._write_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if not pending:
+                return True
+            try:
+                self._truncate_partial_record()
+                with open(self.answers_path, "ab") as f:
+                    offset = f.tell()
+                    records = []
+                    for fields, answer in pending:
+                        records.append(RECORD.pack(*fields, offset, len(answer)))
+                        offset += len(answer)
+                    f.write(b"".join(answer for _fields, answer in pending))
+                with open(self.path, "ab") as f:
+                    f.write(b"".join(records))
+                return True
+            except OSError as e:
+                print(f"Error writing answer history: {e}")
+                with self._lock:
+                    self._pending[:0] = pending
+                return False
+
+    def _truncate_partial_record(self):
+        """上次写到一半中断时，截掉末尾不完整的记录（每次运行只检查一次）"""
+        if self._checked_tail:
+            return
+        self._checked_tail = True
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return
+        if size % RECORD.size:
+            with open(self.path, "r+b") as f:
+                f.truncate(size - size % RECORD.size)
+
+    def clear(self):
+        """删除全部记录（整体导入新题库时，旧的 qid 已没有意义）"""
+        with self._write_lock:
+            with self._lock:
+                self._pending = []
+            for path in (self.path, self.answers_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def __len__(self):
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            size = 0
+        return size // RECORD.size + len(self._pending)
+
+    def load_columns(self):
+        """读取全部已写入的记录，返回按列存放的 HistoryColumns"""
+        self.flush()
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return empty_columns()
+        data = data[:len(data) - len(data) % RECORD.size]
+        return HistoryColumns(*(_column(data, offset, typecode) for _name, offset, typecode in COLUMN_LAYOUT))
+
+    def attempts_for(self, qid):
+        """某道题的全部作答记录（含作答文本），最早的在前"""
+        self.flush()
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        data = data[:len(data) - len(data) % RECORD.size]
+        found = [fields for fields in RECORD.iter_unpack(data) if fields[1] == qid]
+        attempts = []
+        with open(self.answers_path, "rb") as f:
+            for ts, _qid, seconds, ok, score, q_type, offset, length in found:
+                f.seek(offset)
+                answer = f.read(length).decode("utf-8", errors="replace")
+                attempts.append(Attempt(ts, qid, seconds, None if ok < 0 else bool(ok),
+                                        None if score == NO_SCORE else score / 100,
+                                        Q_TYPE_NAMES.get(q_type), answer.split(ANSWER_SEPARATOR)))
+        return attempts
+
+
+def summarize(columns, top=TOP_N, now=None):
+    """由 HistoryColumns 计算 HistoryReport；只统计能判分的作答的正确率"""
+    outcomes = Counter(zip(columns.q_type, columns.correct)) # (题型, 1/0/-1) -> 次数
+    by_type = []
+    for code in sorted({code for code, _ok in outcomes}):
+        correct, wrong = outcomes[code, 1], outcomes[code, 0]
+        if correct + wrong:
+            by_type.append((Q_TYPE_NAMES.get(code, "未知"), correct + wrong, correct, correct / (correct + wrong)))
+
+    per_question = Counter(columns.qid)
+    total_elapsed = defaultdict(float)
+    for qid, seconds in zip(columns.qid, columns.elapsed):
+        total_elapsed[qid] += seconds
+    slowest = heapq.nlargest(top, ((qid, total / per_question[qid], per_question[qid])
+                                   for qid, total in total_elapsed.items()), key=lambda item: item[1])
+    missed = Counter(compress(columns.qid, map((0).__eq__, columns.correct)))
+    most_missed = [(qid, n, per_question[qid]) for qid, n in missed.most_common(top)]
+
+    # 每日作答量：记录按时间追加，排序几乎是线性的；再用二分查找每天的边界，不必逐条换算日期
+    timestamps = sorted(columns.timestamp)
+    daily = []
+    if timestamps:
+        offset = time.localtime(now).tm_gmtoff # 按本地时区分日
+        day = int((timestamps[0] + offset) // 86400)
+        start = 0
+        while start < len(timestamps):
+            end = bisect.bisect_left(timestamps, (day + 1) * 86400 - offset, start)
+            if end > start:
+                daily.append((time.strftime("%Y-%m-%d", time.gmtime(day * 86400)), end - start))
+            start = end
+            day += 1
+    return HistoryReport(len(columns.qid), by_type, slowest, most_missed, daily)
@@ -0,0 +1,97 @@
+"""后台写入数据库：作答、移回、删除等状态变化先记入内存队列立即返回，界面不必等待磁盘。
+
+* 每次 submit 唤醒写入线程；线程再等 AUTOSAVE_INTERVAL 秒，把这段时间内的全部变化合并成一个事务提交
+* 导入、更新题库等直接操作数据库之前先 flush()，保证写入顺序与内存中的操作顺序一致
+* flush 时同时调用 also_flush 中的函数（如 AnswerHistory.flush），把其他只追加的文件一起写出
+* 有新的写入且距上次备份超过 BACKUP_INTERVAL 秒时（以及 stop 时），调用 ProgressStore.backup 轮换备份
+"""
+import sqlite3
+import threading
+import time
+
+from instrumentation import timed
+
+AUTOSAVE_INTERVAL = 0.5 # 秒
+BACKUP_INTERVAL = 600 # 秒
+
+
+class BackgroundWriter:
+    def __init__(self, store, interval=AUTOSAVE_INTERVAL, backup_interval=BACKUP_INTERVAL, also_flush=()):
+        self.store = store
+        self.also_flush = list(also_flush)
+        self.interval = interval
+        self.backup_interval = backup_interval
+        self._pending = [] # 尚未写入的 (ProgressStore 方法名, 参数)
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock() # 写入线程与调用 flush 的线程依次写入，保持顺序
+        self._wake = threading.Event()
+        self._stopping = False
+        self._dirty = False # 上次备份之后是否有过写入
+        self._last_backup = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="autosave", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def submit(self, action, args):
+        """记下一次写操作（store 的方法名和参数），立即返回"""
+        with self._pending_lock:
+            self._pending.append((action, args))
+        self._wake.set()
+
+    @timed("autosave.flush")
+    def flush(self):
+        """把已记下的写操作全部写入数据库；全部成功返回 True"""
+        with self._flush_lock:
+            ok = all([flush() for flush in self.also_flush])
+            with self._pending_lock:
+                actions, self._pending = self._pending, []
+            if not actions:
+                return ok
+            self._dirty = True
+            try:
+                with self.store.batch():
+                    for action, args in actions:
+                        getattr(self.store, action)(*args)
+                return ok
+            except sqlite3.Error as e:
+                print(f"Error saving {len(actions)} changes in one transaction: {e}")
+            # 整批已回滚：逐个重试，只丢弃本身出错的那一步
+            for action, args in actions:
+                try:
+                    getattr(self.store, action)(*args)
+                except sqlite3.Error as e:
+                    print(f"Error persisting {action}: {e}")
+                    ok = False
+            return ok
+
+    def backup_if_due(self, force=False):
+        if not self._dirty or not force and time.monotonic() - self._last_backup < self.backup_interval:
+            return None
+        self._dirty = False
+        self._last_backup = time.monotonic()
+        try:
+            return self.store.backup()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Error backing up database: {e}")
+            return None
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.backup_interval)
+            if self._stopping:
+                break
+            time.sleep(self.interval) # 合并这段时间内的后续变化
+            self._wake.clear()
+            self.flush()
+            self.backup_if_due()
+
+    def stop(self):
+        """写完剩余的变化，必要时做最后一次备份，然后结束写入线程"""
+        self._stopping = True
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        ok = self.flush()
+        self.backup_if_due(force=True)
+        return ok
@@ -0,0 +1,84 @@
+"""在后台线程执行耗时操作，并把进度和结果交回 Tk 主线程。
+
+工作线程从不直接调用任何 Tk 接口：进度写入一个只保留最新值的槽位，
+结果写入 outcome，由主线程通过 master.after 定时轮询（约 60 fps）后回调。
+"""
+import threading
+import traceback
+
+
+class TaskCancelled(Exception):
+    """工作函数通过 report() 得知任务已被取消时抛出"""
+
+
+class BackgroundTask:
+    POLL_MS = 16 # 轮询间隔，约 60 fps
+
+    def __init__(self, master, work, on_done, on_error=None, on_cancelled=None, on_progress=None):
+        """work(report) 在工作线程中执行，report(done, total) 用于报告进度并检查取消。
+
+        on_done(result) / on_error(exc) / on_cancelled() / on_progress(done, total) 都在主线程中调用。
+        """
+        self.master = master
+        self._work = work
+        self._on_done = on_done
+        self._on_error = on_error
+        self._on_cancelled = on_cancelled
+        self._on_progress = on_progress
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+        self._progress = None
+        self._reported_progress = None
+        self._outcome = None
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self.master.after(self.POLL_MS, self._poll)
+        return self
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def report(self, done, total=None):
+        """工作线程调用：记录最新进度；任务已取消时抛出 TaskCancelled"""
+        if self._cancel_event.is_set():
+            raise TaskCancelled()
+        with self._lock:
+            self._progress = (done, total)
+
+    def _run(self):
+        try:
+            result = self._work(self.report)
+        except TaskCancelled:
+            outcome = ("cancelled", None)
+        except Exception as e:
+            traceback.print_exc()
+            outcome = ("error", e)
+        else:
+            outcome = ("done", result)
+        with self._lock:
+            self._outcome = outcome
+
+    def _poll(self):
+        with self._lock:
+            progress = self._progress
+            outcome = self._outcome
+        if progress is not None and progress != self._reported_progress and self._on_progress:
+            self._reported_progress = progress
+            self._on_progress(*progress)
+        if outcome is None:
+            self.master.after(self.POLL_MS, self._poll)
+            return
+        kind, value = outcome
+        if kind == "done":
+            self._on_done(value)
+        elif kind == "error" and self._on_error:
+            self._on_error(value)
+        elif kind == "cancelled" and self._on_cancelled:
+            self._on_cancelled()
@@ -0,0 +1,115 @@
+"""增量更新题库：把重新解析的 Word 题库与当前题库逐题比对，只改动有变化的题目。
+
+* 指纹：题型、题干、选项原文和答案原文（不含题号和位置），完全相同即为同一道题，进度原样保留
+* 轻微修改（改了错字、修正了答案）：剩下的题目在同一文件、同一题型内配对，题干 + 选项的 shingle Jaccard 相似度
+  不低于 EDIT_THRESHOLD 的视为同一道题的新版本，沿用原来的 qid 和进度，只更新内容
+* 其余新题目作为未答题加入，旧题库中找不到对应的题目被删除
+
+比对只读取题目，不修改任何状态，可以在后台线程中进行；应用结果见 QuizEngine.apply_update。
+"""
+import hashlib
+import os
+from collections import defaultdict, namedtuple
+
+from importers import list_bank_files
+from near_duplicates import jaccard, question_fingerprint_text, shingles
+
+EDIT_THRESHOLD = 0.7
+MAX_FUZZY_PAIRS = 1_000_000 # 同一题型剩余题目两两比较的上限，超过时（几乎整份文档都变了）不再做模糊配对
+
+# 题目在文档中的位置信息：只有这些字段变化时不算修改，进度不受影响
+POSITION_FIELDS = ("original_num_text", "original_num", "original_doc_order", "source_file")
+
+# unchanged：内容和位置都没变的题数；moved：只有位置变化的 [(当前题目, 新解析的题目)]；
+# edited：内容有修改的 [(当前题目, 新解析的题目)]；added：新题目；removed：当前题库中要删除的题目
+BankDiff = namedtuple("BankDiff", "unchanged moved edited added removed")
+
+
+def block_fingerprint(q):
+    """题目内容的指纹（含图片/表格引用，与题号、所在位置无关）"""
+    parts = [q.q_type, q.text, *q.options_raw, q.answer_raw, *(f"{kind}:{ref}" for kind, ref in q.media)]
+    return hashlib.blake2b("\x1f".join(parts).encode("utf-8"), digest_size=16).digest()
+
+
+def position_changed(old, new):
+    return any(getattr(old, field) != getattr(new, field) for field in POSITION_FIELDS)
+
+
+def _pair_edited(old_left, new_left, threshold):
+    """同题型的剩余题目按相似度从高到低贪心配对，返回 [(当前题目, 新题目)]"""
+    if not old_left or not new_left or len(old_left) * len(new_left) > MAX_FUZZY_PAIRS:
+        return []
+    old_shingles = [shingles(question_fingerprint_text(q)) for q in old_left]
+    candidates = []
+    for j, new_q in enumerate(new_left):
+        new_shingles = shingles(question_fingerprint_text(new_q))
+        for i, old_set in enumerate(old_shingles):
+            similarity = jaccard(old_set, new_shingles)
+            if similarity >= threshold:
+                candidates.append((-similarity, i, j))
+    candidates.sort()
+    used_old, used_new = set(), set()
+    pairs = []
+    for _similarity, i, j in candidates:
+        if i in used_old or j in used_new:
+            continue
+        used_old.add(i)
+        used_new.add(j)
+        pairs.append((old_left[i], new_left[j]))
+    return pairs
+
+
+def diff_banks(old_questions, new_questions, threshold=EDIT_THRESHOLD):
+    """比对当前题库与新解析的题目，返回 BankDiff（added 按新文档中的顺序排列）"""
+    by_fingerprint = defaultdict(list)
+    for q in reversed(old_questions): # 指纹相同的多道题按原顺序依次配对
+        by_fingerprint[block_fingerprint(q)].append(q)
+    unchanged = 0
+    moved = []
+    unmatched_new = []
+    for q in new_questions:
+        same = by_fingerprint.get(block_fingerprint(q))
+        if not same:
+            unmatched_new.append(q)
+        elif position_changed(same[-1], q):
+            moved.append((same.pop(), q))
+        else:
+            same.pop()
+            unchanged += 1
+
+    old_by_group = defaultdict(list) # (来源文件, 题型) -> 剩余的当前题目
+    for olds in by_fingerprint.values():
+        for q in olds:
+            old_by_group[q.source_file, q.q_type].append(q)
+    new_by_group = defaultdict(list)
+    for q in unmatched_new:
+        new_by_group[q.source_file, q.q_type].append(q)
+    edited = []
+    for group, new_left in new_by_group.items():
+        edited.extend(_pair_edited(old_by_group.get(group, []), new_left, threshold))
+
+    edited_new = {id(new) for _old, new in edited}
+    edited_old = {id(old) for old, _new in edited}
+    added = [q for q in unmatched_new if id(q) not in edited_new]
+    removed = [q for olds in old_by_group.values() for q in olds if id(q) not in edited_old]
+    removed.sort(key=lambda q: q.qid)
+    return BankDiff(unchanged, moved, edited, added, removed)
+
+
+def describe_diff(diff):
+    """一句话的比对结果"""
+    return (f"未变 {diff.unchanged + len(diff.moved)} 道（其中 {len(diff.moved)} 道位置变化），修改 {len(diff.edited)} 道，"
+            f"新增 {len(diff.added)} 道，删除 {len(diff.removed)} 道")
+
+
+def source_signature(path):
+    """题库来源（文件或文件夹中的全部题库文件）的修改时间和大小，用于发现文件变化；不存在时返回 None"""
+    try:
+        paths = list_bank_files(path) if os.path.isdir(path) else [path]
+        signature = []
+        for p in paths:
+            st = os.stat(p)
+            signature.append((p, st.st_mtime_ns, st.st_size))
+        return tuple(signature)
+    except OSError:
+        return None
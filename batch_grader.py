@@ -0,0 +1,184 @@
+"""批量判分：用数据库中的题库给答题卡 CSV 中的全部作答判分，输出每个学生和每道题的结果。
+
+    python batch_grader.py answers.csv --db quiz_progress.db -o results/
+
+答题卡为 UTF-8 的 CSV（可带 BOM），第一行为表头，支持两种格式：
+  * 长表：student,qid,answer —— 每行一次作答
+  * 宽表：student,<qid>,<qid>,... —— 每行一个学生，每列一道题，空单元格表示未作答
+两种格式中空白的答案都按未作答判 0 分，同样计入满分和该题的作答人数（不计入学生的作答题数）。
+答案文本的写法见 grading.parse_response_text（如 "A"、"ABD"、"对"、"答案1|答案2"）。
+
+输出（UTF-8 BOM，可直接用 Excel 打开）：
+  * students.csv：学生、作答题数（不含空白）、答对题数、得分、满分、得分率
+  * questions.csv：qid、题型、作答人数（含空白）、答对人数、平均得分、正确率、最常见的错误答案、题干
+
+判分按题目分组：规范化答案开始时对整个题库一次算好，同一道题的同一种答案文本只解析、判分一次
+（几千份答题卡里重复的答案占绝大多数），之后每行只是一次字典查找和累加。
+"""
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import time
+from collections import Counter
+
+from grading import build_answer_keys, grade_response, parse_response_text
+from progress_store import ProgressStore
+from quiz_engine import QuizEngine, normalize_judge_answer
+
+STUDENT_COLUMN = "student"
+LONG_FORMAT_COLUMNS = ("qid", "answer")
+
+
+def read_sheet(path):
+    """逐个返回答题卡中的作答 (学生, qid 文本, 答案文本)；空白或缺少的答案为空字符串，同样返回"""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = [name.strip().lower() for name in next(reader, [])]
+        if STUDENT_COLUMN not in header:
+            raise ValueError(f"答题卡缺少 {STUDENT_COLUMN} 列")
+        student_col = header.index(STUDENT_COLUMN)
+        if all(name in header for name in LONG_FORMAT_COLUMNS):
+            qid_col, answer_col = (header.index(name) for name in LONG_FORMAT_COLUMNS)
+            for row in reader:
+                if len(row) > max(student_col, qid_col):
+                    answer_text = row[answer_col] if answer_col < len(row) else ""
+                    yield row[student_col].strip(), row[qid_col].strip(), answer_text
+            return
+        question_cols = [(i, name) for i, name in enumerate(header) if i != student_col]
+        for row in reader:
+            if len(row) <= student_col:
+                continue
+            student = row[student_col].strip()
+            for i, qid_text in question_cols:
+                yield student, qid_text, row[i] if i < len(row) else ""
+
+
+class StudentResult:
+    __slots__ = ("answered", "correct", "score", "max_score")
+
+    def __init__(self):
+        self.answered = 0
+        self.correct = 0
+        self.score = 0.0
+        self.max_score = 0
+
+
+class QuestionResult:
+    __slots__ = ("attempts", "correct", "score", "wrong_answers")
+
+    def __init__(self):
+        self.attempts = 0
+        self.correct = 0
+        self.score = 0.0
+        self.wrong_answers = Counter()
+
+
+def grade_sheet(questions, entries):
+    """给全部作答判分，返回 ({学生: StudentResult}, {qid: QuestionResult}, 找不到题目的行数)"""
+    by_qid = {str(q.qid): q for q in questions}
+    keys = build_answer_keys(questions)
+    memo = {} # (qid 文本, 答案文本) -> (qid, Grade, 规范化后的答案文本, 是否作答)
+    students = {}
+    per_question = {}
+    unknown = 0
+    for student, qid_text, answer_text in entries:
+        cached = memo.get((qid_text, answer_text))
+        if cached is None:
+            q = by_qid.get(qid_text)
+            if q is None:
+                unknown += 1
+                continue
+            response = parse_response_text(q.q_type, answer_text)
+            shown = "|".join(response) if isinstance(response, list) else (response or "")
+            cached = memo[(qid_text, answer_text)] = (q.qid, grade_response(keys[q.qid], response), shown,
+                                                      bool(answer_text.strip()))
+        qid, grade, shown, answered = cached
+
+        student_result = students.get(student)
+        if student_result is None:
+            student_result = students[student] = StudentResult()
+        question_result = per_question.get(qid)
+        if question_result is None:
+            question_result = per_question[qid] = QuestionResult()
+        student_result.answered += answered
+        question_result.attempts += 1 # 空白答案也计入，判 0 分
+        if grade.correct is None: # 题目没有可用答案，不计分
+            continue
+        student_result.max_score += 1
+        student_result.score += grade.score
+        question_result.score += grade.score
+        if grade.correct:
+            student_result.correct += 1
+            question_result.correct += 1
+        else:
+            question_result.wrong_answers[shown] += 1
+    return students, per_question, unknown
+
+
+def write_results(out_dir, questions, students, per_question):
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "students.csv"), "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(["学生", "作答题数", "答对题数", "得分", "满分", "得分率"])
+        for student, r in sorted(students.items()):
+            rate = r.score / r.max_score if r.max_score else 0.0
+            writer.writerow([student, r.answered, r.correct, round(r.score, 2), r.max_score, f"{rate:.1%}"])
+
+    with open(os.path.join(out_dir, "questions.csv"), "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(["qid", "题型", "作答人数", "答对人数", "平均得分", "正确率", "最常见的错误答案", "题干"])
+        for q in questions:
+            r = per_question.get(q.qid)
+            if r is None:
+                continue
+            common_wrong = r.wrong_answers.most_common(1)
+            wrong_text = f"{common_wrong[0][0] or '(未作答)'} ×{common_wrong[0][1]}" if common_wrong else ""
+            writer.writerow([q.qid, q.q_type, r.attempts, r.correct, round(r.score / r.attempts, 3),
+                             f"{r.correct / r.attempts:.1%}", wrong_text, q.text])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="灵感菇 答题卡批量判分")
+    parser.add_argument("sheet", help="答题卡 CSV（长表 student,qid,answer 或宽表 student,<qid>,...）")
+    parser.add_argument("--db", default=QuizEngine.DB_FILE_NAME, help="题库数据库路径")
+    parser.add_argument("-o", "--out-dir", default="grading_results", help="结果输出目录")
+    args = parser.parse_args(argv)
+
+    # 只读取题库：数据库不存在时报错退出，不新建空库，也不写入或轮换备份
+    if not os.path.exists(args.db):
+        print(f"找不到数据库 {args.db}。", file=sys.stderr)
+        return 1
+    try:
+        store = ProgressStore(args.db, read_only=True)
+        try:
+            questions = store.load()[0]
+        finally:
+            store.close()
+    except sqlite3.Error as e:
+        print(f"无法读取数据库 {args.db}: {e}", file=sys.stderr)
+        return 1
+    if not questions:
+        print("数据库中没有题目。请先导入题库。", file=sys.stderr)
+        return 1
+    for q in questions:
+        normalize_judge_answer(q)
+
+    start = time.perf_counter()
+    try:
+        students, per_question, unknown = grade_sheet(questions, read_sheet(args.sheet))
+    except (OSError, ValueError, csv.Error) as e:
+        print(f"读取答题卡失败: {e}", file=sys.stderr)
+        return 1
+    write_results(args.out_dir, questions, students, per_question)
+    attempts = sum(r.attempts for r in per_question.values())
+    print(f"已判分 {len(students)} 名学生的 {attempts} 次作答（{len(per_question)} 道题），"
+          f"用时 {time.perf_counter() - start:.2f} 秒；结果已写入 {args.out_dir}")
+    if unknown:
+        print(f"有 {unknown} 行作答的 qid 不在题库中，已跳过。", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+"""多用户刷题服务（quiz_server.py）的本地压测：模拟大量学生同时 抽题 -> 作答，偶尔查看统计或移回，
+报告吞吐量和各接口的延迟分位数（p50 / p99 / 最大）。
+
+    python benchmarks/load_test.py --users 2000 --duration 20            # 生成合成题库，在子进程中启动服务后压测
+    python benchmarks/load_test.py --url http://127.0.0.1:8080 --users 2000   # 压测已经在运行的服务
+
+每个模拟用户使用自己的一条 keep-alive 连接，收到响应后立即发下一个请求（可用 --think 加入思考时间）。
+压测端与服务在同一台机器上时会相互争用 CPU，结果偏保守。
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from make_bank import write_bank # noqa: E402
+
+DEFAULT_BANK_SIZE = 5000
+STATS_EVERY = 20 # 每个用户每作答这么多道题查看一次统计
+MOVE_BACK_EVERY = 50 # 每作答这么多道题把最近答过的几道移回未答
+SERVER_START_TIMEOUT = 60
+
+
+class Connection:
+    """一条 keep-alive 的 HTTP/1.1 连接，只实现压测需要的部分"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, payload=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8") if payload is not None else b""
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n")
+        self.writer.write(head.encode("ascii") + body)
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("服务端关闭了连接")
+        status = int(status_line.split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _sep, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        data = await self.reader.readexactly(length)
+        return status, json.loads(data) if data else None
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = {} # 接口 -> [秒]
+        self.errors = 0
+
+    async def call(self, conn, op, method, path, payload=None):
+        start = time.perf_counter()
+        status, data = await conn.request(method, path, payload)
+        self.latencies.setdefault(op, []).append(time.perf_counter() - start)
+        if status != 200:
+            self.errors += 1
+        return data
+
+
+def random_response(question, rng):
+    """随手作答：一半概率选第一个选项，其余随机"""
+    letters = sorted(question["options"])
+    if question["q_type"] == "多选题":
+        return sorted(rng.sample(letters, rng.randint(1, len(letters)))) if letters else []
+    if question["q_type"] == "填空题":
+        return [str(rng.randint(0, 9)) for _ in range(question["blanks"])]
+    if not letters:
+        return None
+    return letters[0] if rng.random() < 0.5 else rng.choice(letters)
+
+
+async def simulate_user(user_id, host, port, deadline, recorder, think, seed):
+    rng = random.Random(seed)
+    conn = Connection(host, port)
+    answered = []
+    try:
+        await recorder.call(conn, "stats", "GET", f"/stats?user={user_id}")
+        while time.perf_counter() < deadline:
+            data = await recorder.call(conn, "draw", "GET", f"/draw?user={user_id}")
+            question = data and data.get("question")
+            if question is None:
+                await recorder.call(conn, "move_back", "POST", "/move_back", {"user": user_id, "qids": answered})
+                answered = []
+                continue
+            if think:
+                await asyncio.sleep(rng.uniform(0, 2 * think))
+            await recorder.call(conn, "answer", "POST", "/answer",
+                                {"user": user_id, "qid": question["qid"], "response": random_response(question, rng)})
+            answered.append(question["qid"])
+            if len(answered) % STATS_EVERY == 0:
+                await recorder.call(conn, "stats", "GET", f"/stats?user={user_id}")
+            if len(answered) % MOVE_BACK_EVERY == 0:
+                await recorder.call(conn, "move_back", "POST", "/move_back", {"user": user_id, "qids": answered[-5:]})
+    except (ConnectionError, OSError, asyncio.IncompleteReadError, ValueError):
+        recorder.errors += 1
+    finally:
+        conn.close()
+
+
+async def run_load(host, port, users, duration, think, seed, ramp):
+    recorder = Recorder()
+    start = time.perf_counter()
+    deadline = start + ramp + duration
+    tasks = []
+    for i in range(users):
+        tasks.append(asyncio.ensure_future(
+            simulate_user(f"user{i:05d}", host, port, deadline, recorder, think, seed * 1000003 + i)))
+        if ramp:
+            await asyncio.sleep(ramp / users)
+    await asyncio.gather(*tasks)
+    return recorder, time.perf_counter() - start
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def report(recorder, elapsed, users):
+    total = sum(len(samples) for samples in recorder.latencies.values())
+    print(f"\n{users} 个并发用户，{elapsed:.1f} 秒，共 {total} 个请求，{total / elapsed:.0f} 请求/秒，错误 {recorder.errors}")
+    print(f"{'接口':<12} {'次数':>8} {'p50ms':>9} {'p99ms':>9} {'最大ms':>9}")
+    all_samples = []
+    for op, samples in sorted(recorder.latencies.items()):
+        samples.sort()
+        all_samples.extend(samples)
+        print(f"{op:<12} {len(samples):>8} {statistics.median(samples) * 1000:>9.2f} "
+              f"{percentile(samples, 0.99) * 1000:>9.2f} {samples[-1] * 1000:>9.2f}")
+    if all_samples:
+        all_samples.sort()
+        print(f"{'全部':<12} {len(all_samples):>8} {statistics.median(all_samples) * 1000:>9.2f} "
+              f"{percentile(all_samples, 0.99) * 1000:>9.2f} {all_samples[-1] * 1000:>9.2f}")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_local_server(work_dir, bank_size, seed):
+    """生成合成题库、导入到新数据库，并在子进程中启动服务，返回 (进程, 端口)"""
+    from quiz_engine import QuizEngine
+
+    bank_path = os.path.join(work_dir, f"bank_{bank_size}_s{seed}.docx")
+    write_bank(bank_path, bank_size, seed)
+    db_path = os.path.join(work_dir, "server.db")
+    engine = QuizEngine(db_path=db_path, legacy_pkl_path=None, cache_dir=None)
+    engine.open_store()
+    engine.import_file(bank_path, dedup=False)
+    engine.close()
+
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(REPO_DIR, "quiz_server.py"), "--db", db_path,
+         "--host", "127.0.0.1", "--port", str(port)],
+        stdout=sys.stderr,
+    )
+    give_up = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < give_up:
+        if process.poll() is not None:
+            raise RuntimeError(f"服务启动失败（退出码 {process.returncode}）")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process, port
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("等待服务启动超时")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="多用户刷题服务压测")
+    parser.add_argument("--url", help="已在运行的服务地址，例如 http://127.0.0.1:8080（默认在本地启动一个）")
+    parser.add_argument("--users", type=int, default=1000, help="并发用户数")
+    parser.add_argument("--duration", type=float, default=10.0, help="压测时长（秒，不含逐步建立连接的时间）")
+    parser.add_argument("--ramp", type=float, default=2.0, help="在这段时间内逐步建立全部连接（秒）")
+    parser.add_argument("--think", type=float, default=0.0, help="抽题后平均思考多久再作答（秒），0 为不停顿")
+    parser.add_argument("--bank-size", type=int, default=DEFAULT_BANK_SIZE, help="本地启动服务时生成的题库规模")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        process = None
+        if args.url:
+            url = urlsplit(args.url)
+            host, port = url.hostname, url.port or 80
+        else:
+            print(f"生成 {args.bank_size} 道题目的合成题库并启动服务…", file=sys.stderr)
+            process, port = start_local_server(work_dir, args.bank_size, args.seed)
+            host = "127.0.0.1"
+        try:
+            recorder, elapsed = asyncio.run(
+                run_load(host, port, args.users, args.duration, args.think, args.seed, args.ramp))
+        finally:
+            if process is not None:
+                process.terminate() # 服务收到 SIGTERM 后会写完未保存的进度再退出
+                process.wait()
+    report(recorder, elapsed, args.users)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""生成合成的 Word 题库（README 中的合法格式），用于基准测试。
+
+用 docx_writer 流式写出，不依赖 python-docx，100 万道题也只需几十秒、内存平稳。
+题型按 单选题/多选题/填空题/判断题 四段依次排列，每段题数相同；
+题目的写法（选项同段换行 / 分段、空段、不同的答案写法）按固定随机种子混合，结果可复现。
+
+    python benchmarks/make_bank.py 10000 bank_10k.docx
+    python benchmarks/make_bank.py 10000 bank_10k.txt     # 同样内容的纯文本题库（按扩展名选择格式）
+"""
+import argparse
+import os
+import random
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from docx_writer import write_docx # noqa: E402
+
+Q_TYPES = ("单选题", "多选题", "填空题", "判断题")
+SECTION_NUMBERS = "一二三四"
+
+
+def question_paragraphs(q_type, num, rng):
+    """一道题对应的段落文本列表"""
+    stem = f"{num}.\t示例题干{num}，考查第{rng.randint(1, 30)}节的内容（ ）。"
+    if q_type in ("单选题", "多选题"):
+        option_count = rng.choice((4, 4, 4, 5))
+        letters = "ABCDE"[:option_count]
+        options = [f"{letter}. 候选项{letter}{num}-{rng.randint(0, 999)}" for letter in letters]
+        if q_type == "单选题":
+            answer = rng.choice(letters)
+        else:
+            answer = "".join(sorted(rng.sample(letters, rng.randint(2, option_count))))
+        answer_line = f"正确答案{rng.choice(('：', ': '))}{answer}"
+        if rng.random() < 0.3: # 选项与题干同段，用换行分隔
+            return ["\n".join([stem] + options + [answer_line])]
+        paragraphs = [stem] + options
+        if rng.random() < 0.2:
+            paragraphs.append("")
+        return paragraphs + [answer_line]
+    if q_type == "填空题":
+        blanks = rng.randint(1, 3)
+        text = f"{num}. 示例填空{num}：" + "、".join("___" for _ in range(blanks)) + "。"
+        answer = " ".join(f"{i + 1} 答案{num}-{i + 1}" for i in range(blanks))
+        return [text, f"正确答案：{answer}"]
+    answer = rng.choice(("A", "B", "正确", "错误"))
+    return [f"{num}、示例判断{num}。", f"正确答案: {answer}"]
+
+
+def iter_bank_paragraphs(question_count, seed=0):
+    rng = random.Random(seed)
+    per_type, extra = divmod(question_count, len(Q_TYPES))
+    for index, q_type in enumerate(Q_TYPES):
+        yield f"{SECTION_NUMBERS[index]}、{q_type}"
+        for num in range(1, per_type + (1 if index < extra else 0) + 1):
+            yield from question_paragraphs(q_type, num, rng)
+
+
+def write_bank(path, question_count, seed=0):
+    """写出包含 question_count 道题的 .docx，返回 path"""
+    return write_docx(path, iter_bank_paragraphs(question_count, seed))
+
+
+def write_bank_text(path, question_count, seed=0):
+    """写出与 write_bank 内容相同的 .txt 题库（每个段落一行），返回 path"""
+    with open(path, "w", encoding="utf-8") as f:
+        for text in iter_bank_paragraphs(question_count, seed):
+            f.write(text)
+            f.write("\n")
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="生成合成的 Word 题库")
+    parser.add_argument("count", type=int, help="题目数量")
+    parser.add_argument("output", help="输出的 .docx（或 .txt）路径")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    writer = write_bank_text if args.output.lower().endswith(".txt") else write_bank
+    writer(args.output, args.count, args.seed)
+    print(f"已生成 {args.output}（{args.count} 道题目）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""刷题核心的基准测试（无需图形界面）。
+
+对每个题库规模依次测量：解析 Word（流式 / 缓存命中 / 可选 python-docx 旧路径）、解析同样内容的 .txt、近似重复检测、
+写入数据库（保存）、读取数据库（加载）、随机抽题、作答、移回未答和批量删除。
+结果以 JSON 输出，可以保存下来与其他提交的结果对比：
+
+    python benchmarks/run_benchmarks.py --sizes 100 10000 -o before.json
+    python benchmarks/run_benchmarks.py --sizes 100 10000 -o after.json --compare before.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from make_bank import write_bank, write_bank_text # noqa: E402
+from quiz_engine import QuizEngine, describe_answer, display_options, question_header_text # noqa: E402
+
+DEFAULT_SIZES = (100, 1000, 10000, 100000)
+LEGACY_PARSE_MAX = 20000 # python-docx 旧路径太慢，超过这个规模就不测
+DRAW_OPS = 10000
+ANSWER_FRACTION = 0.2 # 作答的题目比例（之后全部移回）
+DELETE_FRACTION = 0.05 # 批量删除的题目比例
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure(func, repeat):
+    """运行 repeat 次，返回 (各次耗时列表, 最后一次的返回值)"""
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return times, result
+
+
+def bench_size(size, work_dir, repeat, seed, legacy):
+    """对一个题库规模跑完整的一组操作，返回结果字典列表"""
+    results = []
+
+    def record(op, times, ops=1):
+        best = min(times)
+        results.append({
+            "size": size, "op": op, "ops": ops, "repeat": len(times),
+            "best_s": best, "median_s": statistics.median(times),
+            "per_op_us": best / ops * 1e6,
+        })
+        print(f"  {op:<14} best {best * 1000:10.2f} ms   {best / ops * 1e6:10.2f} us/op", file=sys.stderr)
+
+    bank_path = os.path.join(work_dir, f"bank_{size}_s{seed}.docx")
+    if not os.path.exists(bank_path):
+        write_bank(bank_path, size, seed)
+    print(f"{size} 道题目 ({os.path.getsize(bank_path) / 1e6:.1f} MB)", file=sys.stderr)
+
+    # --- 解析 ---
+    parser_engine = QuizEngine(db_path=None, legacy_pkl_path=None, cache_dir=None)
+    parser_engine.parse_file(bank_path) # 预热（首次解析时才导入 lxml）
+    times, questions = measure(lambda: parser_engine.parse_file(bank_path), repeat)
+    record("parse", times, len(questions))
+    if legacy and size <= LEGACY_PARSE_MAX:
+        times, _ = measure(lambda: parser_engine.parse_file(bank_path, streaming=False), repeat)
+        record("parse_legacy", times, size)
+    cache_engine = QuizEngine(db_path=None, legacy_pkl_path=None, cache_dir=os.path.join(work_dir, f"cache_{size}"))
+    cache_engine.parse_file(bank_path) # 预热缓存
+    times, _ = measure(lambda: cache_engine.parse_file(bank_path), repeat)
+    record("parse_cached", times, size)
+    text_path = os.path.join(work_dir, f"bank_{size}_s{seed}.txt")
+    if not os.path.exists(text_path):
+        write_bank_text(text_path, size, seed)
+    times, _ = measure(lambda: parser_engine.parse_file(text_path), repeat)
+    record("parse_text", times, size)
+    times, _ = measure(lambda: parser_engine.deduplicate(questions), repeat)
+    record("dedup", times, size)
+
+    # --- 保存 / 加载 ---
+    db_path = os.path.join(work_dir, f"bench_{size}.db")
+    engine = QuizEngine(db_path=db_path, legacy_pkl_path=None, cache_dir=None)
+    engine.open_store()
+    def save():
+        engine.install(engine.build_bank(questions, bank_path))
+        engine.flush() # 检索索引由后台写入线程保存，计入保存时间
+    times, _ = measure(save, repeat)
+    record("save", times, size)
+    engine.close()
+
+    engine = QuizEngine(db_path=db_path, legacy_pkl_path=None, cache_dir=None)
+    engine.open_store()
+    times, _ = measure(engine.load, repeat)
+    record("load", times, size)
+
+    # --- 抽题（含界面显示前需要的文本） ---
+    def draw_many():
+        for _ in range(DRAW_OPS):
+            q = engine.draw()
+            question_header_text(q)
+            display_options(q)
+    times, _ = measure(draw_many, repeat)
+    record("draw", times, DRAW_OPS)
+
+    # --- 作答 -> 移回（每轮都从全部未答开始） ---
+    answer_count = max(1, int(size * ANSWER_FRACTION))
+    answer_times, flush_times, move_back_times = [], [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(answer_count):
+            q = engine.draw()
+            describe_answer(q, None)
+            engine.submit(q)
+        answer_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        engine.flush() # 后台线程合并写入这批作答
+        flush_times.append(time.perf_counter() - start)
+        answered_ids = engine.pool.answered_ids_range(0, engine.answered_count)
+        start = time.perf_counter()
+        engine.move_back(answered_ids)
+        move_back_times.append(time.perf_counter() - start)
+    record("answer", answer_times, answer_count)
+    record("answer_flush", flush_times, answer_count)
+    record("move_back", move_back_times, answer_count)
+
+    # --- 批量删除（每轮删除不同的题目） ---
+    delete_count = max(1, int(size * DELETE_FRACTION))
+    rng = random.Random(seed)
+    delete_times = []
+    for _ in range(repeat):
+        all_ids = [q.qid for q in engine.pool.all_questions()]
+        victims = rng.sample(all_ids, min(delete_count, len(all_ids)))
+        start = time.perf_counter()
+        engine.delete(victims)
+        delete_times.append(time.perf_counter() - start)
+    record("delete", delete_times, delete_count)
+    engine.close()
+    return results
+
+
+def compare(results, baseline_path):
+    """打印与基准结果的对比（比值 < 1 表示变快）"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    old = {(r["size"], r["op"]): r for r in baseline["results"]}
+    print(f"\n对比 {baseline_path} (commit {baseline['meta'].get('commit')})", file=sys.stderr)
+    for r in results:
+        before = old.get((r["size"], r["op"]))
+        if before is None:
+            continue
+        ratio = r["per_op_us"] / before["per_op_us"] if before["per_op_us"] else float("inf")
+        print(f"  {r['size']:>8} {r['op']:<14} {before['per_op_us']:10.2f} -> {r['per_op_us']:10.2f} us/op  x{ratio:.2f}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="刷题核心基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="题库规模（可到 1000000）")
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数，取最好成绩")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--legacy", action="store_true", help=f"同时测 python-docx 旧解析路径（规模 <= {LEGACY_PARSE_MAX}）")
+    parser.add_argument("--work-dir", help="存放生成的题库和数据库的目录（默认临时目录，用完删除）")
+    parser.add_argument("-o", "--output", help="结果 JSON 路径（默认输出到 stdout）")
+    parser.add_argument("--compare", metavar="BASELINE", help="与之前保存的结果 JSON 对比")
+    args = parser.parse_args(argv)
+
+    meta = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "repeat": args.repeat,
+        "seed": args.seed,
+    }
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        work_dir = args.work_dir or tmp_dir
+        os.makedirs(work_dir, exist_ok=True)
+        with contextlib.redirect_stdout(sys.stderr): # 引擎的提示信息不能混进 stdout 上的 JSON
+            for size in args.sizes:
+                results.extend(bench_size(size, work_dir, args.repeat, args.seed, args.legacy))
+
+    report = json.dumps({"meta": meta, "results": results}, ensure_ascii=False, indent=1)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
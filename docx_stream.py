@@ -0,0 +1,179 @@
+"""流式读取 .docx 正文段落，不构建完整的 docx.Document 对象树。
+
+直接从 zip 中打开 word/document.xml，用 lxml.etree.iterparse 逐个处理
+<w:body> 下的 <w:p>，处理完立即释放，内存占用不随文档大小增长。
+段落文本的拼接规则与 python-docx 的 Paragraph.text 保持一致。
+
+段落中的图片（<w:drawing>/<w:pict> 引用的图片部件）和 body 级表格不解码，只以媒体标记
+（见 question_parser.media_marker）的形式留在文本中：图片记下 zip 中的部件名，表格记下各单元格的文本。
+"""
+import json
+import posixpath
+import zipfile
+
+from lxml import etree
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_W = "{%s}" % W_NS
+
+W_BODY = _W + "body"
+W_P = _W + "p"
+W_TBL = _W + "tbl"
+W_SDT = _W + "sdt"
+W_R = _W + "r"
+W_HYPERLINK = _W + "hyperlink"
+W_T = _W + "t"
+W_TAB = _W + "tab"
+W_PTAB = _W + "ptab"
+W_BR = _W + "br"
+W_CR = _W + "cr"
+W_NO_BREAK_HYPHEN = _W + "noBreakHyphen"
+W_TYPE = _W + "type"
+W_DRAWING = _W + "drawing"
+W_PICT = _W + "pict"
+W_OBJECT = _W + "object"
+W_TR = _W + "tr"
+W_TC = _W + "tc"
+A_BLIP = "{http://schemas.openxmlformats.org/drawingml/2006/main}blip"
+V_IMAGEDATA = "{urn:schemas-microsoft-com:vml}imagedata"
+_R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+R_EMBED = _R + "embed"
+R_ID = _R + "id"
+PACKAGE_RELATIONSHIP = "{http://schemas.openxmlformats.org/package/2006/relationships}Relationship"
+
+DOCUMENT_PART = "word/document.xml"
+DOCUMENT_RELS_PART = "word/_rels/document.xml.rels"
+PROGRESS_EVERY = 256 # 每处理这么多个段落回调一次进度
+
+
+class _CountingReader:
+    """包装 zip 内的文件对象，记录已读取的（解压后）字节数，用于进度显示"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = self.raw.read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+def read_image_targets(zf):
+    """文档关系表中的图片：关系 id -> zip 中的部件名（如 word/media/image1.png）；外链图片不算"""
+    from question_parser import media_marker # question_parser 依赖本模块，延迟导入
+    try:
+        data = zf.read(DOCUMENT_RELS_PART)
+    except KeyError:
+        return {}
+    targets = {}
+    for rel in etree.fromstring(data).iter(PACKAGE_RELATIONSHIP):
+        if rel.get("Type", "").endswith("/image") and rel.get("TargetMode") != "External":
+            part = posixpath.normpath(posixpath.join("word", rel.get("Target", "")))
+            targets[rel.get("Id")] = media_marker("image", part)
+    return targets
+
+
+def _image_markers(elem, images):
+    """<w:drawing>/<w:pict>/<w:object> 中引用的图片的媒体标记"""
+    parts = []
+    for child in elem.iter(A_BLIP, V_IMAGEDATA):
+        marker = images.get(child.get(R_EMBED) or child.get(R_ID))
+        if marker:
+            parts.append(marker)
+    return parts
+
+
+def _run_text(r, images=None):
+    """与 python-docx CT_R.text 相同：只看 run 的直接子元素；给出 images 时图片写成媒体标记"""
+    parts = []
+    for child in r:
+        tag = child.tag
+        if tag == W_T:
+            if child.text:
+                parts.append(child.text)
+        elif tag == W_TAB or tag == W_PTAB:
+            parts.append("\t")
+        elif tag == W_BR:
+            # 只有换行型 break 记为 "\n"，分页/分栏为空串
+            if child.get(W_TYPE, "textWrapping") == "textWrapping":
+                parts.append("\n")
+        elif tag == W_CR:
+            parts.append("\n")
+        elif tag == W_NO_BREAK_HYPHEN:
+            parts.append("-")
+        elif images and (tag == W_DRAWING or tag == W_PICT or tag == W_OBJECT):
+            parts.extend(_image_markers(child, images))
+    return "".join(parts)
+
+
+def paragraph_text(p, images=None):
+    """提取 <w:p> 元素的文本（含超链接中的可见文本）"""
+    parts = []
+    for child in p:
+        if child.tag == W_R:
+            parts.append(_run_text(child, images))
+        elif child.tag == W_HYPERLINK:
+            for r in child:
+                if r.tag == W_R:
+                    parts.append(_run_text(r, images))
+    return "".join(parts)
+
+
+def table_marker(tbl):
+    """body 级表格的媒体标记：各行单元格的文本（单元格内多个段落用换行连接）"""
+    from question_parser import media_marker
+    rows = []
+    for tr in tbl.iter(W_TR):
+        rows.append(["\n".join(paragraph_text(p) for p in tc.iter(W_P)) for tc in tr.iter(W_TC)])
+    return media_marker("table", json.dumps(rows, ensure_ascii=False))
+
+
+def iter_body_paragraph_elements(filepath, progress=None, tables=False):
+    """逐个产出 <w:body> 直属的 <w:p> 元素（tables=True 时也产出直属的 <w:tbl>）。
+
+    产出的元素只在下一次迭代前有效，调用方用完后它会被清空并从树中摘除。
+    progress(已读取字节数, 总字节数) 每处理 PROGRESS_EVERY 个段落调用一次（按解压后的 XML 计）。
+    """
+    with zipfile.ZipFile(filepath) as zf:
+        total_bytes = zf.getinfo(DOCUMENT_PART).file_size
+        with zf.open(DOCUMENT_PART) as raw_file:
+            xml_file = _CountingReader(raw_file)
+            paragraph_count = 0
+            context = etree.iterparse(
+                xml_file, events=("end",), tag=(W_P, W_TBL, W_SDT),
+                huge_tree=True, remove_blank_text=False,
+            )
+            for _event, elem in context:
+                parent = elem.getparent()
+                if parent is None or parent.tag != W_BODY:
+                    # 表格/内容控件内部的段落：python-docx 的 doc.paragraphs 也不包含它们，
+                    # 等外层的 body 级元素结束时一起释放
+                    continue
+                if elem.tag == W_P or tables and elem.tag == W_TBL:
+                    yield elem
+                    paragraph_count += 1
+                    if progress is not None and paragraph_count % PROGRESS_EVERY == 0:
+                        progress(xml_file.bytes_read, total_bytes)
+                # body 级元素处理完毕：清空并删除之前已处理的兄弟节点，保持内存平稳
+                elem.clear(keep_tail=False)
+                while elem.getprevious() is not None:
+                    del parent[0]
+            del context
+            if progress is not None:
+                progress(total_bytes, total_bytes)
+
+
+def iter_docx_paragraphs(filepath, progress=None, media=True):
+    """流式产出文档正文中每个段落的文本（顺序与 doc.paragraphs 一致）。
+
+    media=True 时段落中的图片写成媒体标记，每个 body 级表格作为一个只含表格标记的段落。
+    """
+    if not media:
+        for p in iter_body_paragraph_elements(filepath, progress):
+            yield paragraph_text(p)
+        return
+    with zipfile.ZipFile(filepath) as zf:
+        images = read_image_targets(zf)
+    for elem in iter_body_paragraph_elements(filepath, progress, tables=True):
+        yield table_marker(elem) if elem.tag == W_TBL else paragraph_text(elem, images)
@@ -0,0 +1,56 @@
+"""流式写出只含纯文本段落的 .docx，不依赖 python-docx。
+
+直接把段落逐块写进 zip 中的 word/document.xml，内存占用不随文档大小增长；
+生成的文件可以用 Word 打开，也能被 question_parser 原样读回（段落内的换行写成 <w:br/>，
+docx_stream 读取时还原为换行）。
+"""
+import zipfile
+from xml.sax.saxutils import escape
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+PACKAGE_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+DOCUMENT_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+)
+DOCUMENT_TAIL = '<w:sectPr/></w:body></w:document>'
+WRITE_CHUNK = 4096 # 每攒够这么多个段落写一次
+
+
+def paragraph_xml(text):
+    """一个段落；文本中的换行写成 <w:br/>（与 Word 中 Shift+Enter 一致）"""
+    runs = "<w:br/>".join(f'<w:t xml:space="preserve">{escape(line)}</w:t>' for line in text.split("\n"))
+    return f"<w:p><w:r>{runs}</w:r></w:p>"
+
+
+def write_docx(path, paragraphs, compression=zipfile.ZIP_DEFLATED):
+    """把段落文本的可迭代对象写成 .docx，返回 path"""
+    with zipfile.ZipFile(path, "w", compression) as zf:
+        zf.writestr("[Content_Types].xml", CONTENT_TYPES)
+        zf.writestr("_rels/.rels", PACKAGE_RELS)
+        with zf.open("word/document.xml", "w", force_zip64=True) as f:
+            f.write(DOCUMENT_HEAD.encode("utf-8"))
+            chunk = []
+            for text in paragraphs:
+                chunk.append(paragraph_xml(text))
+                if len(chunk) >= WRITE_CHUNK:
+                    f.write("".join(chunk).encode("utf-8"))
+                    chunk = []
+            chunk.append(DOCUMENT_TAIL)
+            f.write("".join(chunk).encode("utf-8"))
+    return path
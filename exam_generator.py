@@ -0,0 +1,289 @@
+"""组卷：按蓝图从题库中分层随机抽题，打乱选项顺序（同步换算答案），批量写出试卷和答案 .docx。
+
+    python exam_generator.py --blueprint 单选题=20,多选题=10,判断题=10,填空题=5 --count 500 --no-overlap 3 -o papers/
+
+每份试卷写出两个文件：
+  * paper_0001.docx：题型标题、题干和选项，不含答案
+  * paper_0001_答案.docx：在每道题后加上 “正确答案：X”，格式与导入的 Word 题库相同，可以直接导入
+--no-overlap N 表示每份试卷与之前 N 份试卷没有重复的题目。输出目录中的 papers.json 记录每份试卷
+抽到的 qid 和选项顺序；再次向同一目录组卷时编号接着往下排，并且同样避开最近 N 份已有试卷。
+
+抽题依赖前几份试卷的结果，只能在主进程中依次进行（很快）；耗时的是写 .docx，这一步用进程池并行。
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter, deque, namedtuple
+
+from docx_writer import write_docx
+from quiz_engine import JUDGE_OPTIONS, QuizEngine, normalize_judge_answer
+
+Q_TYPES = ("单选题", "多选题", "判断题", "填空题")
+SECTION_NUMBERS = "一二三四五六七八九十"
+OPTION_LETTERS = "ABCDEFG"
+FIXED_ORDER_MARKERS = ("以上", "上述") # 选项中出现这些字样时依赖选项位置，整题不打乱
+DEFAULT_BLUEPRINT = "单选题=20,多选题=10,判断题=10,填空题=5"
+MANIFEST_NAME = "papers.json"
+ANSWER_SUFFIX = "_答案"
+
+# options：[(新字母, 选项内容), ...]；answer：答案行 “正确答案：” 后面的文本；
+# order：按新顺序排列的原选项字母，用于把试卷上的作答换算回题库
+PaperItem = namedtuple("PaperItem", "qid q_type stem options answer order")
+
+
+def parse_blueprint(text):
+    """"单选题=20,多选题=10" -> [("单选题", 20), ("多选题", 10)]，按书写顺序排列"""
+    blueprint = []
+    for part in text.replace("，", ",").split(","):
+        if not part.strip():
+            continue
+        name, sep, count = part.partition("=")
+        name = name.strip()
+        if not sep or name not in Q_TYPES:
+            raise ValueError(f"无法识别的组卷要求: {part.strip()}（应为 题型=题数，题型为 {'/'.join(Q_TYPES)}）")
+        try:
+            count = int(count)
+        except ValueError:
+            raise ValueError(f"题数不是整数: {part.strip()}") from None
+        if count > 0:
+            blueprint.append((name, count))
+    if not blueprint:
+        raise ValueError("组卷要求中没有题目")
+    if len({name for name, _count in blueprint}) != len(blueprint):
+        raise ValueError("组卷要求中有重复的题型")
+    return blueprint
+
+
+def is_usable(q):
+    """只有答案完整、能判分的题目才用于组卷"""
+    if not q.answer:
+        return False
+    if q.q_type == "单选题":
+        return q.answer in q.options
+    if q.q_type == "多选题":
+        return all(letter in q.options for letter in q.answer)
+    if q.q_type == "判断题":
+        return q.answer in ["A", "B"]
+    return q.q_type == "填空题"
+
+
+def sample_excluding(rng, pool, k, excluded):
+    """从 pool 中不放回地随机取 k 个不在 excluded 中的元素。
+
+    被排除的只占一小部分时直接拒绝采样，不必每次复制整个题型的题目列表。
+    """
+    if (len(excluded) + k) * 2 <= len(pool):
+        chosen = []
+        seen = set()
+        while len(chosen) < k:
+            item = pool[rng.randrange(len(pool))]
+            if item.qid in excluded or item.qid in seen:
+                continue
+            seen.add(item.qid)
+            chosen.append(item)
+        return chosen
+    available = [item for item in pool if item.qid not in excluded]
+    if len(available) < k:
+        raise ValueError(f"可用题目不足：需要 {k} 道，只剩 {len(available)} 道")
+    return rng.sample(available, k)
+
+
+class PaperSampler:
+    """按蓝图分层抽题，保证每份试卷与之前 no_overlap 份试卷没有重复题目"""
+
+    def __init__(self, questions, blueprint, no_overlap=0, rng=None, history=()):
+        self.blueprint = blueprint
+        self.rng = rng or random.Random()
+        self.pools = {q_type: [] for q_type, _count in blueprint}
+        for q in sorted(questions, key=lambda q: q.qid):
+            if q.q_type in self.pools and is_usable(q):
+                self.pools[q.q_type].append(q)
+        for q_type, count in blueprint:
+            need = count * (no_overlap + 1)
+            if len(self.pools[q_type]) < need:
+                raise ValueError(f"题库中可用的{q_type}只有 {len(self.pools[q_type])} 道，"
+                                 f"每份 {count} 道且与前 {no_overlap} 份不重复至少需要 {need} 道")
+        self.recent = deque(maxlen=no_overlap) if no_overlap else None
+        self.recent_counts = Counter() # 最近几份试卷中出现过的 qid -> 次数
+        for qids in history:
+            self._remember(qids)
+
+    def _remember(self, qids):
+        if self.recent is None:
+            return
+        if len(self.recent) == self.recent.maxlen:
+            for qid in self.recent[0]:
+                self.recent_counts[qid] -= 1
+                if not self.recent_counts[qid]:
+                    del self.recent_counts[qid]
+        self.recent.append(qids)
+        self.recent_counts.update(qids)
+
+    def next_paper(self):
+        """抽一份试卷，返回 [(题型, [Question, ...]), ...]"""
+        excluded = self.recent_counts.keys()
+        sections = [(q_type, sample_excluding(self.rng, self.pools[q_type], count, excluded))
+                    for q_type, count in self.blueprint]
+        self._remember([q.qid for _q_type, chosen in sections for q in chosen])
+        return sections
+
+
+def shuffle_options(q, rng):
+    """打乱选择题的选项顺序，返回 (选项列表, 换算后的答案, 原字母顺序)"""
+    q_options = q.options # 每次读取都会拼出新的字典
+    order = sorted(q_options)
+    if not any(marker in q_options[letter] for letter in order for marker in FIXED_ORDER_MARKERS):
+        rng.shuffle(order)
+    new_letter = {old: OPTION_LETTERS[i] for i, old in enumerate(order)}
+    options = [(OPTION_LETTERS[i], q_options[old]) for i, old in enumerate(order)]
+    if q.q_type == "单选题":
+        answer = new_letter[q.answer]
+    else:
+        answer = "".join(sorted(new_letter[letter] for letter in q.answer))
+    return options, answer, "".join(order)
+
+
+def paper_item(q, rng):
+    if q.q_type in ["单选题", "多选题"]:
+        options, answer, order = shuffle_options(q, rng)
+    elif q.q_type == "判断题":
+        options, answer, order = sorted(JUDGE_OPTIONS.items()), q.answer, "" # 与界面一致：A 为是、B 为否
+    else:
+        options, answer, order = [], " ".join(q.answer), ""
+    return PaperItem(q.qid, q.q_type, q.text, options, answer, order)
+
+
+def paper_paragraphs(title, sections, with_answers):
+    """一份试卷的段落文本；with_answers=True 时为可导入的题库格式"""
+    yield title
+    for index, (q_type, items) in enumerate(sections):
+        yield f"{SECTION_NUMBERS[index]}、{q_type}（共{len(items)}题）"
+        for num, item in enumerate(items, 1):
+            yield f"{num}. {item.stem}"
+            for letter, text in item.options:
+                yield f"{letter}. {text}"
+            if with_answers:
+                yield f"正确答案：{item.answer}"
+
+
+def write_paper(job):
+    """进程池任务：写出一份试卷和它的答案，返回试卷名"""
+    out_dir, name, sections = job
+    write_docx(os.path.join(out_dir, f"{name}.docx"), paper_paragraphs(name, sections, with_answers=False))
+    write_docx(os.path.join(out_dir, f"{name}{ANSWER_SUFFIX}.docx"),
+               paper_paragraphs(f"{name}{ANSWER_SUFFIX}", sections, with_answers=True))
+    return name
+
+
+def write_papers_parallel(jobs, max_workers=None, progress=None):
+    """用进程池并行写出试卷；progress(已完成份数, 总份数)"""
+    if not jobs:
+        return
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(jobs)))
+    if max_workers == 1:
+        for i, job in enumerate(jobs):
+            write_paper(job)
+            if progress is not None:
+                progress(i + 1, len(jobs))
+        return
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    executor = ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        futures = [executor.submit(write_paper, job) for job in jobs]
+        for done_count, future in enumerate(as_completed(futures), 1):
+            future.result()
+            if progress is not None:
+                progress(done_count, len(jobs))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def load_manifest(out_dir):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {"papers": []}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def generate_papers(questions, blueprint, count, out_dir, no_overlap=0, seed=None, max_workers=None, progress=None):
+    """组 count 份试卷写到 out_dir，返回新试卷的名字列表"""
+    manifest = load_manifest(out_dir)
+    history = [[qid for qid, _order in paper["questions"]] for paper in manifest["papers"]]
+    rng = random.Random(seed)
+    sampler = PaperSampler(questions, blueprint, no_overlap, rng, history)
+
+    jobs = []
+    start = len(manifest["papers"])
+    for i in range(start + 1, start + count + 1):
+        name = f"paper_{i:04d}"
+        sections = [(q_type, [paper_item(q, rng) for q in chosen]) for q_type, chosen in sampler.next_paper()]
+        jobs.append((out_dir, name, sections))
+        manifest["papers"].append({
+            "name": name,
+            "questions": [[item.qid, item.order] for _q_type, items in sections for item in items],
+        })
+    os.makedirs(out_dir, exist_ok=True)
+    write_papers_parallel(jobs, max_workers, progress)
+    save_manifest(out_dir, manifest)
+    return [name for _out_dir, name, _sections in jobs]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="灵感菇 随机组卷")
+    parser.add_argument("--db", default=QuizEngine.DB_FILE_NAME, help="题库数据库路径")
+    parser.add_argument("--blueprint", default=DEFAULT_BLUEPRINT, help=f"每份试卷的题型和题数（默认 {DEFAULT_BLUEPRINT}）")
+    parser.add_argument("--count", type=int, default=1, help="试卷份数")
+    parser.add_argument("--no-overlap", type=int, default=0, metavar="N", help="与之前 N 份试卷没有重复题目")
+    parser.add_argument("-o", "--out-dir", default="papers", help="输出目录")
+    parser.add_argument("--seed", type=int, help="随机种子（相同的题库和种子得到相同的试卷）")
+    parser.add_argument("--workers", type=int, help="写文件的进程数（默认为 CPU 核数）")
+    args = parser.parse_args(argv)
+
+    try:
+        blueprint = parse_blueprint(args.blueprint)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.count < 1 or args.no_overlap < 0:
+        parser.error("--count 至少为 1，--no-overlap 不能为负数")
+
+    engine = QuizEngine(db_path=args.db, legacy_pkl_path=None)
+    try:
+        engine.load()
+        questions = engine.pool.all_questions()
+    finally:
+        engine.close()
+    if not questions:
+        print("数据库中没有题目。请先导入题库。", file=sys.stderr)
+        return 1
+    for q in questions:
+        normalize_judge_answer(q)
+
+    start = time.perf_counter()
+    try:
+        names = generate_papers(questions, blueprint, args.count, args.out_dir, args.no_overlap,
+                                args.seed, args.workers)
+    except (OSError, ValueError) as e:
+        print(f"组卷失败: {e}", file=sys.stderr)
+        return 1
+    print(f"已生成 {len(names)} 份试卷（{names[0]} ~ {names[-1]}），用时 {time.perf_counter() - start:.2f} 秒；"
+          f"试卷和答案已写入 {args.out_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""自动判分：按题型比较作答与规范化后的答案。
+
+* 单选题 / 判断题：选项字母完全一致
+* 多选题：集合相等得 1 分；所选都正确但有漏选得 MULTI_PARTIAL_CREDIT 分；选了错误选项得 0 分
+* 填空题：逐空比较，每空 1/空数 分；比较前统一全角/半角（NFKC）、大小写，去掉全部空白和首尾标点
+
+答案的规范化结果（AnswerKey）与作答无关，每道题只需计算一次：build_answer_keys 一次算好整个题库，
+界面和终端模式中由 QuizEngine 按需计算并缓存。
+"""
+import re
+import unicodedata
+from collections import namedtuple
+
+MULTI_PARTIAL_CREDIT = 0.5
+
+# score：本题得分（0~1）；correct：完全答对为 True，题目没有可用答案时为 None
+Grade = namedtuple("Grade", "score correct")
+UNGRADED = Grade(0.0, None)
+
+# value：单选题/判断题为字母，多选题为字母的 frozenset，填空题为规范化后各空的 tuple
+AnswerKey = namedtuple("AnswerKey", "q_type value")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = "。．.，,、；;：:！!？?\"'“”‘’（）()《》<>【】[]"
+_JUDGE_WORDS = {
+    "A": "A", "T": "A", "Y": "A", "是": "A", "对": "A", "正确": "A", "√": "A", "✓": "A", "TRUE": "A",
+    "B": "B", "F": "B", "N": "B", "否": "B", "错": "B", "错误": "B", "×": "B", "✗": "B", "X": "B", "FALSE": "B",
+}
+
+
+def normalize_fill(text):
+    """填空内容的规范化：NFKC（全角转半角）、忽略大小写、去掉全部空白和首尾标点"""
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    return _WHITESPACE_RE.sub("", text).strip(_EDGE_PUNCTUATION)
+
+
+def normalize_letter(text):
+    return unicodedata.normalize("NFKC", text or "").strip().upper()
+
+
+def normalize_letters(response):
+    """多选题作答（字母的可迭代对象或 "ABD" 这样的字符串）-> 字母集合"""
+    letters = set()
+    for item in response or ():
+        letters.update(c for c in normalize_letter(item) if "A" <= c <= "Z")
+    return frozenset(letters)
+
+
+def answer_key(q):
+    """题目的规范化答案；没有解析出答案或题型未知时返回 None"""
+    if not q.answer:
+        return None
+    if q.q_type in ["单选题", "判断题"]:
+        return AnswerKey(q.q_type, normalize_letter(q.answer))
+    if q.q_type == "多选题":
+        return AnswerKey(q.q_type, normalize_letters(q.answer))
+    if q.q_type == "填空题":
+        return AnswerKey(q.q_type, tuple(normalize_fill(ans) for ans in q.answer))
+    return None
+
+
+def build_answer_keys(questions):
+    """{qid: AnswerKey 或 None}，整个题库只算一次"""
+    return {q.qid: answer_key(q) for q in questions}
+
+
+def grade_response(key, response):
+    """按 AnswerKey 判分。response 的格式同 quiz_engine.describe_answer"""
+    if key is None:
+        return UNGRADED
+    if key.q_type in ["单选题", "判断题"]:
+        correct = isinstance(response, str) and normalize_letter(response) == key.value
+        return Grade(1.0 if correct else 0.0, correct)
+    if key.q_type == "多选题":
+        chosen = normalize_letters(response)
+        if chosen == key.value:
+            return Grade(1.0, True)
+        partial = chosen and chosen < key.value
+        return Grade(MULTI_PARTIAL_CREDIT if partial else 0.0, False)
+    if key.q_type == "填空题":
+        fills = [normalize_fill(fill) for fill in response or []]
+        matched = sum(1 for fill, ans in zip(fills, key.value) if fill == ans)
+        return Grade(matched / len(key.value), matched == len(key.value) and len(fills) == len(key.value))
+    return UNGRADED
+
+
+def parse_response_text(q_type, text):
+    """把答题卡上的文本转换成 grade_response 接受的作答格式。
+
+    单选题取第一个字母；判断题另外接受 对/错、√/×、T/F 等写法；多选题取全部字母（"ABD"、"A,B,D" 均可）；
+    填空题各空用 | 分隔。空白文本视为未作答（None）。
+    """
+    text = unicodedata.normalize("NFKC", text or "").strip()
+    if not text:
+        return None
+    if q_type == "判断题":
+        judge = _JUDGE_WORDS.get(text.upper())
+        if judge is not None:
+            return judge
+    if q_type in ["单选题", "判断题"]:
+        letters = [c for c in text.upper() if "A" <= c <= "Z"]
+        return letters[0] if letters else None
+    if q_type == "多选题":
+        return sorted(normalize_letters([text]))
+    if q_type == "填空题":
+        return [fill.strip() for fill in text.split("|")]
+    return None
+
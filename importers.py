@@ -0,0 +1,254 @@
+"""题库导入器：按扩展名选择解析方式，全部流式读取、逐个产出 Question，不会一次性读入整个文件。
+
+* .docx：流式读取 word/document.xml（见 docx_stream）
+* .txt：每行相当于 Word 中的一个段落，格式与 Word 题库相同（题型标题 / 题干 / 选项 / “正确答案”）
+* .md：同 .txt，另外去掉标题的 #、引用的 >、列表符号和加粗/代码标记，忽略代码块的 ``` 行
+* .csv：第一行为表头，每行一道题；列为 题型、题干、答案，选项为 A~G 各一列或一个用 | 分隔的“选项”列
+* .json / .jsonl：对象数组或每行一个对象（JSON Lines），字段同 CSV（英文名见 FIELD_ALIASES），
+  options 可以是 {"A": "...", ...} 或按顺序排列的列表，answer 可以是字符串或列表
+
+.txt/.md 与 Word 题库共用 question_parser.iter_questions_from_paragraphs 的状态机；
+CSV/JSON 的每条记录由 question_from_fields 直接构造 Question。
+新格式用 register_importer 注册：函数接受 (文件路径, progress)，返回 Question 的迭代器。
+progress(已读取字节数, 文件字节数) 每 PROGRESS_EVERY 行（条）调用一次。
+"""
+import codecs
+import csv
+import json
+import os
+import re
+
+from grading import parse_response_text
+from question_parser import Question, get_question_type, iter_questions_from_docx, iter_questions_from_paragraphs, natural_sort_key
+
+PROGRESS_EVERY = 4096
+SNIFF_BYTES = 64 * 1024 # 判断文本编码时读取的字节数
+JSON_CHUNK_CHARS = 1024 * 1024
+OPTION_LETTERS = "ABCDEFG"
+
+# CSV 表头 / JSON 字段名（统一小写） -> 字段
+FIELD_ALIASES = {
+    "题型": "q_type", "type": "q_type", "q_type": "q_type",
+    "题干": "text", "题目": "text", "question": "text", "text": "text", "stem": "text",
+    "选项": "options", "options": "options",
+    "答案": "answer", "正确答案": "answer", "answer": "answer",
+}
+# 英文题型名 -> 题型
+TYPE_ALIASES = {
+    "single": "单选题", "multiple": "多选题", "multi": "多选题", "judge": "判断题", "true_false": "判断题",
+    "truefalse": "判断题", "fill": "填空题", "blank": "填空题",
+}
+_MARKDOWN_PREFIX_RE = re.compile(r"^(?:#{1,6}\s*|>\s*|[-*+]\s+)+")
+_MARKDOWN_EMPHASIS_RE = re.compile(r"\*\*|__|`")
+
+_IMPORTERS = {} # 扩展名（小写，含点） -> 导入函数
+
+
+def register_importer(*extensions):
+    """装饰器：把函数注册为这些扩展名的导入器"""
+    def decorator(func):
+        for ext in extensions:
+            _IMPORTERS[ext.lower()] = func
+        return func
+    return decorator
+
+
+def supported_extensions():
+    return sorted(_IMPORTERS)
+
+
+def is_bank_file(path):
+    return os.path.splitext(path)[1].lower() in _IMPORTERS
+
+
+def iter_questions_from_file(filepath, progress=None):
+    """按扩展名选择导入器，逐个产出 Question；不支持的格式抛出 ValueError"""
+    ext = os.path.splitext(filepath)[1].lower()
+    importer = _IMPORTERS.get(ext)
+    if importer is None:
+        raise ValueError(f"不支持的题库格式: {ext or filepath}（支持 {' '.join(supported_extensions())}）")
+    return importer(filepath, progress)
+
+
+def list_bank_files(folder):
+    """列出文件夹中所有支持的题库文件（忽略 Word 临时文件 ~$xxx），按自然顺序排序"""
+    names = [name for name in os.listdir(folder) if is_bank_file(name) and not name.startswith("~$")]
+    return sorted((os.path.join(folder, name) for name in names), key=natural_sort_key)
+
+
+# --- 文本读取 ---
+def detect_encoding(filepath):
+    """UTF-8（可带 BOM）或 GB18030（Windows 记事本的“ANSI”中文）"""
+    with open(filepath, "rb") as f:
+        sample = f.read(SNIFF_BYTES)
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False) # 样本末尾可能截断一个字符
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "gb18030"
+
+
+def open_text(filepath, newline=None):
+    return open(filepath, encoding=detect_encoding(filepath), newline=newline)
+
+
+def _report_every(items, f, progress, total):
+    """透传 items，每 PROGRESS_EVERY 个按底层文件已读取的字节数报告一次进度"""
+    if progress is None:
+        yield from items
+        return
+    for i, item in enumerate(items, 1):
+        if i % PROGRESS_EVERY == 0:
+            progress(f.buffer.tell(), total)
+        yield item
+    progress(total, total)
+
+
+def iter_text_lines(filepath, progress=None):
+    total = os.path.getsize(filepath)
+    with open_text(filepath) as f:
+        yield from _report_every(f, f, progress, total)
+
+
+# --- 逐条记录的格式（CSV / JSON） ---
+def _normalize_type(value):
+    value = str(value or "").strip()
+    return get_question_type(value) or TYPE_ALIASES.get(value.lower()) or get_question_type(value + "题")
+
+
+def _option_pairs(options):
+    """选项 -> [(字母, 内容)]：字典按字母排序，列表按顺序依次编为 A、B、C…"""
+    if isinstance(options, dict):
+        return sorted((str(letter).strip().upper(), str(text)) for letter, text in options.items())
+    if isinstance(options, str):
+        options = options.split("|")
+    return [(letter, str(text).strip()) for letter, text in zip(OPTION_LETTERS, options or ()) if str(text).strip()]
+
+
+def question_from_fields(q_type, text, options, answer, doc_order):
+    """由结构化字段构造 Question；题型无法识别或没有题干时返回 None。
+
+    answer：单选/判断题为字母（判断题也可写 对/错、√/×、T/F 等），多选题为字母串或字母列表，
+    填空题为各空的列表或用 | 分隔的字符串。
+    """
+    q_type = _normalize_type(q_type)
+    text = str(text or "").strip()
+    if q_type is None or not text:
+        return None
+    blanks = None
+    if q_type == "填空题":
+        blanks = answer if isinstance(answer, list) else str(answer or "").split("|")
+        blanks = [str(blank).strip() for blank in blanks if str(blank).strip()]
+        answer_text = " ".join(blanks)
+    elif isinstance(answer, list):
+        answer_text = "".join(str(letter).strip() for letter in answer)
+    else:
+        answer_text = str(answer or "").strip()
+    if q_type == "判断题":
+        answer_text = parse_response_text(q_type, answer_text) or answer_text
+    option_lines = [f"{letter}. {option}" for letter, option in _option_pairs(options)]
+    q = Question(q_type, text, "", option_lines, f"正确答案：{answer_text}", doc_order)
+    if blanks: # 各空原样保留（其中可能有空格）
+        q.answer = blanks
+    return q
+
+
+def _questions_from_records(records):
+    for doc_order, record in enumerate(records):
+        fields = {}
+        for key, value in record.items():
+            field = FIELD_ALIASES.get(str(key).strip().lower())
+            if field is not None:
+                fields[field] = value
+        options = fields.get("options")
+        if options is None: # 选项分列：A、B、C… 或 “选项A”
+            options = {}
+            for key, value in record.items():
+                letter = str(key).strip().upper().removeprefix("选项")
+                if len(letter) == 1 and letter in OPTION_LETTERS and str(value or "").strip():
+                    options[letter] = value
+        q = question_from_fields(fields.get("q_type"), fields.get("text"), options, fields.get("answer"), doc_order)
+        if q is not None:
+            yield q
+
+
+def iter_json_array(f, chunk_chars=JSON_CHUNK_CHARS):
+    """逐个解析顶层 JSON 数组的元素，只在内存中保留当前的一小段文本"""
+    decoder = json.JSONDecoder()
+    buffer = f.read(chunk_chars).lstrip()
+    if not buffer.startswith("["):
+        raise ValueError("JSON 题库应为对象数组或 JSON Lines")
+    pos = 1
+    eof = False
+    while True:
+        while pos < len(buffer) and (buffer[pos].isspace() or buffer[pos] == ","):
+            pos += 1
+        if pos >= len(buffer) or not eof and len(buffer) - pos < chunk_chars // 2:
+            if eof:
+                raise ValueError("JSON 数组没有结束")
+            more = f.read(chunk_chars)
+            eof = not more
+            buffer = buffer[pos:] + more
+            pos = 0
+            continue
+        if buffer[pos] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            more = f.read(chunk_chars) # 元素被截断在缓冲区末尾，读入更多再试
+            eof = not more
+            buffer = buffer[pos:] + more
+            pos = 0
+            continue
+        yield item
+        pos = end
+
+
+@register_importer(".docx")
+def import_docx(filepath, progress=None):
+    return iter_questions_from_docx(filepath, progress=progress)
+
+
+@register_importer(".txt")
+def import_text(filepath, progress=None):
+    return iter_questions_from_paragraphs(iter_text_lines(filepath, progress))
+
+
+def clean_markdown_line(line):
+    line = _MARKDOWN_PREFIX_RE.sub("", line.strip())
+    return _MARKDOWN_EMPHASIS_RE.sub("", line)
+
+
+@register_importer(".md", ".markdown")
+def import_markdown(filepath, progress=None):
+    lines = (clean_markdown_line(line) for line in iter_text_lines(filepath, progress)
+             if not line.lstrip().startswith("```"))
+    return iter_questions_from_paragraphs(lines)
+
+
+@register_importer(".csv")
+def import_csv(filepath, progress=None):
+    total = os.path.getsize(filepath)
+    with open_text(filepath, newline="") as f:
+        yield from _questions_from_records(_report_every(csv.DictReader(f), f, progress, total))
+
+
+@register_importer(".json", ".jsonl")
+def import_json(filepath, progress=None):
+    total = os.path.getsize(filepath)
+    with open_text(filepath) as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        if first == "[":
+            records = iter_json_array(f)
+        else: # JSON Lines：每行一个对象
+            records = (json.loads(line) for line in f if line.strip())
+        records = (record for record in records if isinstance(record, dict))
+        yield from _questions_from_records(_report_every(records, f, progress, total))
@@ -0,0 +1,171 @@
+"""可选的性能埋点：计时、Tk 事件循环延迟、tracemalloc 内存峰值和 cProfile。
+
+默认关闭。用环境变量或命令行参数开启（模块导入时读取一次）：
+
+    QB_PROFILE=1 python quiz_bank.py               # 计时 + Tk 事件循环延迟
+    python quiz_bank.py --profile=timing,memory     # 同上，并用 tracemalloc 记录内存峰值
+    python quiz_cli.py --profile=all                # 全部开启，退出时写出 cProfile 结果
+
+可选项：timing、latency、memory、cprofile，all 表示全部；只写 1 / 不带值时为 timing,latency。
+退出时把汇总打印到 stderr；cProfile 结果写到 QB_PROFILE_OUT（默认 qb_profile.prof），可用 snakeviz 等工具查看。
+
+关闭时 timed() 原样返回被装饰的函数、span() 返回空的上下文管理器，几乎没有额外开销。
+"""
+import atexit
+import contextlib
+import functools
+import os
+import sys
+import threading
+import time
+
+ALL_MODES = ("timing", "latency", "memory", "cprofile")
+DEFAULT_MODES = ("timing", "latency")
+ENV_VAR = "QB_PROFILE"
+OUTPUT_ENV_VAR = "QB_PROFILE_OUT"
+DEFAULT_PROFILE_OUTPUT = "qb_profile.prof"
+LATENCY_INTERVAL_MS = 50 # Tk 心跳间隔；实际回调时刻比预期晚多少就是事件循环被阻塞的时间
+
+
+def _parse_modes(value):
+    if value is None:
+        return frozenset()
+    value = value.strip().lower()
+    if value in ("", "0", "false", "off", "no"):
+        return frozenset()
+    if value in ("1", "true", "on", "yes"):
+        return frozenset(DEFAULT_MODES)
+    if value == "all":
+        return frozenset(ALL_MODES)
+    return frozenset(mode.strip() for mode in value.split(",") if mode.strip() in ALL_MODES)
+
+
+def _modes_from_argv(argv):
+    for i, arg in enumerate(argv[1:], 1):
+        if arg == "--profile":
+            if i + 1 < len(argv) and not argv[i + 1].startswith("-"):
+                return argv[i + 1] # --profile timing,memory
+            return "1"
+        if arg.startswith("--profile="):
+            return arg.split("=", 1)[1]
+    return None
+
+
+MODES = _parse_modes(_modes_from_argv(sys.argv) or os.environ.get(ENV_VAR))
+ENABLED = bool(MODES)
+
+
+class Stats:
+    """按名称汇总的耗时样本（秒），多线程安全"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}
+
+    def add(self, name, seconds):
+        with self._lock:
+            self._samples.setdefault(name, []).append(seconds)
+
+    def summary(self):
+        """[(名称, 次数, 总计, 平均, p95, 最大)]，按总耗时降序"""
+        with self._lock:
+            items = [(name, sorted(samples)) for name, samples in self._samples.items()]
+        rows = []
+        for name, samples in items:
+            total = sum(samples)
+            p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+            rows.append((name, len(samples), total, total / len(samples), p95, samples[-1]))
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows
+
+
+stats = Stats()
+_profiler = None
+
+
+def timed(name=None):
+    """装饰器：记录每次调用的耗时。未开启计时时原样返回函数"""
+    def decorate(func):
+        if "timing" not in MODES:
+            return func
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stats.add(label, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def span(name):
+    """上下文管理器版本的 timed，用于函数内的一段代码"""
+    if "timing" not in MODES:
+        return contextlib.nullcontext()
+    return _Span(name)
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        stats.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def watch_tk_latency(master, interval_ms=LATENCY_INTERVAL_MS):
+    """定时心跳，记录 Tk 事件循环的延迟（回调被阻塞的时长）。未开启时什么也不做"""
+    if "latency" not in MODES:
+        return
+    interval = interval_ms / 1000
+
+    def beat(expected):
+        now = time.perf_counter()
+        stats.add("tk.event_loop_lag", max(0.0, now - expected))
+        master.after(interval_ms, beat, time.perf_counter() + interval)
+
+    master.after(interval_ms, beat, time.perf_counter() + interval)
+
+
+def report(out=None):
+    """把汇总写到 out（默认 stderr）"""
+    out = out or sys.stderr
+    rows = stats.summary()
+    if rows:
+        print(f"\n{'操作':<40} {'次数':>8} {'总计ms':>10} {'平均ms':>10} {'p95ms':>10} {'最大ms':>10}", file=out)
+        for name, count, total, mean, p95, worst in rows:
+            print(f"{name:<40} {count:>8} {total * 1000:>10.2f} {mean * 1000:>10.3f} {p95 * 1000:>10.3f} {worst * 1000:>10.3f}", file=out)
+    if "memory" in MODES:
+        import tracemalloc
+        current, peak = tracemalloc.get_traced_memory()
+        print(f"tracemalloc: 当前 {current / 1e6:.1f} MB，峰值 {peak / 1e6:.1f} MB", file=out)
+
+
+def _finish():
+    if _profiler is not None:
+        _profiler.disable()
+        output = os.environ.get(OUTPUT_ENV_VAR, DEFAULT_PROFILE_OUTPUT)
+        _profiler.dump_stats(output)
+        print(f"cProfile 结果已写入 {output}", file=sys.stderr)
+    report()
+
+
+if ENABLED:
+    if "memory" in MODES:
+        import tracemalloc
+        tracemalloc.start()
+    if "cprofile" in MODES:
+        import cProfile
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    atexit.register(_finish)
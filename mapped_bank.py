@@ -0,0 +1,300 @@
+"""内存映射题库（.qbank）：题目数远超内存时（几百万道）也能直接刷题，不把题库整体读进内存。
+
+    python mapped_bank.py 题库.qbank --build 第1章.docx 第2章.docx   # 流式解析题库文件，写出 .qbank
+    python mapped_bank.py 题库.qbank                                # 随机抽题作答（-n 限定题数）
+    python mapped_bank.py 题库.qbank --stats                        # 只显示统计
+
+文件布局（小端序）：
+  * 头部 HEADER：魔数、版本、构建编号、题数、各题型题数、索引和字符串堆的位置
+  * 字符串堆：每道题一段 UTF-8 JSON（question_to_record 的字段），依次紧密排列
+  * 索引：每道题一条定长记录 INDEX_ENTRY —— 在堆中的偏移、长度、题型编号
+打开时只 mmap 并读取头部，耗时与题数无关；抽到某道题时才按索引切出它的那一段并解码，
+只有访问过的页面会被读入内存（由操作系统按需换入换出）。
+
+作答进度保存在旁边的 xxx.qbank.state：头部（构建编号、已答题数）之后每道题一个字节，同样 mmap 读写。
+重新构建题库后构建编号改变，旧的进度自动作废。随机抽题先在全体题目中随机取下标、跳过已答的，
+连续 DRAW_TRIES 次都落在已答题上（绝大多数题已答）时，改为从随机位置向后查找第一道未答题。
+构建时流式读取题库文件，内存中只保留每道题 16 字节的索引；不做近似重复合并（需要全部题目同时在内存中）。
+"""
+import argparse
+import json
+import mmap
+import os
+import random
+import struct
+import sys
+import tempfile
+
+from answer_history import Q_TYPE_CODES, Q_TYPE_NAMES
+from grading import answer_key, grade_response
+from importers import iter_questions_from_file
+from question_parser import question_from_record, question_to_record
+
+BANK_MAGIC = b"QBMM"
+BANK_VERSION = 1
+STATE_MAGIC = b"QBST"
+BANK_SUFFIX = ".qbank"
+STATE_SUFFIX = ".state"
+# 魔数, 版本, (保留), 构建编号, 题数, 各题型题数（按 Q_TYPE_CODES 的编号 1~4）, 索引偏移, 堆偏移
+HEADER = struct.Struct("<4sHHQQ4QQQ")
+# 在堆中的偏移, 长度, 题型编号
+INDEX_ENTRY = struct.Struct("<QIB3x")
+# 魔数, 构建编号, 已答题数
+STATE_HEADER = struct.Struct("<4s4xQQ")
+STATE_ANSWERED = 1
+DRAW_TRIES = 32
+BUILD_PROGRESS_EVERY = 10000 # 构建时每写出这么多道题回调一次进度
+
+
+def state_path_for(bank_path):
+    return bank_path + STATE_SUFFIX
+
+
+def encode_question(q):
+    return json.dumps(question_to_record(q), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def decode_question(data):
+    record = json.loads(data)
+    record[-1] = [tuple(ref) for ref in record[-1]] # media
+    return question_from_record(record)
+
+
+def write_mapped_bank(path, questions, progress=None):
+    """把题目（任意可迭代对象，可以是生成器）写成 .qbank，返回题数；没有题目时抛出 ValueError。
+
+    先写到同目录的临时文件再 os.replace，写到一半失败不会留下半个题库。
+    progress(已写出的题数) 每 BUILD_PROGRESS_EVERY 道题调用一次。
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    index = bytearray()
+    type_counts = [0] * 4
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(bytes(HEADER.size))
+            heap_offset = f.tell()
+            position = 0
+            for q in questions:
+                payload = encode_question(q)
+                code = Q_TYPE_CODES.get(q.q_type, 0)
+                f.write(payload)
+                index += INDEX_ENTRY.pack(position, len(payload), code)
+                position += len(payload)
+                if code:
+                    type_counts[code - 1] += 1
+                count = len(index) // INDEX_ENTRY.size
+                if progress is not None and count % BUILD_PROGRESS_EVERY == 0:
+                    progress(count)
+            count = len(index) // INDEX_ENTRY.size
+            if not count:
+                raise ValueError("没有可写入的题目")
+            f.write(bytes(-position % 8)) # 索引按 8 字节对齐
+            index_offset = heap_offset + position + (-position % 8)
+            f.write(index)
+            build_id = int.from_bytes(os.urandom(8), "little")
+            f.seek(0)
+            f.write(HEADER.pack(BANK_MAGIC, BANK_VERSION, 0, build_id, count, *type_counts, index_offset, heap_offset))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return count
+
+
+def build_from_files(path, filepaths, progress=None):
+    """依次流式解析多个题库文件（格式见 importers）并写成 .qbank；每道题的 source_file 为文件名"""
+    def questions():
+        for filepath in filepaths:
+            source_name = os.path.basename(filepath)
+            for q in iter_questions_from_file(filepath):
+                q.source_file = source_name
+                yield q
+    return write_mapped_bank(path, questions(), progress)
+
+
+class MappedBank:
+    """只读 mmap 的 .qbank 加可读写 mmap 的进度文件；下标 i 的题目 qid 为 i + 1"""
+
+    def __init__(self, path):
+        self.path = path
+        self.state_path = state_path_for(path)
+        with open(path, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(self._data, "madvise"): # 抽题是随机访问，关掉预读，只换入真正访问的页面
+            self._data.madvise(mmap.MADV_RANDOM)
+        try:
+            if len(self._data) < HEADER.size:
+                raise ValueError(f"{path} 不是题库文件")
+            (magic, version, _reserved, self.build_id, self.count, *type_counts,
+             self._index_offset, self._heap_offset) = HEADER.unpack_from(self._data)
+            if magic != BANK_MAGIC or version != BANK_VERSION:
+                raise ValueError(f"{path} 不是题库文件或版本不受支持")
+            if len(self._data) < self._index_offset + self.count * INDEX_ENTRY.size:
+                raise ValueError(f"{path} 不完整")
+            self.type_counts = {Q_TYPE_NAMES[code]: n for code, n in enumerate(type_counts, 1) if n}
+            self._state = self._open_state()
+        except BaseException:
+            self._data.close()
+            raise
+
+    def _open_state(self):
+        """打开（必要时新建或重置）进度文件；新文件用 truncate 扩展，全是 0（未答），不逐字节写入"""
+        size = STATE_HEADER.size + self.count
+        mode = "r+b" if os.path.exists(self.state_path) else "w+b"
+        with open(self.state_path, mode) as f:
+            header = f.read(STATE_HEADER.size)
+            valid = len(header) == STATE_HEADER.size and os.fstat(f.fileno()).st_size == size
+            if not valid or STATE_HEADER.unpack(header)[:2] != (STATE_MAGIC, self.build_id):
+                f.truncate(0)
+                f.truncate(size)
+                f.seek(0)
+                f.write(STATE_HEADER.pack(STATE_MAGIC, self.build_id, 0))
+                f.flush()
+            return mmap.mmap(f.fileno(), size)
+
+    def close(self):
+        self._state.flush()
+        self._state.close()
+        self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    # --- 题目：按需解码 ---
+    def question(self, i):
+        """第 i 道题（0 起），每次调用都重新解码"""
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        offset, length, _code = INDEX_ENTRY.unpack_from(self._data, self._index_offset + i * INDEX_ENTRY.size)
+        start = self._heap_offset + offset
+        q = decode_question(self._data[start:start + length])
+        q.qid = i + 1
+        return q
+
+    def q_type(self, i):
+        """第 i 道题的题型（只读索引，不解码题目）"""
+        code = INDEX_ENTRY.unpack_from(self._data, self._index_offset + i * INDEX_ENTRY.size)[2]
+        return Q_TYPE_NAMES.get(code)
+
+    # --- 进度 ---
+    @property
+    def answered_count(self):
+        return STATE_HEADER.unpack_from(self._state)[2]
+
+    @property
+    def unanswered_count(self):
+        return self.count - self.answered_count
+
+    def is_answered(self, i):
+        return self._state[STATE_HEADER.size + i] == STATE_ANSWERED
+
+    def draw(self, rng=random):
+        """随机取一道未答题的下标，没有时返回 None"""
+        if not self.unanswered_count:
+            return None
+        for _ in range(DRAW_TRIES):
+            i = rng.randrange(self.count)
+            if not self.is_answered(i):
+                return i
+        start = STATE_HEADER.size + rng.randrange(self.count)
+        pos = self._state.find(b"\x00", start)
+        if pos < 0:
+            pos = self._state.find(b"\x00", STATE_HEADER.size, start)
+        return pos - STATE_HEADER.size if pos >= 0 else None
+
+    def mark_answered(self, i):
+        """标记为已答；原本已答时返回 False"""
+        if self.is_answered(i):
+            return False
+        self._state[STATE_HEADER.size + i] = STATE_ANSWERED
+        STATE_HEADER.pack_into(self._state, 0, STATE_MAGIC, self.build_id, self.answered_count + 1)
+        return True
+
+    def reset_progress(self):
+        """全部移回未答"""
+        self._state.close()
+        os.remove(self.state_path)
+        self._state = self._open_state()
+
+
+def drill(bank, count=None, prompt=input, out=sys.stdout, rng=random):
+    """与 quiz_cli.drill 相同的作答循环，题目从 MappedBank 中按需解码；返回本次作答的题数"""
+    from quiz_cli import print_question, read_response # 只有刷题时需要
+    from quiz_engine import describe_answer, describe_grade, normalize_judge_answer
+    answered = 0
+    while count is None or answered < count:
+        i = bank.draw(rng)
+        if i is None:
+            print("所有题目都已作答完毕！", file=out)
+            break
+        q = bank.question(i)
+        normalize_judge_answer(q)
+        print_question(q, out)
+        try:
+            command, response = read_response(q, prompt)
+        except EOFError:
+            break
+        if command == "quit":
+            break
+        if command == "skip":
+            continue
+        grade = grade_response(answer_key(q), response)
+        user_answer_str, correct_answer_str = describe_answer(q, response)
+        print(f"{describe_grade(grade)}\n{user_answer_str}\n{correct_answer_str}", file=out)
+        if bank.mark_answered(i):
+            answered += 1
+    return answered
+
+
+def print_stats(bank, out=sys.stdout):
+    types = "，".join(f"{name} {n}" for name, n in bank.type_counts.items())
+    print(f"共 {bank.count} 道题（{types}） | 未答题: {bank.unanswered_count} | 已答题: {bank.answered_count}", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="灵感菇 内存映射题库（适合几百万道题的大题库）")
+    parser.add_argument("bank", help=f"题库文件（{BANK_SUFFIX}）")
+    parser.add_argument("--build", nargs="+", metavar="FILE",
+                        help="解析这些题库文件（.docx .txt .md .csv .json .jsonl），写出（覆盖）bank，进度清零")
+    parser.add_argument("-n", "--count", type=int, default=None, help="本次最多作答的题数")
+    parser.add_argument("--stats", action="store_true", help="只显示统计后退出")
+    parser.add_argument("--reset", action="store_true", help="把全部题目移回未答")
+    args = parser.parse_args(argv)
+
+    if args.build:
+        def report(written):
+            print(f"\r已写入 {written} 道题目…", end="", file=sys.stderr)
+        try:
+            written = build_from_files(args.bank, args.build, progress=report)
+        except (OSError, ValueError) as e:
+            print(f"\n构建失败: {e}", file=sys.stderr)
+            return 1
+        print(f"\r题库已写入 {args.bank}，共 {written} 道题目。", file=sys.stderr)
+
+    try:
+        bank = MappedBank(args.bank)
+    except (OSError, ValueError) as e:
+        print(f"无法打开题库: {e}", file=sys.stderr)
+        return 1
+    with bank:
+        if args.reset:
+            bank.reset_progress()
+        print_stats(bank)
+        if args.stats:
+            return 0
+        answered = drill(bank, args.count)
+        print(f"\n本次作答 {answered} 道。", end=" ")
+        print_stats(bank)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""题目中图片的按需加载：导入时只记下引用（Question.media），显示时才从 .docx 中读取并解码。
+
+* 原始字节：从 zip 中读取，放在按字节数限额的 LRU 中；prefetch 在后台线程里提前读好下一道题的图片
+* Tk 图片：只能在主线程创建，放在按像素数限额的 LRU 中；比显示宽度大的图片按整数倍缩小后再缓存
+Tk 自带 PNG/GIF 解码；其他格式（JPEG、EMF 等）在安装了 Pillow 时才能显示，否则 photo_image 返回 None。
+启动和导入都不读取图片，题库中有多少图片都不影响启动时间和常驻内存。
+"""
+import base64
+import io
+import math
+import threading
+import zipfile
+from collections import OrderedDict, deque
+
+RAW_CACHE_BYTES = 32 * 1024 * 1024
+IMAGE_CACHE_PIXELS = 8 * 1024 * 1024 # 每像素约 4 字节
+OPEN_ARCHIVES = 4 # 保持打开的 .docx 个数（避免每张图都重新读取 zip 目录）
+TK_IMAGE_SUFFIXES = (".png", ".gif")
+
+
+class LRUCache:
+    """按大小限额的 LRU：总大小超过 capacity 时淘汰最久未使用的项（至少保留最新的一项）"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.size = 0
+        self._items = OrderedDict() # key -> (value, size)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            self._items.move_to_end(key)
+            return item[0]
+
+    def put(self, key, value, size):
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self._items[key] = (value, size)
+            self.size += size
+            while self.size > self.capacity and len(self._items) > 1:
+                _key, (_value, evicted_size) = self._items.popitem(last=False)
+                self.size -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+
+class MediaCache:
+    def __init__(self, raw_capacity=RAW_CACHE_BYTES, image_capacity=IMAGE_CACHE_PIXELS):
+        self.raw = LRUCache(raw_capacity) # (docx 路径, 部件名) -> bytes
+        self.images = LRUCache(image_capacity) # (docx 路径, 部件名, 最大宽度) -> Tk 图片
+        self._archives = OrderedDict() # docx 路径 -> 打开的 ZipFile
+        self._archive_lock = threading.Lock()
+        self._prefetch = deque()
+        self._prefetch_wake = threading.Condition()
+        self._prefetch_thread = None
+
+    # --- 原始字节（任何线程） ---
+    def read(self, source, part):
+        """读取 .docx 中的一个部件；文件或部件不存在时抛出 OSError / KeyError"""
+        key = (source, part)
+        data = self.raw.get(key)
+        if data is None:
+            with self._archive_lock:
+                archive = self._archives.pop(source, None) or zipfile.ZipFile(source)
+                self._archives[source] = archive
+                while len(self._archives) > OPEN_ARCHIVES:
+                    _path, oldest = self._archives.popitem(last=False)
+                    oldest.close()
+                data = archive.read(part)
+            self.raw.put(key, data, len(data))
+        return data
+
+    def prefetch(self, source, parts):
+        """在后台线程中提前读取这些图片（只替换尚未开始的预取，不阻塞调用方）"""
+        parts = [part for part in parts if (source, part) not in self.raw]
+        if not source or not parts:
+            return
+        with self._prefetch_wake:
+            self._prefetch.clear() # 只预取最新的一道题
+            self._prefetch.extend((source, part) for part in parts)
+            if self._prefetch_thread is None:
+                self._prefetch_thread = threading.Thread(target=self._prefetch_loop, name="media-prefetch", daemon=True)
+                self._prefetch_thread.start()
+            self._prefetch_wake.notify()
+
+    def _prefetch_loop(self):
+        while True:
+            with self._prefetch_wake:
+                while not self._prefetch:
+                    self._prefetch_wake.wait()
+                source, part = self._prefetch.popleft()
+            try:
+                self.read(source, part)
+            except (OSError, KeyError, zipfile.BadZipFile):
+                pass # 显示时会再试一次并显示占位文字
+
+    # --- Tk 图片（主线程） ---
+    def photo_image(self, source, part, max_width):
+        """解码为宽度不超过 max_width 的 Tk 图片；无法读取或不支持的格式返回 None"""
+        key = (source, part, max_width)
+        image = self.images.get(key)
+        if image is None:
+            try:
+                image = decode_image(self.read(source, part), part, max_width)
+            except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+                return None
+            if image is None:
+                return None
+            self.images.put(key, image, image.width() * image.height())
+        return image
+
+    def clear(self):
+        """题库更换或更新后调用：丢弃缓存并关闭打开的 .docx"""
+        self.raw.clear()
+        self.images.clear()
+        with self._archive_lock:
+            for archive in self._archives.values():
+                archive.close()
+            self._archives.clear()
+
+
+def decode_image(data, part, max_width):
+    import tkinter as tk # 只有界面需要
+    if part.lower().endswith(TK_IMAGE_SUFFIXES):
+        try:
+            image = tk.PhotoImage(data=base64.b64encode(data))
+        except tk.TclError as e:
+            raise ValueError(str(e)) from None
+        if image.width() > max_width:
+            image = image.subsample(math.ceil(image.width() / max_width))
+        return image
+    try:
+        from PIL import Image, ImageTk
+    except ImportError:
+        return None
+    with Image.open(io.BytesIO(data)) as pil_image:
+        pil_image.thumbnail((max_width, pil_image.height))
+        return ImageTk.PhotoImage(pil_image)
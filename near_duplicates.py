@@ -0,0 +1,173 @@
+"""导入时的近似重复题检测：字符 shingle + MinHash（单次哈希分桶）+ LSH 分段。
+
+* 规范化：NFKC、小写、去掉空白和标点，只保留文字和数字；内容 = 题干 + 各选项文本（按文本排序）
+* shingle：规范化文本中连续 SHINGLE_SIZE 个字符；每个 shingle 只算一次哈希，
+  按哈希值分到 SIGNATURE_BINS 个桶里各取最小值作为签名（one permutation hashing），
+  空桶从后面最近的非空桶借值（rotation densification），每道题 O(shingle 数)
+* LSH：签名切成 BANDS 段，每段 ROWS_PER_BAND 个值；只有至少一段完全相同、题型相同
+  且文中的数字完全一致的题目才会被拿来比较，再用 shingle 集合的精确 Jaccard 相似度确认
+  （只差一个数字的题目，如“第3章”/“第4章”、“2+3=?”/“2+4=?”，通常是不同的题）
+* 确认相似后还要求答案相同才合并：选择题比较正确选项的规范化文本（选项顺序不同也算同一答案），
+  其余题型比较 grading.answer_key；题干相似而答案不同的题目不合并，作为冲突列出，留给用户判断
+* 题型、规范化文本和答案都相同的题目直接按字典合并，不计算签名
+* 按顺序逐题处理，每组保留最先出现的一道（规范副本），后面相似的题目并入该组；
+  桶里只放规范副本，每个桶最多比较 MAX_BUCKET_CHECKS 个，整体近似 O(n)
+
+默认参数下 Jaccard 0.8 的两道题有约 96% 的概率成为候选，0.5 时约 33%，随机的两道题几乎不会。
+"""
+import functools
+import re
+import unicodedata
+from collections import namedtuple
+
+from grading import answer_key
+
+SHINGLE_SIZE = 3
+ROWS_PER_BAND = 4
+BANDS = 6
+SIGNATURE_BINS = ROWS_PER_BAND * BANDS
+DEFAULT_THRESHOLD = 0.8 # shingle 集合的 Jaccard 相似度不低于此值即视为重复
+MAX_BUCKET_CHECKS = 8
+CANDIDATE_CACHE_SIZE = 4096
+PROGRESS_EVERY = 1000
+
+_EMPTY = float("inf")
+_NON_WORD_RE = re.compile(r"[\W_]+")
+_NUMBER_RE = re.compile(r"\d+")
+
+# canonical：保留的题目；duplicates：并入它的重复题；conflicts：与它相似但答案不同、没有合并的题目
+DuplicateGroup = namedtuple("DuplicateGroup", "canonical duplicates conflicts")
+
+
+def normalize_text(text):
+    return _NON_WORD_RE.sub("", unicodedata.normalize("NFKC", text).lower())
+
+
+def question_fingerprint_text(q):
+    """参与比较的规范化文本：题干 + 选项（按选项文本排序，只是选项顺序不同的题目文本相同）"""
+    return normalize_text(q.text + "".join(sorted(q.options.values())))
+
+
+def comparable_answer(q):
+    """用于判断两道相似题目答案是否相同的值：选择题为正确选项规范化文本的集合，其余题型为 answer_key"""
+    key = answer_key(q)
+    if key is None or q.q_type not in ["单选题", "多选题"]:
+        return key
+    options = q.options
+    letters = [key.value] if q.q_type == "单选题" else key.value
+    if not all(letter in options for letter in letters): # 答案字母没有对应的选项时只能比较字母
+        return key
+    return frozenset(normalize_text(options[letter]) for letter in letters)
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """文本的 shingle 集合；比 size 短的文本整体作为一个 shingle"""
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def signature(shingle_set, bins=SIGNATURE_BINS):
+    """由 shingle 集合得到长度为 bins 的 MinHash 签名（空集合返回 None）"""
+    if not shingle_set:
+        return None
+    sig = [_EMPTY] * bins
+    for h in map(hash, shingle_set): # 字符串的哈希已在放入集合时算好并缓存
+        b = h % bins
+        if h < sig[b]:
+            sig[b] = h
+    if _EMPTY in sig:
+        # 空桶取后面（循环）最近的非空桶的值加上距离，避免不同空桶取到同一个值
+        # 从后往前扫两圈，第二圈（i < bins）时 nearest 一定已经有值
+        raw = sig[:]
+        nearest = None # (展开后的位置, 值)
+        for i in range(2 * bins - 1, -1, -1):
+            v = raw[i % bins]
+            if v != _EMPTY:
+                nearest = (i, v)
+            elif i < bins:
+                sig[i] = nearest[1] + (nearest[0] - i)
+    return sig
+
+
+def jaccard(a, b):
+    if not a and not b:
+        return 1.0
+    common = len(a & b)
+    return common / (len(a) + len(b) - common)
+
+
+def find_duplicate_groups(questions, threshold=DEFAULT_THRESHOLD, progress=None):
+    """返回 [DuplicateGroup, ...]，按规范题目出现的先后排列；只列出有重复题或冲突题的分组。
+
+    progress(已处理, 总数) 每 PROGRESS_EVERY 道题调用一次；它抛出的异常（如取消）会直接向上传递。
+    """
+    buckets = {}         # hash(题型, 数字, 段号, 段内签名) -> (规范副本下标, ...)
+    canonical_texts = {} # 规范副本下标 -> 规范化文本（确认时再算 shingle，避免常驻大量集合）
+    canonical_keys = {}  # 规范副本下标 -> 规范化答案
+    exact = {}           # (题型, 规范化文本, 规范化答案) -> 规范副本下标：完全相同的题目不用算签名
+    groups = {}          # 规范副本下标 -> [重复题目下标, ...]
+    conflicts = {}       # 规范副本下标 -> [题干相似但答案不同的题目下标, ...]
+
+    @functools.lru_cache(maxsize=CANDIDATE_CACHE_SIZE) # 同一个规范副本常被反复比较
+    def canonical_shingles(index):
+        return shingles(canonical_texts[index])
+
+    for index, q in enumerate(questions):
+        if progress is not None and index % PROGRESS_EVERY == 0:
+            progress(index, len(questions))
+        text = question_fingerprint_text(q)
+        key = comparable_answer(q)
+        match = exact.get((q.q_type, text, key))
+        if match is not None:
+            groups.setdefault(match, []).append(index)
+            continue
+        shingle_set = shingles(text)
+        sig = signature(shingle_set)
+        if sig is None:
+            continue
+        numbers = tuple(_NUMBER_RE.findall(text))
+        # 键只保存哈希值、桶用整数元组：常驻内存的容器对象太多会让垃圾回收反复扫描；
+        # 哈希碰撞只会多一次精确比较
+        bucket_keys = [hash((q.q_type, numbers, band, *sig[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]))
+                       for band in range(BANDS)]
+
+        checked = set()
+        conflict = None # 第一个相似但答案不同的规范副本；找到答案相同的就合并，不再算冲突
+        for bucket_key in bucket_keys:
+            for candidate in buckets.get(bucket_key, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                if jaccard(shingle_set, canonical_shingles(candidate)) >= threshold:
+                    if canonical_keys[candidate] == key:
+                        match = candidate
+                        break
+                    if conflict is None:
+                        conflict = candidate
+            if match is not None:
+                break
+
+        if match is not None:
+            groups.setdefault(match, []).append(index)
+            continue
+        if conflict is not None:
+            conflicts.setdefault(conflict, []).append(index)
+        canonical_texts[index] = text
+        canonical_keys[index] = key
+        exact[(q.q_type, text, key)] = index
+        for bucket_key in bucket_keys:
+            bucket = buckets.get(bucket_key, ())
+            if len(bucket) < MAX_BUCKET_CHECKS:
+                buckets[bucket_key] = bucket + (index,)
+    return [DuplicateGroup(questions[i], [questions[j] for j in groups.get(i, ())],
+                           [questions[j] for j in conflicts.get(i, ())])
+            for i in sorted(groups.keys() | conflicts.keys())]
+
+
+def deduplicate(questions, threshold=DEFAULT_THRESHOLD, progress=None):
+    """去掉近似重复的题目，返回 (保留的题目列表（保持原顺序）, 分组)；答案冲突的题目都保留"""
+    groups = find_duplicate_groups(questions, threshold, progress)
+    dropped = {id(q) for group in groups for q in group.duplicates}
+    return [q for q in questions if id(q) not in dropped], groups
+
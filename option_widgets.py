@@ -0,0 +1,112 @@
+"""选项区组件池：抽题时复用已有的单选/多选/填空组件，不再每次销毁重建。
+
+每类组件各保留一组（数量按出现过的最多选项/空数增长），显示新题时只改文本、
+清空变量，并用 pack_forget 隐藏多余的组件。一次抽题只需要少量 config 调用。
+"""
+import tkinter as tk
+
+
+class OptionWidgetPool:
+    def __init__(self, frame, font):
+        self.frame = frame
+        self.font = font
+        self.wraplength = 1
+        self.var_choice = tk.StringVar(value="") # 单选题/判断题共用
+        self._radios = []      # Radiobutton
+        self._checks = []      # (Checkbutton, BooleanVar, 字母)
+        self._blanks = []      # (Label, Entry)
+        self._hint = None      # 未知题型时的提示 Label
+        self._visible = []     # 当前已 pack 的组件（按 pack 顺序）
+        self._mode = None      # "choice" / "multi" / "blank" / "hint" / None
+
+    # --- 显示 ---
+    def show_choices(self, options):
+        """单选题/判断题：options 为 {字母: 选项文本}"""
+        self._switch("choice")
+        self.var_choice.set("")
+        for i, (letter, opt_text) in enumerate(options.items()):
+            if i == len(self._radios):
+                self._radios.append(tk.Radiobutton(self.frame, variable=self.var_choice, justify=tk.LEFT,
+                                                   wraplength=self.wraplength, font=self.font))
+            self._radios[i].config(text=f"{letter}. {opt_text}", value=letter)
+        self._show(self._radios[:len(options)], anchor="w")
+
+    def show_multi(self, options):
+        """多选题：options 为 {字母: 选项文本}"""
+        self._switch("multi")
+        for i, (letter, opt_text) in enumerate(options.items()):
+            if i == len(self._checks):
+                var = tk.BooleanVar()
+                cb = tk.Checkbutton(self.frame, variable=var, justify=tk.LEFT,
+                                    wraplength=self.wraplength, font=self.font)
+                self._checks.append((cb, var, None))
+            cb, var, _old_letter = self._checks[i]
+            var.set(False)
+            cb.config(text=f"{letter}. {opt_text}")
+            self._checks[i] = (cb, var, letter)
+        self._show([cb for cb, _var, _letter in self._checks[:len(options)]], anchor="w")
+
+    def show_blanks(self, count):
+        """填空题：count 个“填空 i: [输入框]”横向排列"""
+        self._switch("blank")
+        while len(self._blanks) < count:
+            i = len(self._blanks)
+            label = tk.Label(self.frame, text=f"填空 {i+1}:", font=self.font)
+            entry = tk.Entry(self.frame, width=20, font=self.font)
+            self._blanks.append((label, entry))
+        widgets = []
+        for label, entry in self._blanks[:count]:
+            entry.delete(0, tk.END)
+            widgets.append((label, {"side": tk.LEFT, "padx": (0, 5)}))
+            widgets.append((entry, {"side": tk.LEFT, "padx": (0, 10)}))
+        self._show_with_options(widgets)
+
+    def show_hint(self, text):
+        self._switch("hint")
+        if self._hint is None:
+            self._hint = tk.Label(self.frame)
+        self._hint.config(text=text)
+        self._show([self._hint], anchor="w")
+
+    def hide_all(self):
+        self._switch(None)
+
+    # --- 读取作答 / 布局 ---
+    def response(self):
+        """当前显示的作答，格式见 quiz_engine.describe_answer"""
+        if self._mode == "choice":
+            return self.var_choice.get()
+        if self._mode == "multi":
+            return [letter for _cb, var, letter in self._checks[:len(self._visible)] if var.get()]
+        if self._mode == "blank":
+            return [entry.get() for _label, entry in self._blanks[:len(self._visible) // 2]]
+        return None
+
+    def set_wraplength(self, wraplength):
+        """更新全部选项组件（含隐藏的）的换行宽度，宽度没变时不做任何事"""
+        if wraplength == self.wraplength:
+            return
+        self.wraplength = wraplength
+        for widget in self._radios + [cb for cb, _var, _letter in self._checks]:
+            widget.config(wraplength=wraplength)
+
+    # --- 内部 ---
+    def _switch(self, mode):
+        """换题型时先隐藏上一种题型的全部组件；同题型只调整数量"""
+        if mode != self._mode:
+            for widget in self._visible:
+                widget.pack_forget()
+            self._visible = []
+            self._mode = mode
+
+    def _show(self, widgets, **pack_options):
+        self._show_with_options([(widget, pack_options) for widget in widgets])
+
+    def _show_with_options(self, widgets):
+        """让已显示的组件正好是 widgets：多余的隐藏，缺少的依次 pack 到末尾（前缀保持原顺序）"""
+        wanted = [widget for widget, _options in widgets]
+        for widget in self._visible[len(wanted):]:
+            widget.pack_forget()
+        for widget, options in widgets[len(self._visible):]:
+            widget.pack(**options)
+        self._visible = wanted
@@ -0,0 +1,126 @@
+"""Word 题库解析结果缓存。
+
+只缓存 .docx（文本格式的题库解析本来就很快，不值得先算一遍哈希）。
+以 .docx 文件内容的 SHA-256 加上解析器版本号 PARSER_VERSION 作为键，
+把解析出的题目按列（questions_to_columns，同类字段相邻，压缩率更高）以 pickle + zlib 的紧凑二进制形式
+保存在缓存目录中。命中时完全跳过 docx 解析，直接恢复 Question。
+
+缓存目录总大小有上限，超出时按最近使用时间（文件 mtime）淘汰最久未用的题库。
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import zlib
+
+from importers import iter_questions_from_file
+from question_parser import PARSER_VERSION, questions_from_columns, questions_to_columns
+
+CACHE_MAGIC = b"QBC2" # 2：按列保存
+CACHE_SUFFIX = ".bank"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+CACHE_COMPRESS_LEVEL = 6 # 只在解析 Word 之后写一次，多花一点压缩时间换更小的缓存
+
+
+def file_sha256(filepath, chunk_size=1024 * 1024):
+    h = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ParseCache:
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _path_for(self, digest):
+        return os.path.join(self.directory, f"{digest}-p{PARSER_VERSION}{CACHE_SUFFIX}")
+
+    def get(self, digest):
+        """返回缓存的题目列表；未命中或缓存损坏时返回 None"""
+        path = self._path_for(digest)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if not data.startswith(CACHE_MAGIC):
+            self._discard(path)
+            return None
+        try:
+            questions = questions_from_columns(pickle.loads(zlib.decompress(data[len(CACHE_MAGIC):])))
+        except Exception as e:
+            print(f"解析缓存已损坏，忽略: {path} ({e})")
+            self._discard(path)
+            return None
+        try:
+            os.utime(path) # 更新 mtime，作为 LRU 的“最近使用”时间
+        except OSError:
+            pass
+        return questions
+
+    def put(self, digest, questions):
+        """写入缓存（临时文件 + os.replace，多个进程同时写也不会留下半个文件）"""
+        columns = questions_to_columns(questions)
+        payload = CACHE_MAGIC + zlib.compress(pickle.dumps(columns, protocol=pickle.HIGHEST_PROTOCOL), CACHE_COMPRESS_LEVEL)
+        if len(payload) > self.max_bytes:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, self._path_for(digest))
+        except OSError as e:
+            print(f"写入解析缓存失败: {e}")
+            self._discard(tmp_path)
+            return
+        self.evict()
+
+    def evict(self):
+        """总大小超过上限时，从最久未使用的缓存文件开始删除"""
+        entries = []
+        total = 0
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith(CACHE_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue # 可能刚被其他进程淘汰
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+        entries.sort()
+        for _mtime, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._discard(path)
+            total -= size
+
+    @staticmethod
+    def _discard(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def load_questions_cached(filepath, cache=None, progress=None):
+    """解析题库文件（格式见 importers），Word 题库优先使用缓存。返回 (题目列表, 是否命中缓存)"""
+    if cache is None or not filepath.lower().endswith(".docx"):
+        return list(iter_questions_from_file(filepath, progress=progress)), False
+    digest = file_sha256(filepath)
+    questions = cache.get(digest)
+    if questions is not None:
+        return questions, True
+    questions = list(iter_questions_from_file(filepath, progress=progress))
+    if questions:
+        cache.put(digest, questions)
+    return questions, False
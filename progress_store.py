@@ -0,0 +1,507 @@
+"""基于 sqlite3 的题库与进度存储，取代整体 pickle 的 quiz_progress.pkl。
+
+* questions 表：每道题只存一次，id 即 Question.qid（稳定编号）
+* progress 表：每道题一行很小的状态（未答/已答 + 已答顺序）
+* meta 表：last_imported_docx 等零散键值；max_question_id 记录分配过的最大 qid，删除的题目编号不会再分配给新题目；
+  legacy_migrated 表示旧 .pkl 已迁移过，之后即使题库被删空也不会再次迁移
+* review 表：间隔重复的复习状态（只有复习过的题目才有一行）
+* search_index 表：全文检索的倒排表（词项 -> 二进制题目编号），导入时整体重建
+* user_progress 表：多用户服务（quiz_server.py）中各用户的已答题目，未答不占行
+
+每次作答 / 移回 / 删除只改动涉及的几行，保存代价与改动量成正比；界面中由 autosave.BackgroundWriter
+在后台线程把一段时间内的改动合并成一个事务（batch）提交。
+首次启动时若只有旧的 .pkl 文件，会自动迁移过来（旧文件保留不动）。
+backup() 把数据库的一致快照复制为 xxx.db.bak（保留 BACKUP_COUNT 份）；打开时发现数据库损坏，
+open_store 把损坏的文件改名为 .corrupt 保留，并从最新的可用备份恢复。
+连接可在后台线程中打开/加载后交给主线程使用，所有操作由一把锁串行化。
+"""
+import contextlib
+import json
+import os
+import pickle
+import shutil
+import sqlite3
+import threading
+from urllib.request import pathname2url
+
+from question_parser import RECORD_FIELDS, Question, question_from_record, question_to_record
+
+SCHEMA_VERSION = 2 # 2：questions 表增加 media 列
+
+STATE_UNANSWERED = 0
+STATE_ANSWERED = 1
+
+LOAD_PROGRESS_EVERY = 1000 # load() 每读取这么多行回调一次进度
+BACKUP_SUFFIX = ".bak"
+BACKUP_COUNT = 2 # 保留的备份份数：xxx.db.bak（最新）、xxx.db.bak.1 …
+CORRUPT_SUFFIX = ".corrupt"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    q_type TEXT NOT NULL,
+    original_num_text TEXT NOT NULL,
+    original_num TEXT NOT NULL,
+    text TEXT NOT NULL,
+    options_raw TEXT NOT NULL,
+    answer_raw TEXT NOT NULL,
+    options TEXT NOT NULL,
+    answer TEXT,
+    original_doc_order INTEGER NOT NULL,
+    source_file TEXT,
+    media TEXT
+);
+CREATE TABLE IF NOT EXISTS progress (
+    question_id INTEGER PRIMARY KEY REFERENCES questions(id) ON DELETE CASCADE,
+    state INTEGER NOT NULL DEFAULT 0,
+    answered_seq INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS review (
+    question_id INTEGER PRIMARY KEY REFERENCES questions(id) ON DELETE CASCADE,
+    box INTEGER NOT NULL,
+    due REAL NOT NULL,
+    reviews INTEGER NOT NULL,
+    lapses INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS search_index (
+    token TEXT PRIMARY KEY,
+    postings BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS user_progress (
+    user_id TEXT NOT NULL,
+    question_id INTEGER NOT NULL REFERENCES questions(id) ON DELETE CASCADE,
+    answered_seq INTEGER NOT NULL,
+    PRIMARY KEY (user_id, question_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_QUESTION_COLUMNS = ", ".join(RECORD_FIELDS)
+_INSERT_QUESTION = f"INSERT INTO questions({_QUESTION_COLUMNS}) VALUES ({', '.join('?' * len(RECORD_FIELDS))})"
+_INSERT_QUESTION_WITH_ID = f"INSERT INTO questions(id, {_QUESTION_COLUMNS}) VALUES (?, {', '.join('?' * len(RECORD_FIELDS))})"
+
+
+class _CompatUnpickler(pickle.Unpickler):
+    """旧进度文件里的 Question 记录为 __main__.Question，这里统一映射到 question_parser.Question"""
+
+    def find_class(self, module, name):
+        if name == "Question" and module in ("__main__", "quiz_bank", "question_parser"):
+            return Question
+        return super().find_class(module, name)
+
+
+def load_legacy_pickle(path):
+    """读取旧版 quiz_progress.pkl，返回其中的字典"""
+    with open(path, "rb") as f:
+        return _CompatUnpickler(f).load()
+
+
+# questions 表中以 JSON 文本保存的字段（在 RECORD_FIELDS 中的位置）
+_JSON_FIELD_INDEXES = (4, 6, 7) # options_raw, options, answer
+_MEDIA_INDEX = 10 # 没有图片/表格时存 NULL
+
+
+def _question_to_row(q):
+    row = list(question_to_record(q))
+    for i in _JSON_FIELD_INDEXES:
+        row[i] = json.dumps(row[i], ensure_ascii=False)
+    row[_MEDIA_INDEX] = json.dumps(row[_MEDIA_INDEX], ensure_ascii=False) if row[_MEDIA_INDEX] else None
+    return row
+
+
+def _question_from_row(row):
+    """从数据库行 (id, *RECORD_FIELDS) 恢复 Question"""
+    record = list(row[1:])
+    for i in _JSON_FIELD_INDEXES:
+        record[i] = json.loads(record[i]) if record[i] is not None else None
+    media = record[_MEDIA_INDEX]
+    record[_MEDIA_INDEX] = [tuple(ref) for ref in json.loads(media)] if media is not None else ()
+    q = question_from_record(record)
+    q.qid = row[0]
+    return q
+
+
+class ProgressStore:
+    def __init__(self, path, read_only=False):
+        """read_only=True 时以只读方式打开已有的数据库（不存在时抛出 sqlite3.OperationalError），不建表、不写入"""
+        self.path = path
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        if read_only:
+            self.conn = sqlite3.connect(f"file:{pathname2url(os.path.abspath(path))}?mode=ro", uri=True,
+                                        check_same_thread=False)
+            self._answered_seq = 0
+            return
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        # WAL + NORMAL：每次小事务只追加几页日志，不必整库 fsync
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(questions)")}
+        if "media" not in columns: # SCHEMA_VERSION 1 的数据库
+            self.conn.execute("ALTER TABLE questions ADD COLUMN media TEXT")
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta(key, value) VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),)
+        )
+        self.conn.commit()
+        row = self.conn.execute("SELECT COALESCE(MAX(answered_seq), 0) FROM progress").fetchone()
+        self._answered_seq = row[0] # 已答顺序计数器，避免每次作答都扫描全表
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """写事务：正常退出时提交，异常时回滚；在 batch() 中时并入外层事务"""
+        with self._lock:
+            if self._batch_depth:
+                yield
+                return
+            with self.conn:
+                yield
+
+    @contextlib.contextmanager
+    def batch(self):
+        """把其中的多次写操作合并为一个事务，任何一步出错则全部回滚"""
+        with self._lock, self.conn:
+            self._batch_depth += 1
+            try:
+                yield
+            finally:
+                self._batch_depth -= 1
+
+    def backup(self, count=BACKUP_COUNT):
+        """把数据库的一致快照写成最新的备份，较旧的备份依次后移，返回备份路径。
+
+        先复制到临时文件并做 quick_check，通过后才 os.replace 替换，已有的备份不会被坏文件覆盖。
+        用单独的连接读取：WAL 模式下读快照不阻塞主连接的写入。
+        """
+        paths = backup_paths(self.path, count)
+        tmp_path = paths[0] + ".tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        source = sqlite3.connect(self.path)
+        try:
+            target = sqlite3.connect(tmp_path)
+            try:
+                source.backup(target)
+                ok = target.execute("PRAGMA quick_check").fetchone()[0] == "ok"
+            finally:
+                target.close()
+        finally:
+            source.close()
+        if not ok:
+            os.remove(tmp_path)
+            raise sqlite3.DatabaseError("数据库快照未通过完整性检查，保留原有备份")
+        for older, newer in zip(reversed(paths[1:]), reversed(paths[:-1])):
+            if os.path.exists(newer):
+                os.replace(newer, older)
+        os.replace(tmp_path, paths[0])
+        return paths[0]
+
+    # --- 元数据 ---
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self.transaction():
+            self.conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", (key, value))
+
+    def question_count(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+
+    def ever_had_questions(self):
+        """数据库中是否存放过题目（包括之后被删除的）"""
+        with self._lock:
+            return self._max_question_id() > 0
+
+    # --- 整库操作 ---
+    def replace_bank(self, questions, last_imported_docx=None, answered=(), progress=None):
+        """用新题库替换全部数据，并为每道题分配稳定的 qid。
+
+        answered 为已答题目（按显示顺序，最新的在前），其余题目记为未答。
+        progress(已写入题数, 总题数) 若抛出异常（如取消），整个事务回滚，原数据不变。
+        """
+        answered_ids = {id(q): len(answered) - i for i, q in enumerate(answered)}
+        with self.transaction():
+            self._answered_seq = len(answered)
+            self.conn.execute("DELETE FROM review")
+            self.conn.execute("DELETE FROM user_progress")
+            self.conn.execute("DELETE FROM search_index") # 题目编号全部重新分配，旧索引作废
+            self.conn.execute("DELETE FROM meta WHERE key IN ('search_index_version', 'max_question_id')")
+            self.conn.execute("DELETE FROM progress")
+            self.conn.execute("DELETE FROM questions")
+            cursor = self.conn.cursor()
+            progress_rows = []
+            for q in questions:
+                cursor.execute(_INSERT_QUESTION, _question_to_row(q))
+                q.qid = cursor.lastrowid
+                if progress is not None and len(progress_rows) % LOAD_PROGRESS_EVERY == 0:
+                    progress(len(progress_rows), len(questions))
+                seq = answered_ids.get(id(q))
+                progress_rows.append((q.qid, STATE_ANSWERED if seq else STATE_UNANSWERED, seq or 0))
+            cursor.executemany(
+                "INSERT INTO progress(question_id, state, answered_seq) VALUES (?, ?, ?)", progress_rows
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta(key, value) VALUES ('last_imported_docx', ?)", (last_imported_docx,)
+            )
+
+    def load(self, progress=None):
+        """返回 (all_questions, unanswered_questions, answered_questions, last_imported_docx)。
+
+        all_questions 按 qid 顺序；answered_questions 最新作答的在前。
+        progress(已读取行数, 总行数) 每 LOAD_PROGRESS_EVERY 行调用一次。
+        """
+        with self._lock:
+            return self._load(progress)
+
+    def _load(self, progress):
+        all_questions = []
+        unanswered_questions = []
+        answered = []
+        total = self.question_count() if progress is not None else 0
+        rows = self.conn.execute(
+            "SELECT q.id, q.q_type, q.original_num_text, q.original_num, q.text, q.options_raw, "
+            "q.answer_raw, q.options, q.answer, q.original_doc_order, q.source_file, q.media, "
+            "p.state, p.answered_seq "
+            "FROM questions q LEFT JOIN progress p ON p.question_id = q.id ORDER BY q.id"
+        )
+        for row in rows:
+            q = _question_from_row(row[:-2])
+            state, seq = row[-2], row[-1]
+            all_questions.append(q)
+            if progress is not None and len(all_questions) % LOAD_PROGRESS_EVERY == 0:
+                progress(len(all_questions), total)
+            if state == STATE_ANSWERED:
+                answered.append((seq, q))
+            else:
+                unanswered_questions.append(q)
+        answered.sort(key=lambda item: item[0], reverse=True)
+        answered_questions = [q for _seq, q in answered]
+        return all_questions, unanswered_questions, answered_questions, self.get_meta("last_imported_docx")
+
+    # --- 增量操作：每次只写涉及的行 ---
+    def mark_answered(self, q):
+        with self.transaction():
+            self._answered_seq += 1
+            self.conn.execute(
+                "UPDATE progress SET state = ?, answered_seq = ? WHERE question_id = ?",
+                (STATE_ANSWERED, self._answered_seq, q.qid),
+            )
+
+    def mark_unanswered(self, questions):
+        with self.transaction():
+            self.conn.executemany(
+                "UPDATE progress SET state = ?, answered_seq = 0 WHERE question_id = ?",
+                [(STATE_UNANSWERED, q.qid) for q in questions],
+            )
+
+    def delete_questions(self, questions):
+        with self.transaction():
+            self._delete_question_rows(questions)
+
+    def _max_question_id(self):
+        """分配过的最大 qid（包括已删除的题目）"""
+        row = self.conn.execute(
+            "SELECT MAX(COALESCE((SELECT MAX(id) FROM questions), 0), "
+            "COALESCE((SELECT CAST(value AS INTEGER) FROM meta WHERE key = 'max_question_id'), 0))"
+        ).fetchone()
+        return row[0]
+
+    def _set_max_question_id(self, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES ('max_question_id', ?)", (str(value),))
+
+    def _delete_question_rows(self, questions):
+        # questions.id 没有 AUTOINCREMENT，SQLite 会把最大的已删除编号重新分配；先记下，插入新题目时跳过
+        self._set_max_question_id(self._max_question_id())
+        params = [(q.qid,) for q in questions]
+        self.conn.executemany("DELETE FROM review WHERE question_id = ?", params)
+        self.conn.executemany("DELETE FROM user_progress WHERE question_id = ?", params)
+        self.conn.executemany("DELETE FROM progress WHERE question_id = ?", params)
+        self.conn.executemany("DELETE FROM questions WHERE id = ?", params)
+
+    def apply_bank_diff(self, updated, added, removed, last_imported_docx=None):
+        """在一个事务中增量更新题库（见 bank_diff）。
+
+        updated 为 [(qid, 新内容的 Question)]，原地改写题目内容，qid 及其作答/复习/各用户进度不变；
+        added 作为未答题插入并分配 qid；removed 连同进度一起删除。
+        保存的检索索引同时标记为过期，由 update_search_index 写回（中途退出时下次启动会重建）。
+        """
+        assignments = ", ".join(f"{field} = ?" for field in RECORD_FIELDS)
+        with self.transaction():
+            cursor = self.conn.cursor()
+            cursor.executemany(
+                f"UPDATE questions SET {assignments} WHERE id = ?",
+                [(*_question_to_row(q), qid) for qid, q in updated],
+            )
+            self._delete_question_rows(removed)
+            next_id = self._max_question_id() + 1
+            for q in added:
+                cursor.execute(_INSERT_QUESTION_WITH_ID, (next_id, *_question_to_row(q)))
+                q.qid = next_id
+                next_id += 1
+            self._set_max_question_id(next_id - 1)
+            cursor.executemany(
+                "INSERT INTO progress(question_id, state, answered_seq) VALUES (?, ?, 0)",
+                [(q.qid, STATE_UNANSWERED) for q in added],
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta(key, value) VALUES ('last_imported_docx', ?)", (last_imported_docx,)
+            )
+            self.conn.execute("DELETE FROM meta WHERE key = 'search_index_version'")
+
+    # --- 间隔重复状态 ---
+    def load_review(self):
+        """返回全部复习状态 [(question_id, box, due, reviews, lapses)]"""
+        with self._lock:
+            return self.conn.execute("SELECT question_id, box, due, reviews, lapses FROM review").fetchall()
+
+    def save_review(self, row):
+        """写入一道题的复习状态 (question_id, box, due, reviews, lapses)"""
+        with self.transaction():
+            self.conn.execute("INSERT OR REPLACE INTO review(question_id, box, due, reviews, lapses) VALUES (?, ?, ?, ?, ?)", row)
+
+    def reset_review(self, questions):
+        with self.transaction():
+            self.conn.executemany("DELETE FROM review WHERE question_id = ?", [(q.qid,) for q in questions])
+
+    # --- 多用户进度 ---
+    def max_user_answered_seq(self):
+        with self._lock:
+            return self.conn.execute("SELECT COALESCE(MAX(answered_seq), 0) FROM user_progress").fetchone()[0]
+
+    def load_user_progress(self, user_id):
+        """某个用户已答题目的 qid 列表，最早作答的在前"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT question_id FROM user_progress WHERE user_id = ? ORDER BY answered_seq", (user_id,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def apply_user_progress(self, changes):
+        """在一个事务中写入一批变化 [(user_id, question_id, answered_seq 或 None)]，None 表示移回未答。
+
+        同一道题在一批中有多次变化时以最后一次为准。
+        """
+        latest = {}
+        for user_id, qid, seq in changes:
+            latest[(user_id, qid)] = seq
+        answered = [(user_id, qid, seq) for (user_id, qid), seq in latest.items() if seq is not None]
+        moved_back = [(user_id, qid) for (user_id, qid), seq in latest.items() if seq is None]
+        with self.transaction():
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO user_progress(user_id, question_id, answered_seq) VALUES (?, ?, ?)", answered
+            )
+            self.conn.executemany("DELETE FROM user_progress WHERE user_id = ? AND question_id = ?", moved_back)
+
+    # --- 全文检索索引 ---
+    def load_search_index(self, version):
+        """返回保存的倒排表 [(词项, 二进制题目编号)]；没有保存过或版本不符时返回 None"""
+        with self._lock:
+            if self.get_meta("search_index_version") != str(version):
+                return None
+            return self.conn.execute("SELECT token, postings FROM search_index").fetchall()
+
+    def replace_search_index(self, rows, version):
+        with self.transaction():
+            self.conn.execute("DELETE FROM search_index")
+            self.conn.executemany("INSERT INTO search_index(token, postings) VALUES (?, ?)", rows)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta(key, value) VALUES ('search_index_version', ?)", (str(version),)
+            )
+
+    def update_search_index(self, rows, version):
+        """只写入变化的词项 [(词项, 二进制题目编号或 None)]，None 表示该词项已没有题目"""
+        with self.transaction():
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO search_index(token, postings) VALUES (?, ?)",
+                [row for row in rows if row[1] is not None],
+            )
+            self.conn.executemany(
+                "DELETE FROM search_index WHERE token = ?", [(token,) for token, blob in rows if blob is None]
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta(key, value) VALUES ('search_index_version', ?)", (str(version),)
+            )
+
+    # --- 旧版 pickle 迁移 ---
+    def migrate_from_pickle(self, pkl_path, progress=None):
+        """把旧版进度文件导入数据库，返回导入的题目数"""
+        loaded_data = load_legacy_pickle(pkl_path)
+        all_questions = loaded_data.get("all_questions", [])
+        answered_questions = loaded_data.get("answered_questions", [])
+        self.replace_bank(all_questions, loaded_data.get("last_imported_docx"), answered=answered_questions,
+                          progress=progress)
+        self.set_meta("legacy_migrated", "1")
+        return len(all_questions)
+
+
+def backup_paths(db_path, count=BACKUP_COUNT):
+    """备份文件路径，最新的在前"""
+    return [db_path + BACKUP_SUFFIX + (f".{i}" if i else "") for i in range(count)]
+
+
+def _check_database(path):
+    conn = sqlite3.connect(path)
+    try:
+        if conn.execute("PRAGMA quick_check").fetchone()[0] != "ok":
+            raise sqlite3.DatabaseError(f"{path} 未通过完整性检查")
+        conn.execute("SELECT COUNT(*) FROM questions").fetchone()
+    finally:
+        conn.close()
+
+
+def restore_backup(db_path):
+    """用最新的可用备份替换损坏的数据库（原文件改名为 .corrupt 保留），返回所用备份的路径；没有可用备份时返回 None"""
+    for path in backup_paths(db_path):
+        if not os.path.exists(path):
+            continue
+        try:
+            _check_database(path)
+        except sqlite3.DatabaseError:
+            continue
+        for suffix in ("", "-wal", "-shm"): # 旧的 WAL 不能留给恢复后的数据库
+            if os.path.exists(db_path + suffix):
+                os.replace(db_path + suffix, db_path + CORRUPT_SUFFIX + suffix)
+        shutil.copyfile(path, db_path)
+        return path
+    return None
+
+
+def open_store(db_path, legacy_pkl_path=None, progress=None):
+    """打开数据库；数据库从未存放过题目、也没有迁移过且存在旧 .pkl 时自动迁移。返回 (store, 迁移的题目数或None)
+
+    数据库文件损坏时先从备份恢复（见 restore_backup），没有可用备份则抛出 sqlite3.DatabaseError。
+    """
+    store = None
+    try:
+        store = ProgressStore(db_path)
+        store.question_count()
+    except sqlite3.OperationalError: # 被锁、无法打开等，不是文件损坏
+        raise
+    except sqlite3.DatabaseError as e:
+        if store is not None:
+            store.close()
+        restored = restore_backup(db_path)
+        if restored is None:
+            raise
+        print(f"数据库 {db_path} 已损坏（{e}），已从备份 {restored} 恢复")
+        store = ProgressStore(db_path)
+    migrated = None
+    # 只看“是否存放过题目”而不是当前题数：用户删空题库后不能把旧进度又迁移回来
+    if (legacy_pkl_path and os.path.exists(legacy_pkl_path) and store.get_meta("legacy_migrated") is None
+            and not store.ever_had_questions()):
+        try:
+            migrated = store.migrate_from_pickle(legacy_pkl_path, progress=progress)
+        except (OSError, EOFError, AttributeError, ImportError, pickle.UnpicklingError, sqlite3.Error) as e:
+            print(f"迁移旧进度文件失败: {e}")
+    return store, migrated
@@ -0,0 +1,481 @@
+"""题目数据结构与题库解析（不依赖 tkinter）。
+
+解析分两层：
+  * 段落来源：iter_docx_paragraphs（流式读 XML）或 python-docx 的 doc.paragraphs
+  * 状态机：iter_questions_from_paragraphs，按 题型标题 / 缓冲区 / “正确答案” 切分题目
+
+段落来源可以在文本中嵌入媒体标记（media_marker，图片 / 表格的引用，见 docx_stream）；
+切分出一道题后，标记被换成 “[图1]”“[表1]” 这样的占位文字，引用按出现顺序记在 Question.media 中。
+"""
+import json
+import os
+import re
+import sys
+import traceback
+from functools import partial
+
+# 解析逻辑（状态机或 _parse_details）有变化时加 1，使旧的解析缓存失效
+PARSER_VERSION = 3
+
+# Question 解析完成后的全部字段，用于存储/缓存后直接恢复而不重新解析
+RECORD_FIELDS = (
+    "q_type", "original_num_text", "original_num", "text", "options_raw",
+    "answer_raw", "options", "answer", "original_doc_order", "source_file", "media",
+)
+
+MEDIA_OPEN = "\ue000" # 私用区字符，不会出现在正常文本中
+MEDIA_CLOSE = "\ue001"
+MEDIA_LABELS = {"image": "图", "table": "表"}
+
+
+_NUM_RE = re.compile(r"^\s*(\d+[．.\s、]+)(.*)")
+_OPTION_RE = re.compile(r"^\s*([A-G])[\s.]+(.*)")
+_QUESTION_TYPE_RE = re.compile("单选题|多选题|填空题|判断题") # 只用于快速排除普通段落，题型仍由 get_question_type 判断
+_MEDIA_RE = re.compile(f"{MEDIA_OPEN}(image|table):(.*?){MEDIA_CLOSE}", re.S)
+
+
+# 单选/多选题的选项行会解析成 options；其余题型的 options 为空
+CHOICE_TYPES = frozenset(("单选题", "多选题"))
+OPTION_TEXT_SEPARATOR = "\n" # 选项文本来自单行，不含换行
+
+
+def _compact_options_raw(options_raw, letters, texts):
+    """选项原文依次都是 “字母 + 同一个分隔符 + 选项文本” 时返回该分隔符，否则返回 None（需保留原文）"""
+    if len(options_raw) != len(letters):
+        return None
+    if not letters:
+        return ""
+    first, letter, option_text = options_raw[0], letters[0], texts[0]
+    if not first.startswith(letter) or not first.endswith(option_text) or len(first) < len(letter) + len(option_text):
+        return None
+    sep = sys.intern(first[len(letter):len(first) - len(option_text)])
+    if list(options_raw) != [f"{letter}{sep}{option_text}" for letter, option_text in zip(letters, texts)]:
+        return None
+    return sep
+
+
+# --- Question 类（__slots__，可 pickle；兼容旧进度文件中带 __dict__ 的对象） ---
+class Question:
+    """一道题。
+
+    options 的键和值各合成一个字符串保存，读取时才拼成字典（不要原地修改，需整体赋值）；
+    原文字段 original_num_text / options_raw 能由解析结果拼回时只记下分隔符，读取时再拼出；
+    题型、答案原文等大量重复的短字符串用 sys.intern 共享。10 万道题的常驻内存约为原来的一半以下。
+    """
+    __slots__ = (
+        "q_type", "original_num", "text", "answer", "original_doc_order",
+        "source_file", # 题目来源文件名（多文档导入时设置）
+        "qid", # 稳定编号，由存储层分配
+        "media", # [(种类, 引用)]：("image", zip 中的部件名) 或 ("table", 各行单元格文本的 JSON)，显示时才加载
+        "answer_raw",
+        "_option_letters", "_option_texts", # options 的键（单字母时合成一个共享的字符串）和值（用换行连接）
+        "_num_text", "_num_sep", # original_num_text 原文，或拼回它所用的分隔符（原文为 None）
+        "_options_raw", "_option_sep", # options_raw 原文，或拼回它所用的分隔符（原文为 None）
+    )
+    # 解析结果之外、可以缺省的字段（旧进度文件和旧数据库行中没有）
+    DEFAULTS = {"source_file": None, "qid": None, "media": ()}
+
+    def __init__(self, q_type, original_num_text, text, options_text, answer_text, original_doc_order):
+        self.q_type = q_type
+        self._num_text, self._num_sep = original_num_text, None
+        self.text = text
+        self._options_raw, self._option_sep = options_text, None
+        self.answer_raw = answer_text
+        self.answer = None
+        self.original_doc_order = original_doc_order
+        self.source_file = self.qid = None
+        self.media = ()
+        self._parse_details()
+        self.compact()
+
+    @property
+    def options(self):
+        return dict(zip(self._option_letters, self.option_texts()))
+
+    @options.setter
+    def options(self, value):
+        letters = "".join(value)
+        if len(letters) == len(value) and "" not in value:
+            letters = sys.intern(letters) # 都是单个字母，如 "ABCD"，所有题目共享
+        else:
+            letters = tuple(value)
+        texts = tuple(value.values())
+        joined = OPTION_TEXT_SEPARATOR.join(texts)
+        if not texts or joined.count(OPTION_TEXT_SEPARATOR) == len(texts) - 1:
+            texts = joined # 每个字符串对象另有约 70 字节开销，合成一个
+        self._option_letters = letters
+        self._option_texts = texts
+
+    def option_texts(self):
+        """选项文本，与 options 的键一一对应"""
+        texts = self._option_texts
+        return texts.split(OPTION_TEXT_SEPARATOR) if type(texts) is str else texts
+
+    # --- 原文字段：赋值时原样保存，compact() 之后改为按需拼出 ---
+    @property
+    def original_num_text(self):
+        if self._num_text is not None:
+            return self._num_text
+        return f"{self.original_num}{self._num_sep}{self.text}"
+
+    @original_num_text.setter
+    def original_num_text(self, value):
+        self._num_text = value
+        self._num_sep = None
+
+    @property
+    def options_raw(self):
+        if self._options_raw is not None:
+            return self._options_raw
+        sep = self._option_sep
+        return [f"{letter}{sep}{option_text}" for letter, option_text in zip(self._option_letters, self.option_texts())]
+
+    @options_raw.setter
+    def options_raw(self, value):
+        self._options_raw = value
+        self._option_sep = None
+
+    def compact(self):
+        """解析或整体赋值之后调用：丢掉能由解析结果拼回的原文，共享重复的短字符串"""
+        num_text, num, text = self._num_text, self.original_num, self.text
+        if num_text and num_text.startswith(num) and num_text.endswith(text) and len(num_text) >= len(num) + len(text):
+            self._num_text, self._num_sep = None, sys.intern(num_text[len(num):len(num_text) - len(text)])
+        options_raw = self._options_raw
+        if options_raw is not None:
+            letters = self._option_letters
+            sep = _compact_options_raw(options_raw, letters, self.option_texts()) if options_raw or letters else ""
+            if sep is not None:
+                self._options_raw, self._option_sep = None, sep
+        self.q_type = sys.intern(self.q_type)
+        self.original_num = sys.intern(self.original_num)
+        self.answer_raw = sys.intern(self.answer_raw) # 如 “正确答案：A”，大量重复
+        if self.source_file is not None:
+            self.source_file = sys.intern(self.source_file)
+
+    def _parse_details(self):
+        num_text = self._num_text.strip()
+        match = _NUM_RE.match(num_text)
+        if match:
+            self.original_num = match.group(1).strip()
+            self.text = match.group(2).strip()
+        else:
+            self.original_num = ""
+            self.text = num_text
+
+        options = {}
+        if self.q_type in CHOICE_TYPES:
+            match_option = _OPTION_RE.match
+            for opt_line in self._options_raw:
+                opt_match = match_option(opt_line.strip())
+                if opt_match:
+                    options[opt_match.group(1)] = opt_match.group(2).strip()
+        self.options = options
+
+        cleaned_answer_text = self.answer_raw.replace("正确答案", "").strip("：: ").strip()
+        parse_answer = _ANSWER_PARSERS.get(self.q_type)
+        if parse_answer is not None:
+            self.answer = parse_answer(cleaned_answer_text)
+
+    # --- pickle：状态为各字段值的元组；旧进度文件中的对象状态是 __dict__ 字典 ---
+    def __getstate__(self):
+        return tuple(getattr(self, field) for field in self.__slots__)
+
+    def __setstate__(self, state):
+        if isinstance(state, dict):
+            _assign_fields(self, state)
+            return
+        for field, value in zip(self.__slots__, state):
+            setattr(self, field, value)
+        self.compact()
+
+    def get_display_text(self):
+        return f"{self.original_num} {self.text}" if self.original_num else self.text
+
+    def __repr__(self):
+        return f"<{self.q_type} Q: {self.text[:20]}... A: {self.answer}>"
+
+
+def _parse_single_answer(cleaned_answer_text):
+    return cleaned_answer_text[0] if cleaned_answer_text else None
+
+
+def _parse_multi_answer(cleaned_answer_text):
+    return sorted([char for char in cleaned_answer_text.replace(" ", "") if char.isalpha()])
+
+
+def _parse_judge_answer(cleaned_answer_text):
+    processed_ans_text = cleaned_answer_text.upper() # 转大写方便判断
+    if "A" in processed_ans_text or "是" in processed_ans_text or "正确" in processed_ans_text:
+        return "A"
+    if "B" in processed_ans_text or "否" in processed_ans_text or "错误" in processed_ans_text:
+        return "B"
+    return cleaned_answer_text[0] if cleaned_answer_text else None # 降级处理
+
+
+def _parse_blank_answer(cleaned_answer_text):
+    parts = cleaned_answer_text.split()
+    parsed_answers = []
+    i = 0
+    while i < len(parts):
+        if parts[i].isdigit() and i + 1 < len(parts) and not parts[i+1].isdigit():
+            parsed_answers.append(parts[i+1])
+            i += 2
+        else:
+            parsed_answers.append(parts[i])
+            i += 1
+    return parsed_answers if parsed_answers else [cleaned_answer_text]
+
+
+_ANSWER_PARSERS = {
+    "单选题": _parse_single_answer,
+    "多选题": _parse_multi_answer,
+    "判断题": _parse_judge_answer,
+    "填空题": _parse_blank_answer,
+}
+
+
+def _assign_fields(q, values):
+    """按字段名整体赋值（缺省字段取 Question.DEFAULTS），然后 compact()"""
+    for field, default in Question.DEFAULTS.items():
+        if field not in values:
+            setattr(q, field, default)
+    for field, value in values.items():
+        if field in RECORD_FIELDS or field in Question.DEFAULTS:
+            setattr(q, field, value)
+    q.compact()
+
+
+def question_to_record(q):
+    """把 Question 转为按 RECORD_FIELDS 排列的元组"""
+    return tuple(getattr(q, field) for field in RECORD_FIELDS)
+
+
+def question_from_record(record):
+    """从 question_to_record 的结果恢复 Question，不重新执行 _parse_details"""
+    (q_type, num_text, original_num, text, options_raw, answer_raw,
+     options, answer, original_doc_order, source_file, media) = record
+    q = Question.__new__(Question)
+    q.q_type, q.original_num, q.text, q.answer_raw = q_type, original_num, text, answer_raw
+    q._num_text, q._num_sep = num_text, None
+    q._options_raw, q._option_sep = options_raw, None
+    q.options, q.answer, q.original_doc_order = options, answer, original_doc_order
+    q.source_file, q.qid, q.media = source_file, None, media or ()
+    q.compact()
+    return q
+
+
+def questions_to_columns(questions):
+    """按列保存一组题目：{Question 的槽名: 各题该字段的值的元组}，同类数据相邻，序列化后压缩率更高"""
+    states = [q.__getstate__() for q in questions]
+    return {field: column for field, column in zip(Question.__slots__, zip(*states))} if states else {}
+
+
+def questions_from_columns(columns):
+    """questions_to_columns 的逆操作；列与当前 Question.__slots__ 不一致时抛出 ValueError"""
+    if not columns:
+        return []
+    if tuple(columns) != Question.__slots__:
+        raise ValueError("题目列与 Question.__slots__ 不一致")
+    questions = []
+    for state in zip(*columns.values()):
+        q = Question.__new__(Question)
+        q.__setstate__(state)
+        questions.append(q)
+    return questions
+
+
+def media_marker(kind, ref):
+    """嵌入段落文本的媒体引用，kind 为 image（图片）或 table（表格）"""
+    return f"{MEDIA_OPEN}{kind}:{ref}{MEDIA_CLOSE}"
+
+
+def replace_media_markers(lines, media):
+    """把各行中的媒体标记换成 “[图N]”“[表N]”，引用依次追加到 media，返回新的行列表"""
+    counts = {}
+
+    def placeholder(match):
+        kind, ref = match.group(1), match.group(2)
+        media.append((kind, ref))
+        counts[kind] = counts.get(kind, 0) + 1
+        return f"[{MEDIA_LABELS[kind]}{counts[kind]}]"
+
+    return [_MEDIA_RE.sub(placeholder, line) if MEDIA_OPEN in line else line for line in lines]
+
+
+def table_rows(ref):
+    """表格引用 -> 各行单元格文本的列表"""
+    return json.loads(ref)
+
+
+def get_question_type(line_text):
+    line_text = line_text.strip()
+    if "单选题" in line_text: return "单选题"
+    if "多选题" in line_text: return "多选题"
+    if "填空题" in line_text: return "填空题"
+    if "判断题" in line_text: return "判断题"
+    return None
+
+
+def iter_questions_from_paragraphs(paragraphs):
+    """题型标题 / 缓冲区 / “正确答案” 状态机，逐个产出 Question。
+
+    paragraphs 为任意段落文本的可迭代对象，本函数不会一次性读入全部段落。
+    """
+    current_q_type = None
+    question_buffer = []
+    doc_line_counter = 0
+
+    def flush_buffer_to_question():
+        """把缓冲区中的一道题转换为 Question，无法构成题目时返回 None"""
+        nonlocal question_buffer, doc_line_counter
+        if not question_buffer or not current_q_type:
+            question_buffer = []
+            return None
+
+        if len(question_buffer) == 1:
+            all_lines_in_block = question_buffer[0].splitlines()
+        else:
+            all_lines_in_block = "\n".join(question_buffer).splitlines()
+        question_buffer = []
+
+        answer_line_index_in_block = -1
+        for i, line_in_block in enumerate(all_lines_in_block):
+            if "正确答案" in line_in_block:
+                answer_line_index_in_block = i
+                break
+        if answer_line_index_in_block < 0:
+            return None
+
+        question_content_lines_from_block = all_lines_in_block[:answer_line_index_in_block]
+        if not question_content_lines_from_block:
+            return None
+        media = []
+        if any(MEDIA_OPEN in line for line in question_content_lines_from_block):
+            question_content_lines_from_block = replace_media_markers(question_content_lines_from_block, media)
+
+        answer_line_text = all_lines_in_block[answer_line_index_in_block]
+        try:
+            q_obj = Question(
+                q_type=current_q_type,
+                original_num_text=question_content_lines_from_block[0].strip(),
+                text="",
+                options_text=[opt.strip() for opt in question_content_lines_from_block[1:]],
+                answer_text=answer_line_text.strip(),
+                original_doc_order=doc_line_counter
+            )
+        except Exception as e:
+            print(f"      创建Question对象时出错: {e} -- 内容: {question_content_lines_from_block} | 答案: {answer_line_text}")
+            traceback.print_exc()
+            return None
+        if media:
+            q_obj.media = media
+        doc_line_counter += 1
+        return q_obj
+
+    for text in paragraphs:
+        text = text.strip()
+        if not text:
+            continue
+
+        if "↓" in text or "←" in text:
+            text = text.replace('↓', '').replace('←', '')
+        new_q_type = get_question_type(text) if _QUESTION_TYPE_RE.search(text) else None
+
+        if new_q_type:
+            q_obj = flush_buffer_to_question()
+            if q_obj is not None:
+                yield q_obj
+            current_q_type = new_q_type
+        elif current_q_type:
+            question_buffer.append(text)
+            if "正确答案" in text:
+                q_obj = flush_buffer_to_question()
+                if q_obj is not None:
+                    yield q_obj
+
+    # 处理文档末尾可能剩余的题目
+    q_obj = flush_buffer_to_question()
+    if q_obj is not None:
+        yield q_obj
+
+
+def iter_docx_paragraphs_legacy(filepath):
+    """旧的段落来源：先用 python-docx 构建完整文档对象，再遍历 doc.paragraphs"""
+    import docx # 仅旧路径需要 python-docx
+    doc = docx.Document(filepath)
+    for para in doc.paragraphs:
+        yield para.text
+
+
+def iter_questions_from_docx(filepath, streaming=True, progress=None):
+    """从 Word 题库中逐个产出 Question。
+
+    streaming=True 时流式读取 word/document.xml；False 时走 python-docx 旧路径（用于对照，不报告进度）。
+    progress 见 docx_stream.iter_body_paragraph_elements。
+    """
+    if streaming:
+        from docx_stream import iter_docx_paragraphs # lxml 较重，只在真正解析时导入（终端模式启动更快）
+        paragraphs = iter_docx_paragraphs(filepath, progress)
+    else:
+        paragraphs = iter_docx_paragraphs_legacy(filepath)
+    return iter_questions_from_paragraphs(paragraphs)
+
+
+def natural_sort_key(path):
+    """“第2章” 排在 “第10章” 之前"""
+    name = os.path.basename(path)
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", name)]
+
+
+def parse_bank_file_tagged(filepath, cache_dir=None):
+    """进程池任务：解析单个题库文件（任何 importers 支持的格式），返回 (filepath, 题目列表, 错误信息)。
+
+    每道题的 source_file 设为文件名；异常在子进程内捕获，不影响其他文件。
+    给出 cache_dir 时 Word 题库先查解析缓存。
+    """
+    from parse_cache import ParseCache, load_questions_cached # parse_cache、importers 依赖本模块，延迟导入
+    try:
+        questions, _cache_hit = load_questions_cached(filepath, ParseCache(cache_dir) if cache_dir else None)
+    except Exception as e:
+        return filepath, [], f"{type(e).__name__}: {e}"
+    source_name = os.path.basename(filepath)
+    for q in questions:
+        q.source_file = source_name
+    return filepath, questions, None
+
+
+def parse_bank_files_parallel(filepaths, max_workers=None, cache_dir=None, progress=None):
+    """用进程池并发解析多个题库文件。
+
+    返回与 filepaths 顺序一致的 [(filepath, 题目列表, 错误信息或None), ...]，
+    合并时按此顺序拼接即可得到稳定的题目顺序。
+    progress(已完成文件数, 总文件数) 每完成一个文件调用一次；它抛出的异常（如取消）
+    会中止等待并丢弃尚未开始的任务。
+    """
+    filepaths = list(filepaths)
+    if not filepaths:
+        return []
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(filepaths)))
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    task = partial(parse_bank_file_tagged, cache_dir=cache_dir)
+    results = [None] * len(filepaths)
+    if max_workers == 1:
+        for i, path in enumerate(filepaths):
+            results[i] = task(path)
+            if progress is not None:
+                progress(i + 1, len(filepaths))
+        return results
+
+    executor = ProcessPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {executor.submit(task, path): i for i, path in enumerate(filepaths)}
+        # 按完成顺序收集，按提交顺序放回，保证合并顺序稳定
+        for done_count, future in enumerate(as_completed(futures), 1):
+            results[futures[future]] = future.result()
+            if progress is not None:
+                progress(done_count, len(filepaths))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
@@ -0,0 +1,166 @@
+"""题目池：用数组 + 索引表维护未答/已答状态，各项操作均为 O(1)。
+
+* 每道题以 Question.qid 作为稳定编号（没有 qid 的题目由题目池分配）
+* 未答题：qid 数组 + qid->下标 映射，随机抽题直接按下标取，移除时与末尾交换后弹出
+* 已答题：qid 数组按作答顺序排列（最早的在前）+ qid->下标 映射；移除时只在数组中留空位（None），
+  下次按位置读取前一次性压缩，虚拟列表取任意一屏都是 O(屏内行数)
+"""
+import random
+
+
+class QuestionPool:
+    def __init__(self, rng=None):
+        self._rng = rng or random
+        self._by_id = {}            # qid -> Question，插入顺序即题库顺序
+        self._unanswered = []       # 未答题 qid 数组（无序）
+        self._unanswered_slot = {}  # qid -> 在 _unanswered 中的下标
+        self._answered_order = []   # 已答题 qid 数组，按作答顺序排列，已移除的位置为 None
+        self._answered = {}         # qid -> 在 _answered_order 中的下标
+        self._answered_holes = 0    # _answered_order 中空位的个数
+        self._next_id = 1
+
+    # --- 构建 ---
+    def clear(self):
+        self._by_id.clear()
+        self._unanswered.clear()
+        self._unanswered_slot.clear()
+        self._answered_order.clear()
+        self._answered.clear()
+        self._answered_holes = 0
+        self._next_id = 1
+
+    def add(self, q, answered=False):
+        """加入一道题（默认未答），返回其 qid"""
+        if q.qid is None or q.qid in self._by_id:
+            q.qid = self._next_id
+        self._next_id = max(self._next_id, q.qid + 1)
+        self._by_id[q.qid] = q
+        if answered:
+            self._push_answered(q.qid)
+        else:
+            self._push_unanswered(q.qid)
+        return q.qid
+
+    def load(self, all_questions, answered_newest_first=()):
+        """用完整题库和已答列表（最新的在前）重建题目池"""
+        self.clear()
+        answered_ids = {id(q) for q in answered_newest_first}
+        for q in all_questions:
+            if id(q) not in answered_ids:
+                self.add(q)
+        # 已答部分按作答顺序（最早的先）插入
+        for q in reversed(answered_newest_first):
+            self.add(q, answered=True)
+
+    # --- 查询 ---
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, q):
+        return q.qid is not None and self._by_id.get(q.qid) is q
+
+    def get(self, qid):
+        return self._by_id.get(qid)
+
+    @property
+    def unanswered_count(self):
+        return len(self._unanswered)
+
+    @property
+    def answered_count(self):
+        return len(self._answered)
+
+    def is_answered(self, q):
+        return q.qid in self._answered
+
+    def is_answered_id(self, qid):
+        return qid in self._answered
+
+    def all_questions(self):
+        """按题库顺序返回全部题目（新列表）"""
+        return list(self._by_id.values())
+
+    def unanswered_questions(self):
+        return [self._by_id[qid] for qid in self._unanswered]
+
+    def answered_questions(self):
+        """已答题目，最新作答的在前（新列表）"""
+        self._compact_answered()
+        return [self._by_id[qid] for qid in reversed(self._answered_order)]
+
+    def answered_ids_range(self, start, stop):
+        """已答列表中第 start..stop-1 个的 qid（0 为最新），供虚拟列表按需取可见行，O(stop - start)"""
+        self._compact_answered()
+        count = len(self._answered_order)
+        start, stop = max(0, min(start, count)), max(0, min(stop, count))
+        if start >= stop:
+            return []
+        return self._answered_order[count - stop:count - start][::-1]
+
+    # --- 操作 ---
+    def draw(self):
+        """随机取一道未答题（不改变状态），没有时返回 None"""
+        if not self._unanswered:
+            return None
+        return self._by_id[self._unanswered[self._rng.randrange(len(self._unanswered))]]
+
+    def mark_answered(self, q):
+        """未答 -> 已答（成为最新一条）。题目不在未答中时返回 False"""
+        if q.qid not in self._unanswered_slot:
+            return False
+        self._remove_unanswered(q.qid)
+        self._push_answered(q.qid)
+        return True
+
+    def move_back(self, qids):
+        """已答 -> 未答，返回实际移回的题目"""
+        moved = []
+        for qid in qids:
+            if qid in self._answered:
+                self._remove_answered(qid)
+                self._push_unanswered(qid)
+                moved.append(self._by_id[qid])
+        return moved
+
+    def delete(self, qids):
+        """从题目池中彻底删除，返回实际删除的题目"""
+        deleted = []
+        for qid in qids:
+            q = self._by_id.pop(qid, None)
+            if q is None:
+                continue
+            if qid in self._answered:
+                self._remove_answered(qid)
+            else:
+                self._remove_unanswered(qid)
+            deleted.append(q)
+        return deleted
+
+    # --- 内部：已答数组的空位与压缩 ---
+    def _push_answered(self, qid):
+        self._answered[qid] = len(self._answered_order)
+        self._answered_order.append(qid)
+
+    def _remove_answered(self, qid):
+        self._answered_order[self._answered.pop(qid)] = None
+        self._answered_holes += 1
+
+    def _compact_answered(self):
+        """去掉空位并重建下标；一批移回/删除之后只压缩一次"""
+        if not self._answered_holes:
+            return
+        self._answered_order = [qid for qid in self._answered_order if qid is not None]
+        self._answered = {qid: i for i, qid in enumerate(self._answered_order)}
+        self._answered_holes = 0
+
+    # --- 内部：未答数组的 swap-remove ---
+    def _push_unanswered(self, qid):
+        self._unanswered_slot[qid] = len(self._unanswered)
+        self._unanswered.append(qid)
+
+    def _remove_unanswered(self, qid):
+        slot = self._unanswered_slot.pop(qid)
+        last_qid = self._unanswered.pop()
+        if last_qid != qid:
+            self._unanswered[slot] = last_qid
+            self._unanswered_slot[last_qid] = slot
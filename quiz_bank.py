@@ -1,76 +1,28 @@
 import tkinter as tk
-from tkinter import filedialog, messagebox, scrolledtext
-import docx
-import random
-import re
-import pickle # 用于保存和加载对象
+from tkinter import filedialog, messagebox, scrolledtext, ttk
 import os     # 用于检查文件是否存在
-
-# --- Question 类 (保持不变，确保它是可pickle的) ---
-class Question:
-    def __init__(self, q_type, original_num_text, text, options_text, answer_text, original_doc_order):
-        self.q_type = q_type
-        self.original_num_text = original_num_text 
-        self.text = text 
-        self.options_raw = options_text 
-        self.answer_raw = answer_text 
-        self.options = {} 
-        self.answer = None 
-        self.original_doc_order = original_doc_order
-        self._parse_details()
-
-    def _parse_details(self):
-        match = re.match(r"^\s*(\d+[．.\s、]+)(.*)", self.original_num_text.strip())
-        if match:
-            self.original_num = match.group(1).strip()
-            self.text = match.group(2).strip()
-        else:
-            self.original_num = "" 
-            self.text = self.original_num_text.strip()
-
-        if self.q_type in ["单选题", "多选题"]:
-            for opt_line in self.options_raw:
-                opt_match = re.match(r"^\s*([A-G])[\s.]+(.*)", opt_line.strip())
-                if opt_match:
-                    letter = opt_match.group(1)
-                    opt_text = opt_match.group(2).strip()
-                    self.options[letter] = opt_text
-        
-        cleaned_answer_text = self.answer_raw.replace("正确答案", "").strip("：: ").strip()
-        if self.q_type == "单选题":
-            self.answer = cleaned_answer_text[0] if cleaned_answer_text else None
-        elif self.q_type == "多选题":
-            self.answer = sorted([char for char in cleaned_answer_text.replace(" ", "") if char.isalpha()])
-        elif self.q_type == "判断题":
-            processed_ans_text = cleaned_answer_text.upper() # 转大写方便判断
-            if "A" in processed_ans_text or "是" in processed_ans_text or "正确" in processed_ans_text:
-                self.answer = "A"
-            elif "B" in processed_ans_text or "否" in processed_ans_text or "错误" in processed_ans_text:
-                self.answer = "B"
-            else: # 降级处理
-                self.answer = cleaned_answer_text[0] if cleaned_answer_text else None
-        elif self.q_type == "填空题":
-            parts = cleaned_answer_text.split()
-            parsed_answers = []
-            i = 0
-            while i < len(parts):
-                if parts[i].isdigit() and i + 1 < len(parts) and not parts[i+1].isdigit():
-                    parsed_answers.append(parts[i+1])
-                    i += 2
-                else:
-                    parsed_answers.append(parts[i])
-                    i += 1
-            self.answer = parsed_answers if parsed_answers else [cleaned_answer_text] 
-
-    def get_display_text(self):
-        return f"{self.original_num} {self.text}" if self.original_num else self.text
-
-    def __repr__(self):
-        return f"<{self.q_type} Q: {self.text[:20]}... A: {self.answer}>"
+import time
+
+from question_parser import table_rows
+from bank_diff import describe_diff, source_signature
+from importers import list_bank_files, supported_extensions
+from quiz_engine import (QuizEngine, answered_preview_text, blank_count, describe_answer, describe_grade,
+                         describe_history_report, describe_merges, describe_question, describe_review,
+                         display_options, format_delay, merge_summary,
+                         question_header_text, session_score_text)
+from virtual_list import VirtualListbox
+from option_widgets import OptionWidgetPool
+from background_task import BackgroundTask
+from media_cache import MediaCache
+from instrumentation import timed, watch_tk_latency
 
 # --- QuizApp 类 ---
 class QuizApp:
-    SAVE_FILE_NAME = "quiz_progress.pkl" # 定义保存文件名
+    DB_FILE_NAME = QuizEngine.DB_FILE_NAME
+    SAVE_FILE_NAME = QuizEngine.SAVE_FILE_NAME
+    PROGRESS_ANIMATION_MS = 15 # 不确定进度时进度条动画的间隔
+    WATCH_INTERVAL_MS = 3000 # 自动同步题库文件时检查修改时间的间隔
+    PREVIEW_IMAGE_WIDTH = 560 # 预览窗口中图片的最大宽度
 
     # 定义统一的字体设置，方便修改
     QUESTION_FONT = ("微软雅黑", 18)
@@ -85,19 +37,32 @@ class QuizApp:
         master.title("灵感菇")
         master.geometry("800x750") # 稍微调大一点高度给新按钮
 
-        self.all_questions = []
-        self.unanswered_questions = []
-        self.answered_questions = []
+        self.engine = QuizEngine() # 题库、抽题、作答与持久化都在引擎中，界面只负责显示和收集作答
         self.current_question_data = None
-        self.user_answer_widgets = [] 
-        self.last_imported_docx = None # 用于记录最后导入的docx路径，可选
+        self.current_question_answered = False # 当前题目已提交过答案时不再允许提交
+        self.current_task = None # 正在运行的 BackgroundTask
+        self.media = MediaCache() # 题目中的图片：显示时才从 .docx 读取并解码，LRU 限额
+        self.task_label_text = ""
 
         # --- Top Frame for File Import, Save/Load and Stats ---
         top_frame = tk.Frame(master, pady=10)
         top_frame.pack(fill=tk.X)
 
-        self.btn_import = tk.Button(top_frame, text="导入新题库(Word)", command=self.import_word_file)
+        self.btn_import = tk.Button(top_frame, text="导入新题库", command=self.import_word_file)
         self.btn_import.pack(side=tk.LEFT, padx=5)
+
+        self.btn_import_folder = tk.Button(top_frame, text="导入文件夹", command=self.import_word_folder)
+        self.btn_import_folder.pack(side=tk.LEFT, padx=5)
+
+        # 重新读取上次导入的文件（或文件夹），只更新有变化的题目，作答进度保留
+        self.btn_update_bank = tk.Button(top_frame, text="更新题库", command=self.update_bank)
+        self.btn_update_bank.pack(side=tk.LEFT, padx=5)
+        self.var_watch_source = tk.BooleanVar(value=False)
+        self.chk_watch_source = tk.Checkbutton(top_frame, text="自动同步", variable=self.var_watch_source,
+                                               command=self.toggle_watch_source)
+        self.chk_watch_source.pack(side=tk.LEFT, padx=5)
+        self._watch_job = None
+        self._watched_signature = None # 上次读取时题库文件的 (路径, 修改时间, 大小)
         
         self.btn_save_progress = tk.Button(top_frame, text="保存进度", command=self.save_progress)
         self.btn_save_progress.pack(side=tk.LEFT, padx=5)
@@ -109,6 +74,21 @@ class QuizApp:
         self.stats_label = tk.Label(top_frame, text="未答题: 0 | 已答题: 0")
         self.stats_label.pack(side=tk.LEFT, padx=10)
 
+        # 复习模式：按间隔重复的到期时间出题，作答后自动判分并重新排期
+        self.var_review_mode = tk.BooleanVar(value=False)
+        self.chk_review_mode = tk.Checkbutton(top_frame, text="复习模式", variable=self.var_review_mode,
+                                              command=self.toggle_review_mode)
+        self.chk_review_mode.pack(side=tk.LEFT, padx=5)
+
+        # --- 后台任务进度条（加载/导入时显示） ---
+        self.task_frame = tk.Frame(master)
+        self.task_label = tk.Label(self.task_frame, text="", anchor="w")
+        self.task_label.pack(side=tk.LEFT, padx=5)
+        self.btn_cancel_task = tk.Button(self.task_frame, text="取消", command=self.cancel_task)
+        self.btn_cancel_task.pack(side=tk.RIGHT, padx=5)
+        self.task_progressbar = ttk.Progressbar(self.task_frame, mode="indeterminate", maximum=1000)
+        self.task_progressbar.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+
         # --- Middle Frame (保持不变) ---
         self.question_frame = tk.LabelFrame(master, text="题目区域", padx=10, pady=10)
         self.question_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
@@ -116,16 +96,20 @@ class QuizApp:
         self.question_header_label.pack(anchor="w")
         self.question_text_label = tk.Label(self.question_frame, text="请先导入题库或加载已有进度", justify=tk.LEFT, wraplength=1, font=self.QUESTION_FONT)
         self.question_text_label.pack(anchor="w", pady=5)
+        # 题目中的图片和表格，只在题目带有它们时显示
+        self.media_frame = tk.Frame(self.question_frame)
         self.options_frame = tk.Frame(self.question_frame) 
         self.options_frame.pack(anchor="w", fill=tk.X, pady=5)
+        self.option_widgets = OptionWidgetPool(self.options_frame, self.OPTION_FONT) # 选项组件复用，抽题时不再重建
         self.answer_display_label = tk.Label(self.question_frame, text="", justify=tk.LEFT, wraplength=1, fg="blue", font=self.ANSWER_FONT)
         self.answer_display_label.pack(anchor="w", pady=10)
 
-        # 绑定 <Configure> 事件到 self.question_frame
-        # 当 self.question_frame 的大小改变时，调用 self.update_wraplengths
-        self.question_frame.bind("<Configure>", self.update_wraplengths)
-        # 也为 options_frame 绑定，因为选项在其内部
-        self.options_frame.bind("<Configure>", self.update_wraplengths_for_options)
+        # question_frame 和 options_frame 的 <Configure> 事件只负责登记一次布局，
+        # 拖动窗口时产生的大量事件合并为空闲时的一次 apply_layout
+        self._layout_job = None
+        self._question_wraplength = None # 上次应用的宽度，没变化时跳过
+        self.question_frame.bind("<Configure>", self.schedule_layout)
+        self.options_frame.bind("<Configure>", self.schedule_layout)
         # 尝试在UI稳定后首次调用更新，确保初始wraplength正确
         self.master.after(100, self.initial_wraplength_update)
         
@@ -136,10 +120,24 @@ class QuizApp:
         self.btn_random_question.pack(side=tk.LEFT, padx=10)
         self.btn_show_answer = tk.Button(controls_frame, text="显示答案并移至已答", command=self.process_answer, state=tk.DISABLED)
         self.btn_show_answer.pack(side=tk.LEFT, padx=10)
+        # 作答记录统计：各题型正确率、最常答错和用时最长的题目、每日作答量
+        self.btn_history = tk.Button(controls_frame, text="作答统计", command=self.show_history_report)
+        self.btn_history.pack(side=tk.RIGHT, padx=10)
         
         # --- Answered Questions Frame (保持不变) ---
         answered_frame = tk.LabelFrame(master, text="已答题目列表", padx=10, pady=10)
         answered_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+        # 全文检索：题干、选项和答案（中文按两字切分），结果在单独窗口中显示
+        search_frame = tk.Frame(answered_frame)
+        search_frame.pack(fill=tk.X)
+        tk.Label(search_frame, text="搜索题目:").pack(side=tk.LEFT)
+        self.search_entry = tk.Entry(search_frame)
+        self.search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.search_entry.bind("<Return>", lambda event: self.search_questions())
+        tk.Button(search_frame, text="搜索", command=self.search_questions).pack(side=tk.LEFT)
+        self.search_win = None
+        self.search_result_ids = []
         answered_buttons_frame = tk.Frame(answered_frame)
         answered_buttons_frame.pack(fill=tk.X, pady=5)
 
@@ -148,97 +146,53 @@ class QuizApp:
 
         self.btn_delete_selected = tk.Button(answered_buttons_frame, text="删除选中", command=self.delete_selected_questions, state=tk.DISABLED, bg="salmon")
         self.btn_delete_selected.pack(side=tk.LEFT, padx=5, expand=True, fill=tk.X) # expand 和 fill
-        # 创建水平滚动条
-        answered_xscrollbar = tk.Scrollbar(answered_frame, orient=tk.HORIZONTAL)
-        answered_xscrollbar.pack(side=tk.BOTTOM, fill=tk.X) # 放在 Listbox 下方
-        # 创建 Listbox，移除固定的 width 或设置一个合理的初始值
-        self.answered_listbox = tk.Listbox(answered_frame, 
-                                            selectmode=tk.EXTENDED, 
-                                            width=80, # 可以保留或移除，或设置更小的值配合滚动条
-                                            yscrollcommand=None, # 先置空，后面一起配置
-                                            xscrollcommand=answered_xscrollbar.set) # 关联水平滚动条
-        self.answered_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        answered_scrollbar = tk.Scrollbar(answered_frame, orient=tk.VERTICAL, command=self.answered_listbox.yview)
-        answered_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.answered_listbox.config(yscrollcommand=answered_scrollbar.set)
-        # 配置水平滚动条的 command
-        answered_xscrollbar.config(command=self.answered_listbox.xview)
-        self.answered_listbox.bind("<Double-Button-1>", self.preview_answered_question)
-        # 在 __init__ 中，为 answered_listbox 绑定选择变化事件
-        self.answered_listbox.bind("<<ListboxSelect>>", self.on_answered_listbox_select)
+        # 虚拟化列表：只渲染可见行，行数据按需从题目池中取
+        self.answered_list = VirtualListbox(answered_frame,
+                                            row_count=lambda: self.pool.answered_count,
+                                            row_ids=lambda start, stop: self.pool.answered_ids_range(start, stop),
+                                            row_text=lambda qid: answered_preview_text(self.pool.get(qid)),
+                                            row_exists=lambda qid: self.pool.is_answered_id(qid),
+                                            width=80)
+        self.answered_list.pack(fill=tk.BOTH, expand=True)
+        self.answered_list.listbox.bind("<Double-Button-1>", self.preview_answered_question)
+        # 为已答列表绑定选择变化事件
+        self.answered_list.bind("<<ListboxSelect>>", self.on_answered_listbox_select)
         # self.btn_move_back = tk.Button(answered_frame, text="移回未答列表", command=self.move_to_unanswered, state=tk.DISABLED)
         # self.btn_move_back.pack(pady=5)
 
-        # --- 自动加载进度 ---
+        # --- 自动加载进度（后台线程） ---
         self.load_progress() 
 
         # --- 程序退出时自动保存 ---
         master.protocol("WM_DELETE_WINDOW", self.on_closing)
+        watch_tk_latency(master) # 仅在开启性能埋点时记录事件循环延迟
+
+    @property
+    def pool(self):
+        """当前题目池（导入/加载后引擎会整体替换它）"""
+        return self.engine.pool
 
     # 在 QuizApp 类中添加新方法：
+    @timed("ui.delete_selected")
     def delete_selected_questions(self):
-        selected_indices = self.answered_listbox.curselection()
-        if not selected_indices:
+        selected_ids = self.answered_list.selected_ids()
+        if not selected_ids:
             messagebox.showwarning("删除题目", "请先在“已答题目列表”中选择要删除的题目。")
             return
 
-        # 从后往前删除，以避免索引混乱
         # 确认删除
-        if not messagebox.askyesno("确认删除", f"确定要永久删除选中的 {len(selected_indices)} 道题目吗？\n此操作也会从总题库中移除它们，并保存进度。"):
+        if not messagebox.askyesno("确认删除", f"确定要永久删除选中的 {len(selected_ids)} 道题目吗？\n此操作也会从总题库中移除它们，并保存进度。"):
             return
 
-        deleted_count = 0
-        questions_to_remove_from_all = []
-
-        for i in sorted(selected_indices, reverse=True):
-            try:
-                # 1. 从 answered_questions 移除并获取对象
-                question_obj_to_delete = self.answered_questions.pop(i)
-                
-                # 2. 从 Listbox 中移除
-                self.answered_listbox.delete(i)
-                
-                # 3. 准备从 all_questions 中移除 (先收集，避免在循环中修改 all_questions)
-                questions_to_remove_from_all.append(question_obj_to_delete)
-                
-                deleted_count += 1
-            except IndexError:
-                print(f"删除已答题目时索引错误: {i}")
-
-        # 4. 从 all_questions 和 unanswered_questions 中移除
-        if questions_to_remove_from_all:
-            # 使用 set 操作可以提高效率，如果 Question 对象是可哈希的
-            # 或者直接列表推导式移除
-            # 为了确保是同一个对象，我们比较对象id（或者实现__eq__和__hash__）
-            # 简单起见，如果 Question 对象直接存的是引用，以下方式可行
-            
-            temp_all_questions = []
-            for q_all in self.all_questions:
-                is_to_remove = False
-                for q_remove in questions_to_remove_from_all:
-                    if q_all is q_remove: # 比较对象身份
-                        is_to_remove = True
-                        break
-                if not is_to_remove:
-                    temp_all_questions.append(q_all)
-            self.all_questions = temp_all_questions
-
-            temp_unanswered_questions = []
-            for q_unans in self.unanswered_questions:
-                is_to_remove = False
-                for q_remove in questions_to_remove_from_all:
-                    if q_unans is q_remove: # 比较对象身份
-                        is_to_remove = True
-                        break
-                if not is_to_remove:
-                    temp_unanswered_questions.append(q_unans)
-            self.unanswered_questions = temp_unanswered_questions
+        # 选中项即 qid，直接从题目池中 O(1) 删除
+        deleted_questions = self.engine.delete(selected_ids)
+        self.answered_list.refresh()
         
-        if deleted_count > 0:
+        if deleted_questions:
             self.update_stats()
-            messagebox.showinfo("删除成功", f"成功删除了 {deleted_count} 道题目。")
-            # 删除后自动保存进度
-            self.save_progress(silent=True) 
+            if self.search_win is not None and self.search_win.winfo_exists():
+                self.refresh_search_results()
+            messagebox.showinfo("删除成功", f"成功删除了 {len(deleted_questions)} 道题目。")
         else:
             messagebox.showinfo("删除", "没有题目被删除（可能出现内部错误）。")
 
@@ -248,20 +202,18 @@ class QuizApp:
 
     # 在 QuizApp 类中添加新方法：
     def preview_answered_question(self, event):
-        selection_indices = self.answered_listbox.curselection()
-        if not selection_indices:
+        qid = self.answered_list.active_id
+        if qid is None:
             return # 没有选中项
 
-        selected_idx = selection_indices[0] # 获取第一个选中项的索引
-        
-        # 从 self.answered_questions 中获取对应的 Question 对象
-        # 假设 self.answered_listbox 中的顺序与 self.answered_questions 一致
-        if selected_idx < len(self.answered_questions):
-            question_obj = self.answered_questions[selected_idx]
-        else:
+        # 从题目池中按 qid 获取对应的 Question 对象
+        question_obj = self.engine.answered_question(qid)
+        if question_obj is None:
             messagebox.showerror("错误", "无法找到对应的题目数据。")
             return
+        self.show_question_preview(question_obj)
 
+    def show_question_preview(self, question_obj):
         # 创建一个新的顶层窗口 (Toplevel) 来显示预览
         preview_win = tk.Toplevel(self.master)
         preview_win.title(f"题目预览 - {question_obj.q_type} (原序 {question_obj.original_doc_order + 1})")
@@ -273,76 +225,139 @@ class QuizApp:
         text_area = scrolledtext.ScrolledText(preview_win, wrap=tk.WORD, font=("Arial", 12), padx=10, pady=10)
         text_area.pack(fill=tk.BOTH, expand=True)
 
-        # 构建显示内容
-        content = []
-        content.append(f"题型: {question_obj.q_type}")
-        content.append(f"原序号: {question_obj.original_doc_order + 1}")
-        content.append("-" * 30)
-        content.append(f"题目:\n{question_obj.get_display_text()}\n") # get_display_text 包含原始序号和题干
-
-        if question_obj.q_type in ["单选题", "多选题"]:
-            content.append("选项:")
-            for letter, opt_text in sorted(question_obj.options.items()):
-                content.append(f"  {letter}. {opt_text}")
-            content.append("\n")
-        elif question_obj.q_type == "判断题":
-            content.append("选项:\n  A. 是 (正确)\n  B. 否 (错误)\n")
-            
-
-        content.append("正确答案:")
-        if question_obj.q_type == "单选题":
-            correct_ans_display = f"{question_obj.answer}. {question_obj.options.get(question_obj.answer, '')}"
-        elif question_obj.q_type == "多选题":
-            ans_list = question_obj.answer if isinstance(question_obj.answer, list) else []
-            correct_ans_display = "".join(sorted(ans_list))
-            for letter in sorted(ans_list):
-                correct_ans_display += f"\n  {letter}. {question_obj.options.get(letter, '')}"
-        elif question_obj.q_type == "判断题":
-            display_options = {"A": "是 (正确)", "B": "否 (错误)"}
-            correct_ans_display = f"{question_obj.answer}. {display_options.get(question_obj.answer, '')}"
-        elif question_obj.q_type == "填空题":
-            ans_list = question_obj.answer if isinstance(question_obj.answer, list) else []
-            correct_ans_display = " | ".join(ans_list)
-        else:
-            correct_ans_display = str(question_obj.answer_raw) # Fallback
-
-        content.append(correct_ans_display)
-
-        text_area.insert(tk.END, "\n".join(content))
+        text_area.insert(tk.END, describe_question(question_obj))
+        if question_obj.media:
+            preview_win.images = [] # Tk 图片需要保持引用
+            source = self.engine.media_source(question_obj)
+            for i, (kind, ref) in enumerate(question_obj.media, 1):
+                text_area.insert(tk.END, f"\n\n[{i}] ")
+                image = self.media.photo_image(source, ref, self.PREVIEW_IMAGE_WIDTH) if kind == "image" and source else None
+                if image is not None:
+                    preview_win.images.append(image)
+                    text_area.image_create(tk.END, image=image)
+                elif kind == "table":
+                    text_area.insert(tk.END, "\n" + "\n".join("\t".join(row) for row in table_rows(ref)))
+                else:
+                    text_area.insert(tk.END, f"（无法显示图片 {os.path.basename(ref)}）")
         text_area.config(state=tk.DISABLED) # 设置为只读
 
         # 添加关闭按钮
         close_button = tk.Button(preview_win, text="关闭", command=preview_win.destroy, font=("Arial", 10))
         close_button.pack(pady=10)
 
+    def show_history_report(self):
+        """在后台统计全部作答记录（可能有上百万条），完成后在新窗口中显示"""
+        def on_done(report):
+            win = tk.Toplevel(self.master)
+            win.title(f"作答统计（{report.attempts} 次作答）")
+            win.geometry("700x500")
+            win.transient(self.master)
+            text_area = scrolledtext.ScrolledText(win, wrap=tk.WORD, font=("Arial", 12), padx=10, pady=10)
+            text_area.pack(fill=tk.BOTH, expand=True)
+            text_area.insert(tk.END, "\n".join(describe_history_report(report, self.pool.get)))
+            text_area.config(state=tk.DISABLED)
+
+        def on_error(e):
+            messagebox.showerror("统计失败", f"读取作答记录时出错: {e}")
+
+        self.start_task("正在统计作答记录", lambda report: self.engine.history_report(), on_done, on_error)
+
+    # --- 全文检索 ---
+    def search_questions(self):
+        query = self.search_entry.get().strip()
+        if not query:
+            return
+        results = self.engine.search(query)
+        if not results:
+            messagebox.showinfo("搜索", f"没有找到包含“{query}”的题目。")
+            return
+        self.search_result_ids = [q.qid for q in results]
+        if self.search_win is None or not self.search_win.winfo_exists():
+            self.create_search_window()
+        self.search_win.title(f"搜索结果 - {query}（{len(results)} 条）")
+        self.refresh_search_results()
+        self.search_win.lift()
+
+    def create_search_window(self):
+        self.search_win = tk.Toplevel(self.master)
+        self.search_win.geometry("700x400")
+        self.search_win.transient(self.master)
+        buttons_frame = tk.Frame(self.search_win)
+        buttons_frame.pack(fill=tk.X, pady=5)
+        tk.Button(buttons_frame, text="预览", command=self.preview_search_result).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons_frame, text="移回未答", command=self.move_back_search_results).pack(side=tk.LEFT, padx=5)
+        self.search_listbox = tk.Listbox(self.search_win, selectmode=tk.EXTENDED)
+        self.search_listbox.pack(fill=tk.BOTH, expand=True)
+        self.search_listbox.bind("<Double-Button-1>", lambda event: self.preview_search_result())
+
+    def refresh_search_results(self):
+        """重新生成结果列表的文本（作答状态可能已变化；已删除的题目会被去掉）"""
+        self.search_result_ids = [qid for qid in self.search_result_ids if self.pool.get(qid) is not None]
+        self.search_listbox.delete(0, tk.END)
+        for qid in self.search_result_ids:
+            q = self.pool.get(qid)
+            state = "已答" if self.pool.is_answered(q) else "未答"
+            self.search_listbox.insert(tk.END, f"[{state}] {answered_preview_text(q)}")
+
+    def close_search_window(self):
+        if self.search_win is not None and self.search_win.winfo_exists():
+            self.search_win.destroy()
+        self.search_win = None
+        self.search_result_ids = []
+
+    def selected_search_results(self):
+        return [self.pool.get(self.search_result_ids[i]) for i in self.search_listbox.curselection()]
+
+    def preview_search_result(self):
+        selected = self.selected_search_results()
+        if selected:
+            self.show_question_preview(selected[0])
+
+    def move_back_search_results(self):
+        if self.current_task is not None:
+            return # 后台任务进行期间不允许修改题库
+        answered = [q.qid for q in self.selected_search_results() if self.pool.is_answered(q)]
+        if not answered:
+            messagebox.showwarning("提示", "请先选择已答的题目。", parent=self.search_win)
+            return
+        moved_questions = self.engine.move_back(answered)
+        self.answered_list.refresh()
+        self.update_stats()
+        self.refresh_search_results()
+        messagebox.showinfo("成功", f"成功将 {len(moved_questions)} 道题目移回未答列表。", parent=self.search_win)
+
     def initial_wraplength_update(self):
         """在UI稳定后首次更新wraplengths"""
         # 确保组件已经获得了实际宽度
         if self.question_frame.winfo_width() > 1: # 确保宽度有效
-            self.update_wraplengths(None) # 传递 None 事件对象
-        if self.options_frame.winfo_width() > 1:
-            self.update_wraplengths_for_options(None)
-
-    def update_wraplengths_for_options(self, event):
-        """当 options_frame 大小改变时，更新其内部选项的 wraplength"""
+            self.apply_layout()
+
+    def schedule_layout(self, event=None):
+        """登记一次布局；已登记时直接返回，一帧内的多次 <Configure> 只会触发一次 apply_layout"""
+        if self._layout_job is None:
+            self._layout_job = self.master.after_idle(self.apply_layout)
+
+    @timed("ui.layout")
+    def apply_layout(self):
+        """按当前宽度更新题目和选项的 wraplength（宽度没变时不调用 config）"""
+        if self._layout_job is not None:
+            self.master.after_cancel(self._layout_job) # 显示新题前直接调用时，取消已登记的那次
+            self._layout_job = None
+        self.update_wraplengths()
+        self.update_wraplengths_for_options()
+
+    def update_wraplengths_for_options(self):
+        """更新 options_frame 内选项的 wraplength"""
         options_frame_width = self.options_frame.winfo_width()
+        if options_frame_width <= 1 : # 如果宽度还未确定（如首次显示选项前），用父容器估算
+            options_frame_width = self.question_frame.winfo_width()
         # 选项文本前有 "A. " 等，所以 wraplength 通常比 frame 宽度小一些
         option_wraplength = max(1, options_frame_width - 30) # 减去一些缓冲和标记宽度
 
-        # 遍历 self.options_frame 中的 Radiobutton 和 Checkbutton
-        # self.user_answer_widgets 存储了这些动态创建的组件
-        for widget in self.user_answer_widgets:
-            if widget.winfo_exists() and isinstance(widget, (tk.Radiobutton, tk.Checkbutton)):
-                try:
-                    widget.config(wraplength=option_wraplength)
-                except tk.TclError:
-                    # 有时在组件正在销毁或尚未完全创建时调用config会出错
-                    pass 
-            # 注意：填空题的 Entry 组件不需要 wraplength
-
-    def update_wraplengths(self, event):
-        """当 question_frame 大小改变时，更新其内部 Label 的 wraplength"""
-        # event 参数是Tkinter传递的事件对象，可能为None（如果手动调用）
+        self.option_widgets.set_wraplength(option_wraplength) # 填空题的 Entry 组件不需要 wraplength
+
+    def update_wraplengths(self):
+        """更新 question_frame 内 Label 的 wraplength"""
         # 我们需要 question_frame 的当前内部宽度
         # winfo_width() 获取的是组件的总宽度，包括边框和内边距
         # 我们需要的是可用于文本的区域宽度
@@ -352,434 +367,453 @@ class QuizApp:
         # 但Label本身可能也有自己的内部边距或特性，所以再减一点作为缓冲
         frame_width = self.question_frame.winfo_width()
         new_wraplength = max(1, frame_width - 25) # 减去 LabelFrame 的 padx 和一些缓冲, 最小为1
+        if new_wraplength == self._question_wraplength:
+            return # 只是高度变化（例如换了一道选项更多的题），不需要重新换行
+        self._question_wraplength = new_wraplength
 
-        if hasattr(self, 'question_header_label') and self.question_header_label.winfo_exists():
-            self.question_header_label.config(wraplength=new_wraplength)
-        if hasattr(self, 'question_text_label') and self.question_text_label.winfo_exists():
-            self.question_text_label.config(wraplength=new_wraplength)
-        if hasattr(self, 'answer_display_label') and self.answer_display_label.winfo_exists():
-            self.answer_display_label.config(wraplength=new_wraplength)
-        
-        # 由于选项的 wraplength 依赖于 options_frame，让 options_frame 的事件处理器负责
-        # 或者在这里也触发一次 options_frame 的更新 (如果 options_frame 宽度变化不频繁)
-        # self.update_wraplengths_for_options(None) # 如果需要
+        self.question_header_label.config(wraplength=new_wraplength)
+        self.question_text_label.config(wraplength=new_wraplength)
+        self.answer_display_label.config(wraplength=new_wraplength)
 
     def on_closing(self):
         if messagebox.askokcancel("退出", "确定要退出吗？将会自动保存当前进度。"):
+            if self.current_task is not None:
+                self.current_task.cancel() # 后台任务的数据库写入在事务中，取消后自动回滚
+            if self._watch_job is not None:
+                self.master.after_cancel(self._watch_job)
             self.save_progress(silent=True) # 静默保存，不弹窗
+            self.engine.close()
             self.master.destroy()
 
+    # --- 后台任务（加载/导入），结果通过 master.after 交回主线程 ---
+    def start_task(self, label, work, on_done, on_error):
+        """在后台线程运行 work(report)，期间显示进度条和取消按钮并禁用其他操作"""
+        if self.current_task is not None:
+            messagebox.showwarning("请稍候", "当前还有任务正在进行。")
+            return
+        self.task_label_text = label
+
+        def finish(callback, *args):
+            self.current_task = None
+            self.set_busy(False)
+            callback(*args)
+
+        self.current_task = BackgroundTask(
+            self.master, work,
+            on_done=lambda result: finish(on_done, result),
+            on_error=lambda e: finish(on_error, e),
+            on_cancelled=lambda: finish(self.on_task_cancelled),
+            on_progress=self.on_task_progress,
+        )
+        self.set_busy(True)
+        self.current_task.start()
+
+    def cancel_task(self):
+        if self.current_task is not None:
+            self.current_task.cancel()
+            self.btn_cancel_task.config(state=tk.DISABLED)
+            self.task_label.config(text=f"{self.task_label_text} 正在取消…")
+
+    def on_task_cancelled(self):
+        self.question_text_label.config(text=f"已取消：{self.task_label_text}。当前题库未受影响。")
+
+    def on_task_progress(self, done, total):
+        if total:
+            if self.task_progressbar.cget("mode") != "determinate":
+                self.task_progressbar.stop()
+                self.task_progressbar.config(mode="determinate")
+            fraction = min(1.0, done / total)
+            self.task_progressbar.config(value=fraction * self.task_progressbar.cget("maximum"))
+            self.task_label.config(text=f"{self.task_label_text} {fraction:.0%}")
+        else:
+            self.task_label.config(text=f"{self.task_label_text} {done}")
+
+    def set_busy(self, busy):
+        """显示/隐藏进度条，并在任务进行期间禁用会修改题库的按钮"""
+        if busy:
+            self.task_label.config(text=self.task_label_text)
+            self.btn_cancel_task.config(state=tk.NORMAL)
+            self.task_progressbar.config(mode="indeterminate", value=0)
+            self.task_progressbar.start(self.PROGRESS_ANIMATION_MS)
+            self.task_frame.pack(fill=tk.X, padx=10, before=self.question_frame)
+            self.btn_show_answer.config(state=tk.DISABLED)
+        else:
+            self.task_progressbar.stop()
+            self.task_frame.pack_forget()
+            can_answer = self.current_question_data is not None and not self.current_question_answered
+            self.btn_show_answer.config(state=tk.NORMAL if can_answer else tk.DISABLED)
+        for btn in (self.btn_import, self.btn_import_folder, self.btn_update_bank):
+            btn.config(state=tk.DISABLED if busy else tk.NORMAL)
+        self.update_stats()
+
     def save_progress(self, silent=False):
-        if not self.all_questions: # 如果没有题目数据，不保存
+        """作答、移回、删除由后台线程自动写入数据库，这里补写元数据、等待写完并确认"""
+        if not self.pool: # 如果没有题目数据，不保存
             if not silent:
                 messagebox.showinfo("保存", "没有题库数据可供保存。")
             return
 
-        data_to_save = {
-            "all_questions": self.all_questions,
-            "unanswered_questions": self.unanswered_questions, # 直接保存列表
-            "answered_questions": self.answered_questions,   # 直接保存列表
-            "last_imported_docx": self.last_imported_docx
-        }
-        try:
-            with open(self.SAVE_FILE_NAME, "wb") as f:
-                pickle.dump(data_to_save, f)
-            if not silent:
-                messagebox.showinfo("保存成功", f"进度已保存到 {self.SAVE_FILE_NAME}")
-        except Exception as e:
+        if self.engine.save():
             if not silent:
-                messagebox.showerror("保存失败", f"保存进度时发生错误: {e}")
-            print(f"Error saving progress: {e}")
+                messagebox.showinfo("保存成功", f"进度已保存到 {self.DB_FILE_NAME}")
+        elif not silent:
+            messagebox.showerror("保存失败", "保存进度时发生错误，详情见控制台输出。")
 
     def load_progress(self):
-        if not os.path.exists(self.SAVE_FILE_NAME):
-            self.question_text_label.config(text="未找到保存的进度文件。请导入新题库。")
+        """在后台线程中打开数据库（必要时迁移旧 .pkl）并读取题库，窗口不会卡住"""
+        # 任务进行期间主线程不会访问引擎的数据库（相关按钮均已禁用）
+        self.question_text_label.config(text="正在加载进度…")
+        self.start_task("正在加载进度", self.engine.read_progress, self.on_progress_loaded, self.on_progress_load_failed)
+
+    @timed("ui.install_loaded_bank")
+    def on_progress_loaded(self, result):
+        bank, migrated = result
+        if not bank.pool:
+            self.question_text_label.config(text="未找到保存的进度。请导入新题库。")
             return
 
-        try:
-            with open(self.SAVE_FILE_NAME, "rb") as f:
-                loaded_data = pickle.load(f)
-            
-            self.all_questions = loaded_data.get("all_questions", [])
-            self.unanswered_questions = loaded_data.get("unanswered_questions", [])
-            self.answered_questions = loaded_data.get("answered_questions", [])
-            self.last_imported_docx = loaded_data.get("last_imported_docx")
-
-            if not self.all_questions:
-                 self.question_text_label.config(text="加载的进度为空。请导入新题库。")
-                 return
-
-            # 恢复UI状态
-            self.answered_listbox.delete(0, tk.END)
-            for q in self.answered_questions:
-                q_preview = f"{q.q_type} (原序 {q.original_doc_order + 1}) {q.text}"
-                self.answered_listbox.insert(tk.END, q_preview)
-            
-            self.update_stats()
-            self.clear_question_display() # 清空当前题目显示区
-            self.question_text_label.config(text=f"成功加载 {len(self.all_questions)} 道题目。请点击“随机抽题”。")
-            messagebox.showinfo("加载成功", f"已从 {self.SAVE_FILE_NAME} 加载进度。")
-
-        except Exception as e:
-            messagebox.showerror("加载失败", f"加载进度时发生错误: {e}\n可能需要重新导入题库。")
-            print(f"Error loading progress: {e}")
-            # 如果加载失败，清空数据以防万一
-            self.all_questions = []
-            self.unanswered_questions = []
-            self.answered_questions = []
-            self.update_stats()
-
-
-    def parse_questions_from_docx(self, filepath):
-        # ... (这个函数保持您上一版本中能工作的那个)
-        # 我将使用您上一条回复中修正后的 flush_buffer_to_question 逻辑
-        # print(f"--- 开始解析文档: {filepath} ---")
-        doc = docx.Document(filepath)
-        parsed_questions = []
+        self.engine.install(bank)
+        # 恢复UI状态（虚拟列表只渲染可见的几十行）
+        self.var_review_mode.set(self.engine.review_mode)
+        self.media.clear()
+        self.close_search_window() # 旧的搜索结果对应旧题库
+        self.answered_list.reset()
         
-        current_q_type = None
-        question_buffer = [] 
-        doc_line_counter = 0 
-
-        def get_question_type(line_text):
-            line_text = line_text.strip()
-            if "单选题" in line_text: return "单选题"
-            if "多选题" in line_text: return "多选题"
-            if "填空题" in line_text: return "填空题"
-            if "判断题" in line_text: return "判断题"
-            return None
-
-        def flush_buffer_to_question():
-            nonlocal question_buffer, current_q_type, doc_line_counter
-            # print(f"    尝试 flush_buffer_to_question. 当前类型: {current_q_type}, Buffer内容: {question_buffer}")
-            if not question_buffer or not current_q_type:
-                # print("      Buffer为空或当前类型未设置，清空并返回。")
-                question_buffer = [] 
-                return
-
-            if len(question_buffer) == 1:
-                # print("      Buffer中只有一个元素，尝试按换行符分割。")
-                all_lines_in_block = question_buffer[0].splitlines() 
-                if not all_lines_in_block:
-                    # print("      分割后行列表为空，清空并返回。")
-                    question_buffer = []
-                    return
-            else:
-                # print(f"      Buffer中有多个元素 ({len(question_buffer)}个)，将它们合并后按换行符分割。")
-                combined_text = "\n".join(question_buffer)
-                all_lines_in_block = combined_text.splitlines()
-            
-            # print(f"      分割后的行列表 (all_lines_in_block): {all_lines_in_block}")
+        self.update_stats()
+        self.clear_question_display() # 清空当前题目显示区
+        self.question_text_label.config(text=f"成功加载 {len(self.pool)} 道题目。请点击“随机抽题”。")
+        if migrated:
+            messagebox.showinfo("加载成功", f"已将旧进度文件 {self.SAVE_FILE_NAME} 迁移到 {self.DB_FILE_NAME}（{migrated} 道题目）。")
+        else:
+            messagebox.showinfo("加载成功", f"已从 {self.DB_FILE_NAME} 加载进度。")
 
-            answer_line_text = None
-            answer_line_index_in_block = -1 
-
-            for i, line_in_block in enumerate(all_lines_in_block):
-                if "正确答案" in line_in_block:
-                    answer_line_text = line_in_block
-                    answer_line_index_in_block = i
-                    # print(f"      在分割后的行列表中找到 '正确答案' 在索引 {i}: '{answer_line_text}'")
-                    break
-            
-            if answer_line_text is None: 
-                # print(f"      分割后的行列表中未找到 '正确答案'。行列表: {all_lines_in_block}")
-                question_buffer = [] 
-                return
-
-            question_content_lines_from_block = all_lines_in_block[:answer_line_index_in_block]
-            if not question_content_lines_from_block: 
-                # print(f"      从分割后的行列表看，题干为空。答案行: {answer_line_text}")
-                question_buffer = []
-                return
-            
-            # print(f"      准备创建Question对象。题干行(来自block): {question_content_lines_from_block[0]}, 选项行(来自block): {question_content_lines_from_block[1:]}, 答案文本: {answer_line_text}")
-            original_num_and_text = question_content_lines_from_block[0]
-            options_lines = question_content_lines_from_block[1:]
-
-            try:
-                q_obj = Question(
-                    q_type=current_q_type,
-                    original_num_text=original_num_and_text.strip(), 
-                    text="", 
-                    options_text=[opt.strip() for opt in options_lines], 
-                    answer_text=answer_line_text.strip(), 
-                    original_doc_order=doc_line_counter 
-                )
-                parsed_questions.append(q_obj)
-                doc_line_counter +=1
-                # print(f"      成功创建并添加Question对象: {q_obj}")
-            except Exception as e:
-                print(f"      创建Question对象时出错: {e} -- 内容: {question_content_lines_from_block} | 答案: {answer_line_text}")
-                import traceback
-                traceback.print_exc()
-            question_buffer = [] 
-
-        for para_idx, para in enumerate(doc.paragraphs): 
-            text = para.text.strip()
-            # print(f"\n处理文档段落 {para_idx + 1}: '{text}'") 
-
-            if not text: 
-                # print("  空行，跳过。") 
-                continue
-            
-            text = text.replace('↓', '').replace('←', '')
-            new_q_type = get_question_type(text)
-            # print(f"  识别到的新题型: {new_q_type}") 
-
-            if new_q_type:
-                # print(f"  遇到新题型 '{new_q_type}'。尝试清空旧buffer。") 
-                flush_buffer_to_question()
-                current_q_type = new_q_type
-                # print(f"  当前题型更新为: {current_q_type}") 
-            elif current_q_type: 
-                # print(f"  非题型行，当前类型为 '{current_q_type}'，将 '{text}' 加入buffer。") 
-                question_buffer.append(text)
-                if "正确答案" in text:
-                    # print(f"  当前行是 '正确答案' 行，尝试清空buffer。") 
-                    flush_buffer_to_question()
-            # else:
-                # print(f"  非题型行，且当前题型未设置 (current_q_type is None)，忽略此行: '{text}'") 
-        
-        # print("\n--- 文档段落遍历结束 ---") 
-        # print("尝试最后一次 flush_buffer_to_question (处理文档末尾可能剩余的题目)") 
-        flush_buffer_to_question()
-        
-        # print(f"--- 解析完成，共解析出 {len(parsed_questions)} 个题目 ---") 
-        # print(f"解析出的题目列表: {parsed_questions}") 
-        return parsed_questions
+    def on_progress_load_failed(self, e):
+        messagebox.showerror("加载失败", f"加载进度时发生错误: {e}\n可能需要重新导入题库。")
+        print(f"Error loading progress: {e}")
+        self.question_text_label.config(text="加载进度失败。请导入新题库。")
 
 
     def import_word_file(self):
         filepath = filedialog.askopenfilename(
-            title="选择Word题库文件",
-            filetypes=(("Word documents", "*.docx"), ("All files", "*.*"))
+            title="选择题库文件",
+            filetypes=(("题库文件", " ".join(f"*{ext}" for ext in supported_extensions())),
+                       ("Word documents", "*.docx"), ("All files", "*.*"))
         )
         if not filepath:
             return
 
         # 询问是否覆盖现有进度（如果已加载或已有题目）
-        if self.all_questions:
+        if self.pool:
             if not messagebox.askyesno("确认导入", "当前已有题库数据。导入新题库将覆盖现有数据和进度，确定吗？"):
                 return
-        
-        try:
-            self.all_questions = self.parse_questions_from_docx(filepath)
-            
-            if not self.all_questions:
+
+        def work(report):
+            questions = self.engine.parse_file(filepath, progress=report)
+            if not questions:
+                return None, []
+            questions, groups = self.engine.deduplicate(questions, report)
+            return self.engine.build_bank(questions, filepath, report), groups
+
+        def on_done(result):
+            bank, groups = result
+            if bank is None:
                 messagebox.showwarning("导入问题", "未能从文档中解析出任何题目。请检查文档格式。")
                 return
+            self.install_new_bank(bank)
+            messagebox.showinfo("成功", f"题库导入成功，共 {len(self.pool)} 道题目。{self.report_merges(groups)}")
 
-            self.last_imported_docx = filepath # 记录文件路径
-            self.unanswered_questions = list(self.all_questions) 
-            random.shuffle(self.unanswered_questions)
-            self.answered_questions = []
-            self.answered_listbox.delete(0, tk.END)
-            self.update_stats()
-            self.clear_question_display()
-            self.question_text_label.config(text=f"成功导入 {len(self.all_questions)} 道题目！请点击“随机抽题”。")
-            messagebox.showinfo("成功", f"题库导入成功，共 {len(self.all_questions)} 道题目。")
-            # 导入新题库后，也应该保存一下
-            self.save_progress(silent=True)
-
-        except Exception as e:
-            messagebox.showerror("导入错误", f"无法解析Word文件或处理题目: {e}")
+        def on_error(e):
+            messagebox.showerror("导入错误", f"无法解析题库文件或处理题目: {e}")
             print(f"导入或解析过程中发生错误: {e}") 
-            import traceback
-            traceback.print_exc() 
+
+        self.start_task(f"正在导入 {os.path.basename(filepath)}", work, on_done, on_error)
+
+    def import_word_folder(self):
+        """导入整个文件夹中的题库文件：多进程并发解析，按文件名自然顺序合并"""
+        folder = filedialog.askdirectory(title="选择包含题库文件的文件夹")
+        if not folder:
+            return
+
+        filepaths = list_bank_files(folder)
+        if not filepaths:
+            messagebox.showwarning("导入问题", f"该文件夹中没有题库文件（{' '.join(supported_extensions())}）。")
+            return
+
+        if self.pool:
+            if not messagebox.askyesno("确认导入", f"将导入 {len(filepaths)} 个文件并覆盖现有数据和进度，确定吗？"):
+                return
+
+        def work(report):
+            results = self.engine.parse_folder(filepaths, progress=report)
+            merged_questions = [q for _path, questions, _error in results for q in questions]
+            if not merged_questions:
+                return results, None, []
+            merged_questions, groups = self.engine.deduplicate(merged_questions, report)
+            return results, self.engine.build_bank(merged_questions, folder, report), groups
+
+        def on_error(e):
+            messagebox.showerror("导入错误", f"并发解析Word文件时发生错误: {e}")
+            print(f"文件夹导入过程中发生错误: {e}")
+
+        self.start_task(f"正在导入 {len(filepaths)} 个文件", work,
+                        lambda result: self.on_folder_imported(*result), on_error)
+
+    def on_folder_imported(self, results, bank, groups):
+        report_lines = []
+        failed_count = 0
+        for path, questions, error in results:
+            name = os.path.basename(path)
+            if error:
+                failed_count += 1
+                report_lines.append(f"✗ {name}: 解析失败 ({error})")
+            elif not questions:
+                report_lines.append(f"- {name}: 0 道题目（请检查格式）")
+            else:
+                report_lines.append(f"✓ {name}: {len(questions)} 道题目")
+
+        report = "\n".join(report_lines)
+        print(report)
+        if bank is None:
+            messagebox.showwarning("导入问题", f"未能从任何文档中解析出题目。\n\n{report}")
+            return
+
+        self.install_new_bank(bank)
+        summary = f"共导入 {len(results) - failed_count}/{len(results)} 个文件，{len(bank.pool)} 道题目。{self.report_merges(groups)}"
+        if len(report_lines) > 30: # 文件太多时只在对话框中显示失败项，完整清单见控制台
+            report = "\n".join(line for line in report_lines if not line.startswith("✓")) or "全部文件解析成功（明细见控制台）"
+        messagebox.showinfo("导入完成", f"{summary}\n\n{report}")
+
+    def report_merges(self, groups):
+        """把合并和答案冲突明细打印到控制台，返回给对话框用的一句摘要（都没有时为空字符串）"""
+        if not groups:
+            return ""
+        print("\n".join(describe_merges(groups)))
+        return f"\n{merge_summary(groups)}（明细见控制台）。"
+
+    def update_bank(self, silent=False):
+        """增量更新：重新解析上次导入的题库并与当前题库比对，只改动有变化的题目，保留作答进度。
+
+        silent=True 时（自动同步）不弹出对话框，结果打印到控制台。
+        """
+        source = self.engine.last_imported_docx
+        if not source or not os.path.exists(source):
+            if not silent:
+                messagebox.showwarning("更新题库", "找不到上次导入的题库文件（或文件夹），请重新导入。")
+            return
+        if self.current_task is not None:
+            return
+        # 解析前记下文件状态：解析期间文件又被保存时，下一次检查会再更新一次
+        self._watched_signature = source_signature(source)
+
+        def work(report):
+            return self.engine.prepare_update(source, progress=report)
+
+        def on_done(diff):
+            if diff is None:
+                if not silent:
+                    messagebox.showwarning("更新题库", "未能从文档中解析出任何题目，题库未改动。")
+                return
+            self.apply_bank_update(diff, source, silent)
+
+        def on_error(e):
+            print(f"更新题库时发生错误: {e}")
+            if not silent:
+                messagebox.showerror("更新题库", f"更新失败，题库未改动: {e}")
+
+        self.start_task(f"正在更新 {os.path.basename(source)}", work, on_done, on_error)
+
+    @timed("ui.apply_bank_update")
+    def apply_bank_update(self, diff, source, silent):
+        """（主线程）应用比对结果，界面上只刷新受影响的部分"""
+        displayed = self.current_question_data
+        _updated, _added, removed = self.engine.apply_update(diff, source)
+        self.media.clear() # 文件已变化，图片部件可能已被替换
+        self.answered_list.refresh()
+        if self.search_win is not None and self.search_win.winfo_exists():
+            self.refresh_search_results()
+        if any(q is displayed for q in removed):
+            self.clear_question_display()
+        self.update_stats()
+        summary = f"题库已更新：{describe_diff(diff)}。"
+        print(summary)
+        if not silent:
+            messagebox.showinfo("更新题库", summary)
+
+    def toggle_watch_source(self):
+        """开启后每隔 WATCH_INTERVAL_MS 检查一次题库文件的修改时间，有变化时在后台自动更新"""
+        if self._watch_job is not None:
+            self.master.after_cancel(self._watch_job)
+            self._watch_job = None
+        if self.var_watch_source.get():
+            source = self.engine.last_imported_docx
+            self._watched_signature = source_signature(source) if source else None
+            self._watch_job = self.master.after(self.WATCH_INTERVAL_MS, self.check_source_changed)
+
+    def check_source_changed(self):
+        self._watch_job = self.master.after(self.WATCH_INTERVAL_MS, self.check_source_changed)
+        source = self.engine.last_imported_docx
+        if not source or self.current_task is not None:
+            return
+        signature = source_signature(source)
+        if signature is not None and signature != self._watched_signature:
+            self.update_bank(silent=True)
+
+    @timed("ui.install_new_bank")
+    def install_new_bank(self, bank):
+        """（主线程）切换到新题库，并重置界面"""
+        self.engine.install(bank) # 同时记录文件路径（文件夹导入时为文件夹路径）
+        self.var_review_mode.set(self.engine.review_mode)
+        self.media.clear()
+        self.close_search_window() # 旧的搜索结果对应旧题库
+        self.answered_list.reset()
+        self.update_stats()
+        self.clear_question_display()
+        self.question_text_label.config(text=f"成功导入 {len(self.pool)} 道题目！请点击“随机抽题”。")
+        if bank.last_imported_docx: # 自动同步从新导入的文件当前的状态开始比较
+            self._watched_signature = source_signature(bank.last_imported_docx)
 
     # --- 其他方法 (update_stats, clear_question_display, display_random_question, process_answer, move_to_unanswered) ---
     # --- 保持与您上一版本能工作的代码一致 ---
+    @timed("ui.update_stats")
     def update_stats(self):
-        self.stats_label.config(text=f"未答题: {len(self.unanswered_questions)} | 已答题: {len(self.answered_questions)}")
-        self.btn_random_question.config(state=tk.NORMAL if self.unanswered_questions else tk.DISABLED)
-        self.btn_move_back.config(state=tk.NORMAL if self.answered_questions else tk.DISABLED)
+        unanswered_count = self.pool.unanswered_count
+        answered_count = self.pool.answered_count
+        mode_text = " | 复习模式" if self.engine.review_mode else ""
+        score_text = session_score_text(self.engine)
+        self.stats_label.config(text=f"未答题: {unanswered_count} | 已答题: {answered_count}{score_text}{mode_text}")
+        idle = self.current_task is None # 后台任务进行期间不允许修改题库
+        can_draw = len(self.pool) if self.engine.review_mode else unanswered_count # 复习模式下已答题也会再次出现
+        self.btn_random_question.config(state=tk.NORMAL if idle and can_draw else tk.DISABLED)
         # 如果没有题目，禁用保存按钮可能也是个好主意
-        self.btn_save_progress.config(state=tk.NORMAL if self.all_questions else tk.DISABLED)
-        self.btn_move_back.config(state=tk.NORMAL if self.answered_listbox.curselection() or self.answered_questions else tk.DISABLED)
-        self.btn_delete_selected.config(state=tk.NORMAL if self.answered_listbox.curselection() or self.answered_questions else tk.DISABLED)
+        self.btn_save_progress.config(state=tk.NORMAL if idle and self.pool else tk.DISABLED)
+        has_answered = self.answered_list.has_selection() or answered_count
+        self.btn_move_back.config(state=tk.NORMAL if idle and has_answered else tk.DISABLED)
+        self.btn_delete_selected.config(state=tk.NORMAL if idle and has_answered else tk.DISABLED)
 
 
     def clear_question_display(self):
         self.question_header_label.config(text="")
         self.question_text_label.config(text="请点击“随机抽题”或加载进度")
         self.answer_display_label.config(text="")
-        for widget in self.options_frame.winfo_children():
-            widget.destroy()
-        self.user_answer_widgets = []
+        self.option_widgets.hide_all()
+        self.show_media(None)
         self.current_question_data = None
         self.btn_show_answer.config(state=tk.DISABLED)
 
 
+    @timed("ui.display_random_question")
     def display_random_question(self):
-        if not self.unanswered_questions:
-            messagebox.showinfo("提示", "所有题目都已作答完毕！")
+        q = self.engine.draw() # 判断题答案已在引擎中规范为 A/B；复习模式下取到期最早的题
+        if q is None:
+            if self.engine.review_mode and self.pool:
+                wait = self.engine.next_review_time() - time.time()
+                messagebox.showinfo("提示", f"暂时没有到期的题目，下一道题 {format_delay(wait)}后到期。")
+            else:
+                messagebox.showinfo("提示", "所有题目都已作答完毕！")
             self.clear_question_display()
             return
         
-        # 在创建选项之前，获取一次 options_frame 的当前宽度来设置初始 wraplength
+        # 在显示新题之前先按当前宽度应用 wraplength
         # 这有助于避免初次显示时文本挤在一起然后才调整
-        current_options_frame_width = self.options_frame.winfo_width()
-        if current_options_frame_width <= 1 : # 如果宽度还未确定，给一个默认值
-            current_options_frame_width = self.question_frame.winfo_width() # 尝试用父容器估算
+        self.apply_layout()
         
-        initial_option_wraplength = max(1, current_options_frame_width - 30)
-        
-        self.current_question_data = random.choice(self.unanswered_questions)
-        q = self.current_question_data 
+        self.current_question_data = q
+        self.current_question_answered = False
 
-        # 更新题目头部和正文的字体（如果它们是在这里重新配置的）
-        self.question_header_label.config(text=f"{q.q_type} - (原序 {q.original_doc_order + 1})", font=self.QUESTION_FONT)
-        self.question_text_label.config(text=q.get_display_text(), font=self.QUESTION_FONT)
-        
-        for widget in self.options_frame.winfo_children():
-            widget.destroy()
-        self.user_answer_widgets = []
+        self.question_header_label.config(text=question_header_text(q))
+        self.question_text_label.config(text=q.get_display_text())
         self.answer_display_label.config(text="")
+        self.show_media(q)
 
+        # 复用选项组件：只改文本并清空作答，多余的组件隐藏
         if q.q_type == "填空题":
-            self.question_text_label.config(text=q.get_display_text())
-            num_blanks = len(q.answer) if q.answer else 0
-            if num_blanks == 0 and "___" in q.text:
-                 num_blanks = q.text.count("___")
-            if num_blanks == 0 and q.answer and q.answer[0] == q.answer_raw.replace("正确答案", "").strip("：: ").strip():
-                 num_blanks = 1
-            if num_blanks == 0 and not q.answer: # 真正没有答案解析出来
-                 num_blanks = 1 #至少给一个空
-
-            if num_blanks > 0:
-                for i in range(num_blanks):
-                    entry_label = tk.Label(self.options_frame, text=f"填空 {i+1}:", font=self.OPTION_FONT)
-                    entry_label.pack(side=tk.LEFT, padx=(0,5))
-                    entry = tk.Entry(self.options_frame, width=20, font=self.OPTION_FONT)
-                    entry.pack(side=tk.LEFT, padx=(0,10))
-                    self.user_answer_widgets.append(entry)
-            else: # 理论上至少有一个空
-                 tk.Label(self.options_frame, text="(请直接思考答案)").pack(anchor='w')
-
-
+            self.option_widgets.show_blanks(blank_count(q)) # 至少给一个空
         elif q.q_type in ["单选题", "判断题"]:
-            self.question_text_label.config(text=q.get_display_text())
-            self.var_choice = tk.StringVar(value=None)
-            options_to_display = q.options
-            if q.q_type == "判断题": 
-                options_to_display = {"A": "是 (正确)", "B": "否 (错误)"} 
-                # 再次确保判断题答案与选项一致性
-                if q.answer not in ["A", "B"]: # 如果解析的答案仍然不是A或B
-                    cleaned_ans_text = q.answer_raw.replace("正确答案", "").strip("：: ").upper()
-                    if "A" in cleaned_ans_text or "是" in cleaned_ans_text or "正确" in cleaned_ans_text: q.answer = "A"
-                    elif "B" in cleaned_ans_text or "否" in cleaned_ans_text or "错误" in cleaned_ans_text: q.answer = "B"
-                    else: q.answer = None # 无法确定
-
-
-            for letter, opt_text in options_to_display.items():
-                rb = tk.Radiobutton(self.options_frame, text=f"{letter}. {opt_text}", 
-                                    variable=self.var_choice, value=letter, 
-                                    wraplength=initial_option_wraplength, justify=tk.LEFT, 
-                                    font=self.OPTION_FONT) # <--- 修改字体
-                # rb = tk.Radiobutton(self.options_frame, text=f"{letter}. {opt_text}", variable=self.var_choice, value=letter, wraplength=700, justify=tk.LEFT)
-                rb.pack(anchor="w")
-                self.user_answer_widgets.append(rb) 
-
+            self.option_widgets.show_choices(display_options(q))
         elif q.q_type == "多选题":
-            self.question_text_label.config(text=q.get_display_text())
-            self.vars_multi_choice = {}
-            for letter, opt_text in q.options.items():
-                var = tk.BooleanVar()
-                cb = tk.Checkbutton(self.options_frame, text=f"{letter}. {opt_text}", 
-                                     variable=var, wraplength=initial_option_wraplength, 
-                                     justify=tk.LEFT, 
-                                     font=self.OPTION_FONT)
-                # cb = tk.Checkbutton(self.options_frame, text=f"{letter}. {opt_text}", variable=var, wraplength=700, justify=tk.LEFT)
-                cb.pack(anchor="w")
-                self.vars_multi_choice[letter] = var
-                self.user_answer_widgets.append(cb)
-
+            self.option_widgets.show_multi(q.options)
         else: 
-            self.question_text_label.config(text=q.get_display_text())
-            tk.Label(self.options_frame, text="(未知题型，请直接思考答案)").pack(anchor='w')
+            self.option_widgets.show_hint("(未知题型，请直接思考答案)")
 
         self.btn_show_answer.config(state=tk.NORMAL)
 
 
+    def show_media(self, q):
+        """在题干下方显示题目中的图片和表格（图片从 LRU 缓存中取，必要时才解码），并预取下一道题的图片"""
+        for widget in self.media_frame.winfo_children():
+            widget.destroy()
+        self.media_frame.images = []
+        if q is None or not q.media:
+            self.media_frame.pack_forget()
+        else:
+            source = self.engine.media_source(q)
+            max_width = max(1, self._question_wraplength or self.question_frame.winfo_width())
+            for i, (kind, ref) in enumerate(q.media, 1):
+                if kind == "table":
+                    widget = self.table_widget(table_rows(ref))
+                else:
+                    image = self.media.photo_image(source, ref, max_width) if source else None
+                    if image is not None:
+                        self.media_frame.images.append(image)
+                        widget = tk.Label(self.media_frame, image=image)
+                    else:
+                        widget = tk.Label(self.media_frame, text=f"[图{i}]（无法显示 {os.path.basename(ref)}）",
+                                          font=self.OPTION_FONT, fg="gray")
+                widget.pack(anchor="w", pady=2)
+            self.media_frame.pack(anchor="w", fill=tk.X, pady=5, before=self.options_frame)
+        if q is not None:
+            next_q = self.engine.peek_next()
+            if next_q is not None and next_q.media:
+                self.media.prefetch(self.engine.media_source(next_q),
+                                    [ref for kind, ref in next_q.media if kind == "image"])
+
+    def table_widget(self, rows):
+        """把表格显示为带边框的 Label 网格"""
+        table = tk.Frame(self.media_frame)
+        for r, row in enumerate(rows):
+            for c, cell in enumerate(row):
+                tk.Label(table, text=cell, font=self.OPTION_FONT, relief=tk.SOLID, borderwidth=1,
+                         justify=tk.LEFT, anchor="w", padx=4).grid(row=r, column=c, sticky="nsew")
+        return table
+
+    @timed("ui.process_answer")
     def process_answer(self):
-        if not self.current_question_data:
+        if not self.current_question_data or self.current_question_answered:
             return
+        self.current_question_answered = True
 
         q_being_processed = self.current_question_data # 使用一个明确的变量名
-        correct_answer_str = ""
-        user_answer_str = ""
+        response = self.option_widgets.response()
+        grade = self.engine.grade(q_being_processed, response)
+        answer_lines = [describe_grade(grade), *describe_answer(q_being_processed, response)]
         
-        # --- 构建 correct_answer_str 和 user_answer_str (这部分逻辑保持不变) ---
-        if q_being_processed.q_type == "单选题":
-            correct_answer_str = f"正确答案: {q_being_processed.answer or '未提供'}. {q_being_processed.options.get(q_being_processed.answer, '') if q_being_processed.answer else ''}"
-            user_answer_val = self.var_choice.get()
-            user_answer_str = f"您的选择: {user_answer_val or '未选择'}. {q_being_processed.options.get(user_answer_val, '') if user_answer_val else ''}"
-        
-        elif q_being_processed.q_type == "多选题":
-            ans_list = q_being_processed.answer if isinstance(q_being_processed.answer, list) else []
-            sorted_ans = sorted(ans_list)
-            correct_answer_str = f"正确答案: {''.join(sorted_ans) or '未提供'}\n"
-            for ans_letter in sorted_ans:
-                 correct_answer_str += f"  {ans_letter}. {q_being_processed.options.get(ans_letter, '')}\n"
-            
-            user_choices = sorted([letter for letter, var in self.vars_multi_choice.items() if var.get()])
-            user_answer_str = f"您的选择: {''.join(user_choices) or '未选择'}\n"
-            for choice_letter in user_choices:
-                 user_answer_str += f"  {choice_letter}. {q_being_processed.options.get(choice_letter, '')}\n"
-
-        elif q_being_processed.q_type == "判断题":
-            display_options = {"A": "是 (正确)", "B": "否 (错误)"}
-            correct_answer_str = f"正确答案: {q_being_processed.answer or '未提供'}. {display_options.get(q_being_processed.answer, '(答案解析可能不匹配)') if q_being_processed.answer else ''}"
-            user_answer_val = self.var_choice.get()
-            user_answer_str = f"您的选择: {user_answer_val or '未选择'}. {display_options.get(user_answer_val, '') if user_answer_val else ''}"
-
-        elif q_being_processed.q_type == "填空题":
-            ans_list = q_being_processed.answer if isinstance(q_being_processed.answer, list) else []
-            correct_answer_str = f"正确答案: {' | '.join(ans_list or ['未提供'])}"
-            user_fills = [widget.get() for widget in self.user_answer_widgets if isinstance(widget, tk.Entry)]
-            user_answer_str = f"您的填写: {' | '.join(user_fills) or '未填写'}"
-        else:
-            correct_answer_str = "正确答案: (未知题型)"
-            user_answer_str = "您的作答: (未知题型)"
-        # --- 结束构建答案字符串 ---
-
-        self.answer_display_label.config(text=f"{user_answer_str}\n{correct_answer_str}")
-        
-        if q_being_processed in self.unanswered_questions: 
-            self.unanswered_questions.remove(q_being_processed)
-            
-            # --- 修改核心：将新完成的题目插入到开头 ---
-            self.answered_questions.insert(0, q_being_processed) # 插入到数据列表的开头
-            
-            q_preview = f"{q_being_processed.q_type} (原序 {q_being_processed.original_doc_order + 1}) {q_being_processed.text}"
-            self.answered_listbox.insert(0, q_preview) # 插入到 Listbox 显示的开头
-            # --- 核心修改结束 ---
+        if self.engine.submit(q_being_processed, grade.correct, grade.score, response): # O(1)：从未答数组交换删除，成为最新的已答题，并交给后台写入
+            self.answered_list.refresh() # 新题出现在列表顶部
+        if self.engine.review_mode:
+            answer_lines.append(describe_review(self.engine.review_state(q_being_processed), time.time()))
+        self.answer_display_label.config(text="\n".join(answer_lines))
             
         self.update_stats()
         self.btn_show_answer.config(state=tk.DISABLED) 
 
+    def toggle_review_mode(self):
+        self.engine.set_review_mode(self.var_review_mode.get())
+        self.clear_question_display()
+        self.update_stats()
 
+    @timed("ui.move_to_unanswered")
     def move_to_unanswered(self):
-        selected_indices = self.answered_listbox.curselection()
-        if not selected_indices:
+        selected_ids = self.answered_list.selected_ids()
+        if not selected_ids:
             messagebox.showwarning("提示", "请先在“已答题目列表”中选择要移回的题目。")
             return
 
-        moved_count = 0
-        # 从后往前删，避免索引问题
-        for i in sorted(selected_indices, reverse=True):
-            try:
-                question_to_move = self.answered_questions.pop(i) 
-                self.unanswered_questions.append(question_to_move)
-                self.answered_listbox.delete(i) 
-                moved_count +=1
-            except IndexError:
-                print(f"移回题目时索引错误: {i}") 
-
-        if moved_count > 0:
-            random.shuffle(self.unanswered_questions) 
+        moved_questions = self.engine.move_back(selected_ids)
+        self.answered_list.refresh()
+
+        if moved_questions:
             self.update_stats()
-            messagebox.showinfo("成功", f"成功将 {moved_count} 道题目移回未答列表。")
+            messagebox.showinfo("成功", f"成功将 {len(moved_questions)} 道题目移回未答列表。")
 
 
 # --- Main ---
@@ -0,0 +1,183 @@
+"""终端刷题模式：不导入 tkinter，可以在服务器上或通过 SSH 使用。
+
+与图形界面共用同一个数据库（quiz_progress.db），进度互通。
+
+    python quiz_cli.py                       # 继续刷题
+    python quiz_cli.py --import 题库.docx     # 导入新题库（覆盖现有进度；也支持 .txt .md .csv .json .jsonl）
+    python quiz_cli.py --import-folder 题库/  # 导入文件夹中的全部题库文件
+    python quiz_cli.py --update              # 题库文件修改后增量更新，保留作答进度
+    python quiz_cli.py --stats               # 只显示统计
+"""
+import argparse
+import os
+import sys
+import time
+
+from bank_diff import describe_diff
+from quiz_engine import (QuizEngine, answered_preview_text, blank_count, describe_answer, describe_grade,
+                         describe_history_report, describe_merges, describe_review, display_options, format_delay,
+                         merge_summary, question_header_text, session_score_text)
+
+
+def read_response(q, prompt=input):
+    """按题型读取作答；输入 q 退出、s 跳过时返回 "quit" / "skip" 作为第一个值"""
+    if q.q_type == "填空题":
+        fills = []
+        for i in range(blank_count(q)):
+            text = prompt(f"填空 {i+1}: ").strip()
+            if text.lower() in ("q", "s") and not fills:
+                return {"q": "quit", "s": "skip"}[text.lower()], None
+            fills.append(text)
+        return None, fills
+
+    text = prompt("作答 (字母，q 退出，s 跳过): ").strip()
+    if text.lower() in ("q", "s"):
+        return {"q": "quit", "s": "skip"}[text.lower()], None
+    letters = [c for c in text.upper() if c.isalpha()]
+    if q.q_type == "多选题":
+        return None, sorted(set(letters))
+    if q.q_type in ["单选题", "判断题"]:
+        return None, letters[0] if letters else None
+    return None, None
+
+
+def print_question(q, out=sys.stdout):
+    print(f"\n{question_header_text(q)}", file=out)
+    print(q.get_display_text(), file=out)
+    for letter, opt_text in display_options(q).items():
+        print(f"  {letter}. {opt_text}", file=out)
+
+
+def print_stats(engine, out=sys.stdout):
+    mode_text = " | 复习模式" if engine.review_mode else ""
+    print(f"未答题: {engine.unanswered_count} | 已答题: {engine.answered_count}{session_score_text(engine)}{mode_text}",
+          file=out)
+
+
+def print_merges(groups, out=sys.stdout):
+    if groups:
+        print(f"{merge_summary(groups)}：", file=out)
+        for line in describe_merges(groups):
+            print(line, file=out)
+
+
+def drill(engine, count=None, prompt=input, out=sys.stdout):
+    """循环抽题作答，直到没有未答题、答满 count 道或用户退出；返回本次作答的题数"""
+    answered = 0
+    while count is None or answered < count:
+        q = engine.draw()
+        if q is None:
+            if engine.review_mode and len(engine):
+                wait = engine.next_review_time() - time.time()
+                print(f"暂时没有到期的题目，下一道题 {format_delay(wait)}后到期。", file=out)
+            else:
+                print("所有题目都已作答完毕！", file=out)
+            break
+        print_question(q, out)
+        try:
+            command, response = read_response(q, prompt)
+        except EOFError:
+            break
+        if command == "quit":
+            break
+        if command == "skip":
+            continue
+        grade = engine.grade(q, response)
+        user_answer_str, correct_answer_str = describe_answer(q, response)
+        print(f"{describe_grade(grade)}\n{user_answer_str}\n{correct_answer_str}", file=out)
+        if engine.submit(q, grade.correct, grade.score, response):
+            answered += 1
+        if engine.review_mode:
+            print(describe_review(engine.review_state(q), time.time()), file=out)
+    return answered
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="灵感菇 终端刷题模式")
+    parser.add_argument("--db", default=QuizEngine.DB_FILE_NAME, help="题库与进度数据库路径")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--import", dest="import_file", metavar="FILE",
+                       help="导入题库文件：.docx .txt .md .csv .json .jsonl（覆盖现有进度）")
+    group.add_argument("--import-folder", metavar="DIR", help="导入文件夹中的全部题库文件（覆盖现有进度）")
+    group.add_argument("--update", nargs="?", const="", metavar="PATH",
+                       help="重新读取上次导入的题库（或 PATH），只更新有变化的题目，保留作答进度")
+    parser.add_argument("--no-dedup", dest="dedup", action="store_false", help="导入时不合并近似重复的题目")
+    parser.add_argument("-n", "--count", type=int, default=None, help="本次最多作答的题数")
+    parser.add_argument("--stats", action="store_true", help="只显示统计后退出")
+    parser.add_argument("--search", metavar="QUERY", help="全文检索题干/选项/答案，列出结果后退出")
+    parser.add_argument("--history", action="store_true", help="统计作答记录（正确率、最常答错和用时最长的题目、每日作答量）后退出")
+    parser.add_argument("--review", action=argparse.BooleanOptionalAction, default=None,
+                        help="开启/关闭复习模式（间隔重复，按到期时间出题），会保存为默认设置")
+    parser.add_argument("--profile", nargs="?", const="1", metavar="MODES",
+                        help="开启性能埋点（timing,latency,memory,cprofile 或 all），退出时输出汇总；见 instrumentation.py")
+    args = parser.parse_args(argv)
+
+    engine = QuizEngine(db_path=args.db)
+    try:
+        migrated = engine.load()
+        if migrated:
+            print(f"已将旧进度文件 {engine.legacy_pkl_path} 迁移到 {engine.db_path}（{migrated} 道题目）。")
+
+        if args.import_file:
+            try:
+                imported, groups = engine.import_file(args.import_file, dedup=args.dedup)
+            except ValueError as e: # 不支持的格式
+                print(e, file=sys.stderr)
+                return 1
+            if not imported:
+                print("未能从文档中解析出任何题目。请检查文档格式。", file=sys.stderr)
+                return 1
+            print_merges(groups)
+            print(f"题库导入成功，共 {imported} 道题目。")
+        elif args.import_folder:
+            results, groups = engine.import_folder(args.import_folder, dedup=args.dedup)
+            for path, questions, error in results:
+                name = os.path.basename(path)
+                if error:
+                    print(f"✗ {name}: 解析失败 ({error})")
+                else:
+                    print(f"✓ {name}: {len(questions)} 道题目")
+            if not any(questions for _path, questions, _error in results):
+                print("未能从任何文档中解析出题目。", file=sys.stderr)
+                return 1
+            print_merges(groups)
+        elif args.update is not None:
+            try:
+                diff = engine.prepare_update(args.update or None, dedup=args.dedup)
+            except (OSError, ValueError) as e:
+                print(f"更新失败，题库未改动: {e}", file=sys.stderr)
+                return 1
+            if diff is None:
+                print("未能从文档中解析出任何题目，题库未改动。", file=sys.stderr)
+                return 1
+            engine.apply_update(diff, args.update or None)
+            print(f"题库已更新：{describe_diff(diff)}。")
+
+        if args.review is not None:
+            engine.set_review_mode(args.review)
+
+        if not len(engine):
+            print("未找到保存的进度。请先用 --import 导入题库。", file=sys.stderr)
+            return 1
+        if args.search:
+            for q in engine.search(args.search):
+                state = "已答" if engine.pool.is_answered(q) else "未答"
+                print(f"[{state}] {answered_preview_text(q)}")
+            return 0
+        if args.history:
+            print("\n".join(describe_history_report(engine.history_report(), engine.pool.get)))
+            return 0
+        print_stats(engine)
+        if args.stats:
+            return 0
+        answered = drill(engine, args.count)
+        print(f"\n本次作答 {answered} 道。", end=" ")
+        print_stats(engine)
+        engine.save()
+        return 0
+    finally:
+        engine.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
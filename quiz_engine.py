@@ -0,0 +1,691 @@
+"""不依赖 tkinter 的刷题核心：题库、抽题、作答、移回、删除和持久化。
+
+Tk 界面 (quiz_bank.QuizApp) 和终端模式 (quiz_cli) 都只是它的外壳，
+这里的每个操作都可以直接在脚本或基准测试中调用。
+"""
+import os
+import sqlite3
+import time
+from collections import namedtuple
+
+from question_parser import RECORD_FIELDS, iter_questions_from_docx, parse_bank_files_parallel
+from importers import list_bank_files
+from progress_store import open_store
+from autosave import BackgroundWriter
+from answer_history import AnswerHistory, empty_columns, summarize
+from parse_cache import ParseCache, load_questions_cached
+from question_pool import QuestionPool
+from near_duplicates import deduplicate
+from bank_diff import POSITION_FIELDS, diff_banks
+from grading import answer_key, grade_response
+from review_scheduler import ReviewScheduler
+from search_index import INDEX_VERSION, SearchIndex
+from instrumentation import timed
+
+JUDGE_OPTIONS = {"A": "是 (正确)", "B": "否 (错误)"} # 判断题统一显示的选项
+
+# 后台读取/导入得到的完整题库，由 QuizEngine.install() 在主线程中一次性切换
+Bank = namedtuple("Bank", "pool search_index last_imported_docx")
+
+
+def cleaned_answer_text(q):
+    return q.answer_raw.replace("正确答案", "").strip("：: ").strip()
+
+
+def display_options(q):
+    """题目实际显示的选项：判断题固定为 是/否，其余题型用解析出的选项"""
+    return JUDGE_OPTIONS if q.q_type == "判断题" else q.options
+
+
+def normalize_judge_answer(q):
+    """再次确保判断题答案与选项一致性（解析出的答案不是 A/B 时按原文重新判断）"""
+    if q.q_type != "判断题" or q.answer in ["A", "B"]:
+        return
+    cleaned_ans_text = q.answer_raw.replace("正确答案", "").strip("：: ").upper()
+    if "A" in cleaned_ans_text or "是" in cleaned_ans_text or "正确" in cleaned_ans_text: q.answer = "A"
+    elif "B" in cleaned_ans_text or "否" in cleaned_ans_text or "错误" in cleaned_ans_text: q.answer = "B"
+    else: q.answer = None # 无法确定
+
+
+def blank_count(q):
+    """填空题需要显示的空格数，至少为 1"""
+    num_blanks = len(q.answer) if q.answer else 0
+    if num_blanks == 0 and "___" in q.text:
+        num_blanks = q.text.count("___")
+    if num_blanks == 0 and q.answer and q.answer[0] == cleaned_answer_text(q):
+        num_blanks = 1
+    return max(num_blanks, 1)
+
+
+def question_header_text(q):
+    header_text = f"{q.q_type} - (原序 {q.original_doc_order + 1})"
+    if q.source_file:
+        header_text += f" [{q.source_file}]"
+    return header_text
+
+
+def answered_preview_text(q):
+    """已答列表中一行的显示文本"""
+    source = f"[{q.source_file}] " if q.source_file else ""
+    return f"{q.q_type} (原序 {q.original_doc_order + 1}) {source}{q.text}"
+
+
+def describe_answer(q, response):
+    """返回 (您的作答文本, 正确答案文本)。
+
+    response：单选题/判断题为选项字母（或 None），多选题为字母的可迭代对象，填空题为各空内容的列表。
+    """
+    if q.q_type == "单选题":
+        correct_answer_str = f"正确答案: {q.answer or '未提供'}. {q.options.get(q.answer, '') if q.answer else ''}"
+        user_answer_str = f"您的选择: {response or '未选择'}. {q.options.get(response, '') if response else ''}"
+
+    elif q.q_type == "多选题":
+        ans_list = q.answer if isinstance(q.answer, list) else []
+        sorted_ans = sorted(ans_list)
+        correct_answer_str = f"正确答案: {''.join(sorted_ans) or '未提供'}\n"
+        for ans_letter in sorted_ans:
+            correct_answer_str += f"  {ans_letter}. {q.options.get(ans_letter, '')}\n"
+
+        user_choices = sorted(response or [])
+        user_answer_str = f"您的选择: {''.join(user_choices) or '未选择'}\n"
+        for choice_letter in user_choices:
+            user_answer_str += f"  {choice_letter}. {q.options.get(choice_letter, '')}\n"
+
+    elif q.q_type == "判断题":
+        correct_answer_str = f"正确答案: {q.answer or '未提供'}. {JUDGE_OPTIONS.get(q.answer, '(答案解析可能不匹配)') if q.answer else ''}"
+        user_answer_str = f"您的选择: {response or '未选择'}. {JUDGE_OPTIONS.get(response, '') if response else ''}"
+
+    elif q.q_type == "填空题":
+        ans_list = q.answer if isinstance(q.answer, list) else []
+        correct_answer_str = f"正确答案: {' | '.join(ans_list or ['未提供'])}"
+        user_answer_str = f"您的填写: {' | '.join(response or []) or '未填写'}"
+    else:
+        correct_answer_str = "正确答案: (未知题型)"
+        user_answer_str = "您的作答: (未知题型)"
+    return user_answer_str, correct_answer_str
+
+
+def is_correct(q, response):
+    """自动判分：答对 True，答错（含多选题部分正确）False；题目没有解析出答案或题型未知时返回 None。详见 grading"""
+    return grade_response(answer_key(q), response).correct
+
+
+def describe_grade(grade):
+    """作答后显示的判分结果，例如“✓ 回答正确”"""
+    if grade.correct is None:
+        return "（无法自动判分）"
+    if grade.correct:
+        return "✓ 回答正确"
+    if grade.score > 0:
+        return f"◐ 部分正确（得 {round(grade.score, 2):g} 分）"
+    return "✗ 回答错误"
+
+
+def session_score_text(engine):
+    """统计栏中的本次得分，例如“ | 本次得分: 7.5/10”；还没有判分过时为空字符串"""
+    if not engine.session_graded:
+        return ""
+    return f" | 本次得分: {round(engine.session_score, 2):g}/{engine.session_graded}"
+
+
+def format_delay(seconds):
+    """把秒数写成“N 分钟 / N 小时 / N 天”"""
+    seconds = max(0, seconds)
+    if seconds < 3600:
+        return f"{max(1, round(seconds / 60))} 分钟"
+    if seconds < 24 * 3600:
+        return f"{round(seconds / 3600)} 小时"
+    return f"{round(seconds / (24 * 3600))} 天"
+
+
+def describe_review(state, now):
+    """复习模式下作答后的提示，例如“3 天后复习（第 3 盒）”"""
+    return f"{format_delay(state.due - now)}后复习（第 {state.box} 盒）"
+
+
+def describe_merges(groups):
+    """近似重复题合并报告的各行：每组一行保留的题目，下面缩进列出被合并的题目和答案冲突的题目"""
+    lines = []
+    for canonical, duplicates, conflicts in groups:
+        lines.append(f"保留 {answered_preview_text(canonical)}")
+        lines.extend(f"    合并 {answered_preview_text(q)}" for q in duplicates)
+        lines.extend(f"    答案不同，未合并 {answered_preview_text(q)}" for q in conflicts)
+    return lines
+
+
+def merge_summary(groups):
+    """合并报告的一句摘要，例如“已合并 3 道近似重复的题目（2 组），1 道题题干相似但答案不同，未合并”"""
+    merged = sum(len(group.duplicates) for group in groups)
+    conflicting = sum(len(group.conflicts) for group in groups)
+    parts = []
+    if merged:
+        parts.append(f"已合并 {merged} 道近似重复的题目（{sum(1 for group in groups if group.duplicates)} 组）")
+    if conflicting:
+        parts.append(f"{conflicting} 道题题干相似但答案不同，未合并")
+    return "，".join(parts)
+
+
+def describe_history_report(report, lookup):
+    """作答记录统计（answer_history.HistoryReport）的各行；lookup(qid) 返回题目，已删除的题目返回 None"""
+    def question_text(qid):
+        q = lookup(qid)
+        return answered_preview_text(q) if q is not None else f"（已删除的题目 #{qid}）"
+
+    if not report.attempts:
+        return ["还没有作答记录。"]
+    lines = [f"共 {report.attempts} 次作答，{len(report.daily)} 天", "", "各题型正确率:"]
+    lines.extend(f"  {q_type}: {accuracy:.0%}（{correct}/{n}）" for q_type, n, correct, accuracy in report.by_type)
+    lines += ["", "最常答错:"]
+    lines.extend(f"  错 {missed}/{n} 次  {question_text(qid)}" for qid, missed, n in report.most_missed)
+    lines += ["", "平均用时最长:"]
+    lines.extend(f"  {seconds:.0f} 秒（{n} 次）  {question_text(qid)}" for qid, seconds, n in report.slowest)
+    lines += ["", "每日作答量:"]
+    lines.extend(f"  {day}: {n}" for day, n in report.daily[-30:])
+    return lines
+
+
+def describe_question(q):
+    """题目预览的完整文本（题型、原序号、题干、选项和正确答案）"""
+    content = []
+    content.append(f"题型: {q.q_type}")
+    content.append(f"原序号: {q.original_doc_order + 1}")
+    if q.source_file:
+        content.append(f"来源文件: {q.source_file}")
+    content.append("-" * 30)
+    content.append(f"题目:\n{q.get_display_text()}\n") # get_display_text 包含原始序号和题干
+
+    if q.q_type in ["单选题", "多选题"]:
+        content.append("选项:")
+        for letter, opt_text in sorted(q.options.items()):
+            content.append(f"  {letter}. {opt_text}")
+        content.append("\n")
+    elif q.q_type == "判断题":
+        content.append("选项:\n  A. 是 (正确)\n  B. 否 (错误)\n")
+
+    content.append("正确答案:")
+    if q.q_type == "单选题":
+        correct_ans_display = f"{q.answer}. {q.options.get(q.answer, '')}"
+    elif q.q_type == "多选题":
+        ans_list = q.answer if isinstance(q.answer, list) else []
+        correct_ans_display = "".join(sorted(ans_list))
+        for letter in sorted(ans_list):
+            correct_ans_display += f"\n  {letter}. {q.options.get(letter, '')}"
+    elif q.q_type == "判断题":
+        correct_ans_display = f"{q.answer}. {JUDGE_OPTIONS.get(q.answer, '')}"
+    elif q.q_type == "填空题":
+        ans_list = q.answer if isinstance(q.answer, list) else []
+        correct_ans_display = " | ".join(ans_list)
+    else:
+        correct_ans_display = str(q.answer_raw) # Fallback
+
+    content.append(correct_ans_display)
+    return "\n".join(content)
+
+
+class QuizEngine:
+    DB_FILE_NAME = "quiz_progress.db" # 题库与进度数据库
+    SAVE_FILE_NAME = "quiz_progress.pkl" # 旧版进度文件，仅在首次启动时自动迁移到数据库
+    CACHE_DIR_NAME = "quiz_parse_cache" # Word 解析结果缓存目录（按文件内容哈希）
+    HISTORY_SUFFIX = ".history" # 作答记录与数据库同名：quiz_progress.history
+
+    def __init__(self, db_path=DB_FILE_NAME, legacy_pkl_path=SAVE_FILE_NAME, cache_dir=CACHE_DIR_NAME, autosave=True,
+                 history_path=None):
+        self.db_path = db_path
+        if history_path is None and db_path:
+            history_path = os.path.splitext(db_path)[0] + self.HISTORY_SUFFIX
+        self.history = AnswerHistory(history_path) if history_path else None # 每次作答的记录（见 answer_history）
+        self.legacy_pkl_path = legacy_pkl_path
+        self.cache_dir = cache_dir
+        self.parse_cache = ParseCache(cache_dir) if cache_dir else None
+        self.store = None # ProgressStore，在 open_store / load 中打开
+        self.autosave = autosave # True 时作答等变化由后台线程合并写入（见 autosave），否则立即同步写入
+        self.writer = None # BackgroundWriter，随 store 一起打开
+        self.pool = QuestionPool() # 全部题目及其未答/已答状态
+        self.search_index = SearchIndex() # 题干/选项/答案的全文检索
+        self.last_imported_docx = None # 最后导入的docx路径（文件夹导入时为文件夹路径）
+        self.current_question = None
+        self.drawn_at = None # 当前题目抽出的时间（time.monotonic），用于计算作答用时
+        self.next_pick = None # peek_next 预先选好的下一道题，下次 draw 时优先使用
+        self.review_mode = False # 间隔重复模式：按到期时间出题，答过的题按对错重新排期
+        self.scheduler = None # ReviewScheduler，复习模式下首次抽题时才建立
+        self.answer_keys = {} # qid -> 规范化答案（grading.AnswerKey），首次判分时计算
+        self.session_score = 0.0 # 本次（切换题库以来）作答的总得分
+        self.session_graded = 0  # 本次作答并自动判分的题数
+
+    # --- 统计 ---
+    @property
+    def unanswered_count(self):
+        return self.pool.unanswered_count
+
+    @property
+    def answered_count(self):
+        return self.pool.answered_count
+
+    def __len__(self):
+        return len(self.pool)
+
+    # --- 持久化 ---
+    def persist(self, action, *args):
+        """把一次状态变化写入数据库（store 的方法名和参数）。
+
+        开启 autosave 时只是交给后台写入线程，立即返回 True；否则同步写入一个很小的事务。
+        """
+        if self.store is None:
+            return False
+        if self.writer is not None:
+            self.writer.submit(action, args)
+            return True
+        try:
+            getattr(self.store, action)(*args)
+            return True
+        except sqlite3.Error as e:
+            print(f"Error persisting {action}: {e}")
+            return False
+
+    def open_store(self, progress=None):
+        """打开数据库（必要时迁移旧 .pkl），返回迁移的题目数或 None。已打开时直接返回 None"""
+        if self.store is not None:
+            return None
+        self.store, migrated = open_store(self.db_path, self.legacy_pkl_path, progress=progress)
+        if self.autosave:
+            self.writer = BackgroundWriter(self.store, also_flush=[self.history.flush] if self.history is not None else ())
+            self.writer.start()
+        return migrated
+
+    def flush(self):
+        """等后台写入线程把已记下的变化写完；全部成功（或没有开启 autosave）时返回 True。
+
+        直接调用 store 修改数据库之前必须先 flush，保证写入顺序与内存中的操作顺序一致。
+        """
+        if self.writer is not None:
+            return self.writer.flush()
+        return self.history.flush() if self.history is not None else True
+
+    @timed("engine.load")
+    def read_progress(self, progress=None):
+        """读取数据库中的题库，返回 (Bank, 迁移的题目数)。
+
+        不修改当前题库，可在后台线程中调用；结果用 install() 切换。
+        """
+        migrated = self.open_store(progress)
+        self.flush()
+        all_questions, _unanswered, answered_questions, last_imported_docx = self.store.load(progress=progress)
+        pool = QuestionPool()
+        pool.load(all_questions, answered_questions)
+        return Bank(pool, self.read_search_index(all_questions, progress), last_imported_docx), migrated
+
+    def read_search_index(self, questions, progress=None):
+        """读取保存的检索索引；没有（或版本过旧）时重新建立并保存"""
+        try:
+            rows = self.store.load_search_index(INDEX_VERSION)
+        except sqlite3.Error as e:
+            print(f"Error loading search index: {e}")
+            rows = None
+        if rows is not None:
+            return SearchIndex.from_rows(rows)
+        index = SearchIndex.build(questions, progress)
+        if questions:
+            self.persist("replace_search_index", index.to_rows(), INDEX_VERSION)
+        return index
+
+    def install(self, bank):
+        """切换到新的题库（由 read_progress / build_bank 得到）"""
+        self.pool = bank.pool
+        self.search_index = bank.search_index
+        self.last_imported_docx = bank.last_imported_docx
+        self.current_question = None
+        self.next_pick = None
+        self.scheduler = None # 题目编号可能已变，复习队列按需重建
+        self.answer_keys = {}
+        self.session_score = 0.0
+        self.session_graded = 0
+        if self.store is not None:
+            self.review_mode = self.store.get_meta("review_mode") == "1"
+
+    def load(self, progress=None):
+        """同步读取并切换到数据库中的题库，返回迁移的题目数或 None"""
+        bank, migrated = self.read_progress(progress)
+        self.install(bank)
+        return migrated
+
+    @timed("engine.save_meta")
+    def save(self):
+        """补写元数据，并等待作答、移回、删除等变化全部写入数据库"""
+        return self.persist("set_meta", "last_imported_docx", self.last_imported_docx) and self.flush()
+
+    def set_review_mode(self, enabled):
+        """切换间隔重复模式（保存在数据库中，下次启动沿用）"""
+        self.review_mode = bool(enabled)
+        self.persist("set_meta", "review_mode", "1" if self.review_mode else "0")
+
+    def review_scheduler(self):
+        """当前题库的复习队列；第一次调用时从数据库读取复习状态并一次性建堆"""
+        if self.scheduler is None:
+            rows = []
+            if self.store is not None:
+                try:
+                    self.flush()
+                    rows = self.store.load_review()
+                except sqlite3.Error as e:
+                    print(f"Error loading review state: {e}")
+            self.scheduler = ReviewScheduler()
+            self.scheduler.load([q.qid for q in self.pool.all_questions()], rows)
+        return self.scheduler
+
+    def close(self):
+        """写完后台队列中的变化（必要时做一次备份）后关闭数据库"""
+        if self.writer is not None:
+            self.writer.stop()
+            self.writer = None
+        elif self.history is not None:
+            self.history.flush()
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+    # --- 导入 ---
+    @timed("engine.parse_file")
+    def parse_file(self, filepath, streaming=True, progress=None):
+        """解析题库文件（Word、txt、md、csv、json，见 importers），返回 Question 列表。
+
+        Word 题库默认先按文件内容哈希查解析缓存，未命中时流式读取 word/document.xml
+        （不构建完整的 docx.Document）；streaming=False 时使用 python-docx 旧路径且不走缓存。
+        """
+        if not streaming:
+            return list(iter_questions_from_docx(filepath, streaming=False))
+        questions, cache_hit = load_questions_cached(filepath, self.parse_cache, progress=progress)
+        if cache_hit:
+            print(f"解析缓存命中: {filepath}")
+        return questions
+
+    @timed("engine.parse_folder")
+    def parse_folder(self, filepaths, progress=None):
+        """多进程并发解析多个题库文件，返回 [(filepath, 题目列表, 错误信息或None), ...]"""
+        return parse_bank_files_parallel(filepaths, cache_dir=self.cache_dir, progress=progress)
+
+    @timed("engine.dedup")
+    def deduplicate(self, questions, progress=None):
+        """合并近似重复的题目（见 near_duplicates），返回 (保留的题目列表, 分组 DuplicateGroup 列表)"""
+        return deduplicate(questions, progress=progress)
+
+    @timed("engine.save_bank")
+    def build_bank(self, questions, source_path, progress=None):
+        """把新题目整体写入数据库并分配稳定的 qid，再用这些 qid 建立新的题目池和检索索引，返回 Bank。
+
+        写入在一个事务中完成；progress 抛出异常（如取消）时事务回滚，数据库和当前题库都保持原样。
+        不修改当前题库，可在后台线程中调用；结果用 install() 切换。
+        """
+        for q in questions:
+            q.qid = None
+        # 索引先按位置编号（1..n）建立，这一步仍可取消；qid 分配后若不一致再换成 qid
+        search_index = SearchIndex.build(questions, progress, ids=range(1, len(questions) + 1))
+        if self.store is not None:
+            self.flush()
+            self.store.replace_bank(questions, source_path, progress=progress)
+            if self.history is not None: # 题目编号全部重新分配，旧的作答记录随进度一起清空
+                self.history.clear()
+        pool = QuestionPool()
+        pool.load(questions)
+        if any(q.qid != i for i, q in enumerate(questions, 1)):
+            search_index.remap([None] + [q.qid for q in questions])
+        self.persist("replace_search_index", search_index.to_rows(), INDEX_VERSION)
+        return Bank(pool, search_index, source_path)
+
+    def import_file(self, filepath, progress=None, dedup=True):
+        """同步导入单个题库文件，返回 (导入的题目数, 合并的重复题分组)；题目数为 0 时当前题库不变"""
+        questions = self.parse_file(filepath, progress=progress)
+        groups = []
+        if questions:
+            if dedup:
+                questions, groups = self.deduplicate(questions, progress)
+            self.install(self.build_bank(questions, filepath, progress))
+        return len(questions), groups
+
+    def import_folder(self, folder, progress=None, dedup=True):
+        """同步导入文件夹中的全部题库文件，返回 (各文件的解析结果, 合并的重复题分组)"""
+        results = self.parse_folder(list_bank_files(folder), progress)
+        merged_questions = [q for _path, questions, _error in results for q in questions]
+        groups = []
+        if merged_questions:
+            if dedup:
+                merged_questions, groups = self.deduplicate(merged_questions, progress)
+            self.install(self.build_bank(merged_questions, folder, progress))
+        return results, groups
+
+    # --- 增量更新 ---
+    @timed("engine.diff_bank")
+    def prepare_update(self, source_path=None, progress=None, dedup=True):
+        """重新解析题库来源（默认为 last_imported_docx，文件或文件夹）并与当前题库比对，返回 BankDiff。
+
+        没有解析出任何题目时返回 None；文件夹中有文件解析失败时抛出 ValueError（否则其中的题目会被当作已删除）。
+        只读取当前题库，可在后台线程中调用；结果用 apply_update() 应用。
+        """
+        source_path = source_path or self.last_imported_docx
+        if not source_path:
+            raise ValueError("没有记录题库来源，请先导入题库")
+        if os.path.isdir(source_path):
+            results = self.parse_folder(list_bank_files(source_path), progress)
+            failed = [f"{os.path.basename(path)}: {error}" for path, _questions, error in results if error]
+            if failed:
+                raise ValueError("以下文件解析失败：\n" + "\n".join(failed))
+            questions = [q for _path, questions, _error in results for q in questions]
+        else:
+            questions = self.parse_file(source_path, progress=progress)
+        if not questions:
+            return None
+        if dedup:
+            questions, _groups = self.deduplicate(questions, progress)
+        return diff_banks(self.pool.all_questions(), questions)
+
+    @timed("engine.apply_update")
+    def apply_update(self, diff, source_path=None):
+        """（主线程）应用 prepare_update 的比对结果，返回 (修改或移动的题数, 新增的题目, 删除的题目)。
+
+        修改过的题目原地更新内容，qid、作答状态、复习状态和各用户的进度都保留；
+        新题目作为未答题加入；删除的题目连同进度一起删除。比对之后已被手动删除的题目不再恢复。
+        """
+        source_path = source_path or self.last_imported_docx
+        pool = self.pool
+        # (当前题目, 新内容, 内容是否变化)
+        updated = [(old, new, True) for old, new in diff.edited if pool.get(old.qid) is old]
+        updated += [(old, new, False) for old, new in diff.moved if pool.get(old.qid) is old]
+        added = list(diff.added)
+        removed = [q for q in diff.removed if pool.get(q.qid) is q]
+        for q in added:
+            q.qid = None
+        if self.store is not None:
+            self.flush()
+            self.store.apply_bank_diff([(old.qid, new) for old, new, _changed in updated], added, removed, source_path)
+        for q in removed:
+            self.answer_keys.pop(q.qid, None)
+
+        # 检索索引：先按旧内容去掉，改写后再按新内容加入，只保存涉及的词项
+        index = self.search_index
+        touched = set()
+        for q in removed:
+            touched |= index.remove(q)
+        pool.delete([q.qid for q in removed])
+        for old, new, changed in updated:
+            if changed:
+                touched |= index.remove(old)
+            for field in (RECORD_FIELDS if changed else POSITION_FIELDS):
+                setattr(old, field, getattr(new, field))
+            old.compact()
+            if changed:
+                touched |= index.add(old)
+                self.answer_keys.pop(old.qid, None)
+        for q in added:
+            pool.add(q)
+            self.answer_keys.pop(q.qid, None)
+        if added:
+            touched |= index.discard_ids([q.qid for q in added]) # 保险：清掉索引中同一编号的残留
+            for q in added:
+                touched |= index.add(q)
+
+        if self.scheduler is not None:
+            for q in removed:
+                self.scheduler.remove(q.qid)
+            for q in added:
+                self.scheduler.add(q.qid)
+        if any(q is self.current_question for q in removed):
+            self.current_question = None
+        self.last_imported_docx = source_path
+        self.persist("update_search_index", index.rows_for(touched), INDEX_VERSION)
+        return len(updated), added, removed
+
+    # --- 作答 ---
+    @timed("engine.draw")
+    def draw(self):
+        """抽一道题作为当前题目，没有可抽的题时返回 None。
+
+        普通模式随机抽一道未答题；复习模式取到期最早的题（O(log n)），
+        上一道题抽到后没有作答时会被推迟一会儿再出现。
+        """
+        if self.review_mode:
+            scheduler = self.review_scheduler()
+            if self.current_question is not None:
+                scheduler.postpone(self.current_question.qid)
+            qid = scheduler.next_due()
+            q = self.pool.get(qid) if qid is not None else None
+        else:
+            q = self.next_pick if self._is_drawable(self.next_pick) else self.pool.draw()
+            self.next_pick = None
+        if q is not None:
+            normalize_judge_answer(q)
+        self.current_question = q
+        self.drawn_at = time.monotonic()
+        return q
+
+    def _is_drawable(self, q):
+        return q is not None and self.pool.get(q.qid) is q and not self.pool.is_answered(q)
+
+    def peek_next(self):
+        """下一次 draw() 将抽到的题目（用于提前加载图片），无法预知时返回 None。
+
+        普通模式下预先随机选好一道（不是当前题目的）未答题，draw 时若它仍未作答就直接使用，
+        抽题仍是均匀随机的；复习模式的顺序取决于本题的作答结果，不预取。
+        """
+        if self.review_mode:
+            return None
+        if not self._is_drawable(self.next_pick) or self.next_pick is self.current_question:
+            self.next_pick = self.pool.draw()
+            if self.next_pick is self.current_question and self.pool.unanswered_count > 1:
+                self.next_pick = self.pool.draw()
+        return self.next_pick
+
+    def media_source(self, q):
+        """题目中图片所在的 .docx 路径（按 last_imported_docx 和 source_file 推算），不是 Word 题库时返回 None"""
+        source = self.last_imported_docx
+        if not source:
+            return None
+        if os.path.isdir(source):
+            if not q.source_file:
+                return None
+            source = os.path.join(source, q.source_file)
+        return source if source.lower().endswith(".docx") else None
+
+    def grade(self, q, response):
+        """给一次作答判分，返回 grading.Grade；题目的规范化答案只在第一次判分时计算"""
+        key = self.answer_keys.get(q.qid)
+        if key is None and q.qid not in self.answer_keys:
+            key = self.answer_keys[q.qid] = answer_key(q)
+        return grade_response(key, response)
+
+    @timed("engine.submit")
+    def submit(self, q=None, correct=None, score=None, response=None):
+        """把题目（默认当前题目）标记为已答并记入待写队列。没有任何状态变化时返回 False
+
+        复习模式下同时按 correct（见 grade）重新排期；无法判分（None）时按答对处理。
+        score 为本题得分（0~1），计入本次得分；无法判分时传 None。
+        每次作答都在作答记录中追加一条（用时从抽到这道题算起，response 为作答内容）。
+        已答题重复提交时（复习模式下抽到的到期题除外）不计分、不记录、不重新排期，返回 False。
+        """
+        q = q or self.current_question
+        if q is None:
+            return False
+        drawn = q is self.current_question
+        if self.pool.is_answered(q) and not (self.review_mode and drawn):
+            return False
+        elapsed = None
+        if drawn:
+            self.current_question = None
+            elapsed = time.monotonic() - self.drawn_at
+        if self.history is not None:
+            self.history.append(q.qid, q.q_type, elapsed, correct, score, response)
+            if self.writer is None:
+                self.history.flush()
+        if score is not None and correct is not None:
+            self.session_score += score
+            self.session_graded += 1
+        changed = False
+        if self.review_mode:
+            state = self.review_scheduler().record(q.qid, correct is not False)
+            self.persist("save_review", state.as_row(q.qid))
+            changed = True
+        if self.pool.mark_answered(q): # O(1)：从未答数组交换删除，成为最新的已答题
+            self.persist("mark_answered", q)
+            changed = True
+        return changed
+
+    def review_state(self, q):
+        """题目的复习状态（ReviewState），复习队列尚未建立时返回 None"""
+        return self.scheduler.state(q.qid) if self.scheduler is not None else None
+
+    def next_review_time(self):
+        """复习模式下下一道题的到期时间（time.time() 时间戳）"""
+        return self.review_scheduler().next_due_time()
+
+    @timed("engine.move_back")
+    def move_back(self, qids):
+        """已答 -> 未答，返回实际移回的题目"""
+        # 随机抽题本身就是均匀随机的，移回后无需再打乱未答列表
+        moved_questions = self.pool.move_back(qids)
+        if moved_questions:
+            self.persist("mark_unanswered", moved_questions)
+            # 移回未答即重新学习：复习状态回到新题
+            if self.scheduler is not None:
+                for q in moved_questions:
+                    self.scheduler.reset(q.qid)
+            self.persist("reset_review", moved_questions)
+        return moved_questions
+
+    @timed("engine.delete")
+    def delete(self, qids):
+        """从题库中永久删除，返回实际删除的题目"""
+        deleted_questions = self.pool.delete(qids)
+        for q in deleted_questions:
+            self.answer_keys.pop(q.qid, None)
+        if deleted_questions:
+            # 删除涉及的行，由后台写入线程提交
+            self.persist("delete_questions", deleted_questions)
+            if self.scheduler is not None:
+                for q in deleted_questions:
+                    self.scheduler.remove(q.qid)
+            if self.current_question in deleted_questions:
+                self.current_question = None
+        return deleted_questions
+
+    @timed("engine.search")
+    def search(self, query, limit=None):
+        """全文检索，返回按相关度排序的题目（已删除的题目不会出现）"""
+        if limit is None:
+            return self.search_index.search(query, self.pool.get)
+        return self.search_index.search(query, self.pool.get, limit)
+
+    @timed("engine.history_report")
+    def history_report(self):
+        """统计全部作答记录，返回 answer_history.HistoryReport（没有作答记录文件时为空报告）"""
+        if self.history is None:
+            return summarize(empty_columns())
+        return summarize(self.history.load_columns())
+
+    def answered_question(self, qid):
+        """按 qid 取一道已答题，不存在或未答时返回 None"""
+        q = self.pool.get(qid)
+        return q if q is not None and self.pool.is_answered(q) else None
+
+
+def default_paths(base_dir=None):
+    """返回 (数据库, 旧版进度文件, 解析缓存目录) 的路径；base_dir 为空时使用当前目录"""
+    names = (QuizEngine.DB_FILE_NAME, QuizEngine.SAVE_FILE_NAME, QuizEngine.CACHE_DIR_NAME)
+    return tuple(os.path.join(base_dir, name) if base_dir else name for name in names)
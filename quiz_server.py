@@ -0,0 +1,369 @@
+"""多用户刷题服务：一个进程供整个班级使用，题库只加载一次，各用户的进度分别保存。
+
+    python quiz_server.py --db quiz_progress.db --port 8080
+
+基于 asyncio 的 HTTP/1.1 + JSON 接口（支持 keep-alive），只依赖标准库：
+
+    GET  /stats?user=U   -> {"total": 120, "unanswered": 100, "answered": 20}
+    GET  /draw?user=U    -> {"question": {"qid", "q_type", "header", "text", "options", "blanks"}}，没有未答题时为 null
+    POST /answer         {"user": U, "qid": 3, "response": "A"}
+                         -> {"correct": true, "score": 1.0, "recorded": true, "your_answer": "...", "correct_answer": "..."}
+    POST /move_back      {"user": U, "qids": [3, 5]} -> {"moved": 2}
+
+response 的格式见 quiz_engine.describe_answer：单选/判断题为字母，多选题为字母列表，填空题为各空内容的列表；
+判分规则见 grading（score 为 0~1，多选题漏选、填空题部分答对时有部分分，correct 为 null 表示无法判分）。
+user 只用来区分进度，不做身份验证，只适合在可信的局域网中使用。
+
+* 题库在启动时从数据库读一次，之后只读；用桌面版重新导入题库后需要重启服务
+* 每个用户在内存中只保存已答题目（首次请求时从 user_progress 表读入）；抽题时在全部题目中
+  随机取、跳过已答的，已答超过一半后才为该用户建立未答数组（与 QuestionPool 相同的 swap-remove）
+* 作答/移回只改内存就返回，数据库写入由后台任务每 FLUSH_INTERVAL 秒合并成一个事务、
+  在线程中执行，不阻塞事件循环；进程被强制结束时最多丢失这段时间内的作答
+"""
+import argparse
+import asyncio
+import json
+import random
+import signal
+import sqlite3
+import sys
+from http import HTTPStatus
+from urllib.parse import parse_qsl, urlsplit
+
+from grading import build_answer_keys, grade_response
+from quiz_engine import (QuizEngine, blank_count, describe_answer, display_options, normalize_judge_answer,
+                         question_header_text)
+
+FLUSH_INTERVAL = 0.2 # 秒
+DENSE_FRACTION = 0.5 # 已答比例超过此值时为该用户建立未答数组
+MAX_BODY_BYTES = 64 * 1024
+MAX_HEADER_LINES = 100
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message=None):
+        super().__init__(message or status.phrase)
+        self.status = status
+
+
+def question_payload(q):
+    """抽题接口返回的题目（不含答案）"""
+    return {
+        "qid": q.qid,
+        "q_type": q.q_type,
+        "header": question_header_text(q),
+        "text": q.get_display_text(),
+        "options": display_options(q),
+        "blanks": blank_count(q) if q.q_type == "填空题" else 0,
+    }
+
+
+def check_response(q, response):
+    """检查作答的 JSON 类型是否与题型相符，不符时抛出 HTTPError(400)"""
+    if q.q_type in ["单选题", "判断题"]:
+        valid = response is None or isinstance(response, str)
+    elif q.q_type in ["多选题", "填空题"]:
+        valid = response is None or (isinstance(response, list) and all(isinstance(item, str) for item in response))
+    else:
+        valid = True
+    if not valid:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"{q.q_type}的 response 格式不正确")
+
+
+class UserProgress:
+    """一个用户的进度：已答 qid（按作答顺序），已答较多时再加上未答数组"""
+
+    def __init__(self, user_id, answered_ids=()):
+        self.user_id = user_id
+        self.answered = dict.fromkeys(answered_ids) # qid -> None，按作答顺序排列
+        self._unanswered = None      # 未答 qid 数组，需要时才建立
+        self._unanswered_slot = None # qid -> 在 _unanswered 中的下标
+
+    def draw(self, qids, rng):
+        """在 qids（全部题目）中随机取一个未答的，没有时返回 None"""
+        if self._unanswered is None:
+            if len(self.answered) <= len(qids) * DENSE_FRACTION:
+                while True: # 已答不超过一半，期望 2 次以内就能抽到
+                    qid = qids[rng.randrange(len(qids))]
+                    if qid not in self.answered:
+                        return qid
+            self._unanswered = [qid for qid in qids if qid not in self.answered]
+            self._unanswered_slot = {qid: i for i, qid in enumerate(self._unanswered)}
+        if not self._unanswered:
+            return None
+        return self._unanswered[rng.randrange(len(self._unanswered))]
+
+    def mark_answered(self, qid):
+        """未答 -> 已答；已经答过时返回 False"""
+        if qid in self.answered:
+            return False
+        self.answered[qid] = None
+        if self._unanswered is not None:
+            slot = self._unanswered_slot.pop(qid)
+            last_qid = self._unanswered.pop()
+            if last_qid != qid:
+                self._unanswered[slot] = last_qid
+                self._unanswered_slot[last_qid] = slot
+        return True
+
+    def move_back(self, qids):
+        """已答 -> 未答，返回实际移回的 qid"""
+        moved = []
+        for qid in qids:
+            if qid in self.answered:
+                del self.answered[qid]
+                if self._unanswered is not None:
+                    self._unanswered_slot[qid] = len(self._unanswered)
+                    self._unanswered.append(qid)
+                moved.append(qid)
+        return moved
+
+
+class QuizServer:
+    def __init__(self, store, questions, rng=None):
+        self.store = store
+        self.questions = {q.qid: q for q in questions}
+        self.qids = list(self.questions)
+        self.answer_keys = build_answer_keys(questions) # 启动时一次算好，判分时只比较
+        self.rng = rng or random.Random()
+        self.users = {}    # user_id -> UserProgress
+        self._loading = {} # user_id -> 正在从数据库读入该用户进度的 Task
+        self._pending = [] # 尚未写入数据库的变化 (user_id, qid, answered_seq 或 None)
+        self._answered_seq = store.max_user_answered_seq()
+        self.routes = {
+            ("GET", "/stats"): self.stats,
+            ("GET", "/draw"): self.draw,
+            ("POST", "/answer"): self.answer,
+            ("POST", "/move_back"): self.move_back,
+        }
+
+    # --- 接口 ---
+    async def stats(self, params):
+        progress = await self.user(params)
+        answered = len(progress.answered)
+        return {"total": len(self.qids), "unanswered": len(self.qids) - answered, "answered": answered}
+
+    async def draw(self, params):
+        progress = await self.user(params)
+        qid = progress.draw(self.qids, self.rng) if self.qids else None
+        return {"question": question_payload(self.questions[qid]) if qid is not None else None}
+
+    async def answer(self, params):
+        progress = await self.user(params)
+        qid = params.get("qid")
+        q = self.questions.get(qid) if isinstance(qid, int) else None
+        if q is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, "没有这道题目")
+        response = params.get("response")
+        check_response(q, response)
+        user_answer_str, correct_answer_str = describe_answer(q, response)
+        grade = grade_response(self.answer_keys[q.qid], response)
+        recorded = progress.mark_answered(q.qid)
+        if recorded:
+            self._answered_seq += 1
+            self._pending.append((progress.user_id, q.qid, self._answered_seq))
+        return {
+            "correct": grade.correct,
+            "score": grade.score,
+            "recorded": recorded,
+            "your_answer": user_answer_str,
+            "correct_answer": correct_answer_str,
+        }
+
+    async def move_back(self, params):
+        progress = await self.user(params)
+        qids = params.get("qids")
+        if not isinstance(qids, list) or not all(isinstance(qid, int) for qid in qids):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "qids 应为题目编号的列表")
+        moved = progress.move_back(qids)
+        self._pending.extend((progress.user_id, qid, None) for qid in moved)
+        return {"moved": len(moved)}
+
+    # --- 用户进度 ---
+    async def user(self, params):
+        """请求对应的 UserProgress；该用户第一次出现时在线程中从数据库读入（同时到达的请求共用一次读取）"""
+        user_id = params.get("user")
+        if not isinstance(user_id, str) or not user_id:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "缺少 user")
+        progress = self.users.get(user_id)
+        if progress is not None:
+            return progress
+        task = self._loading.get(user_id)
+        if task is None:
+            task = asyncio.ensure_future(asyncio.to_thread(self.store.load_user_progress, user_id))
+            self._loading[user_id] = task
+        try:
+            answered_ids = await task
+        finally:
+            self._loading.pop(user_id, None)
+        progress = self.users.get(user_id)
+        if progress is None:
+            progress = UserProgress(user_id, (qid for qid in answered_ids if qid in self.questions))
+            self.users[user_id] = progress
+        return progress
+
+    async def flush_forever(self):
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            await self.flush()
+
+    async def flush(self):
+        """把积累的变化在一个事务中写入数据库；失败时留到下次再写"""
+        if not self._pending:
+            return
+        changes, self._pending = self._pending, []
+        try:
+            await asyncio.to_thread(self.store.apply_user_progress, changes)
+        except sqlite3.Error as e:
+            print(f"Error persisting user progress: {e}")
+            self._pending[:0] = changes
+
+    # --- HTTP ---
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except HTTPError as e:
+                    write_response(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, path, params, keep_alive = request
+                status, payload = await self.dispatch(method, path, params)
+                write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, path, params):
+        handler = self.routes.get((method, path))
+        if handler is None:
+            known_path = any(route_path == path for _method, route_path in self.routes)
+            status = HTTPStatus.METHOD_NOT_ALLOWED if known_path else HTTPStatus.NOT_FOUND
+            return status, {"error": status.phrase}
+        try:
+            return HTTPStatus.OK, await handler(params)
+        except HTTPError as e:
+            return e.status, {"error": str(e)}
+        except Exception as e: # 单个请求出错不影响其他连接
+            print(f"Error handling {method} {path}: {e!r}")
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": HTTPStatus.INTERNAL_SERVER_ERROR.phrase}
+
+
+async def read_line(reader, too_long_status):
+    """读取一行；超过 StreamReader 的长度上限时 readline 抛出 ValueError，转换为 HTTPError"""
+    try:
+        return await reader.readline()
+    except ValueError: # 包括 asyncio.LimitOverrunError
+        raise HTTPError(too_long_status) from None
+
+
+async def read_request(reader):
+    """读取一个请求，返回 (方法, 路径, 参数, 是否保持连接)；连接已关闭时返回 None。
+
+    参数为查询字符串与 JSON 请求体（须为对象）合并后的字典。
+    """
+    request_line = await read_line(reader, HTTPStatus.REQUEST_URI_TOO_LONG)
+    if not request_line.strip():
+        return None
+    try:
+        method, target, version = request_line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST) from None
+    headers = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = await read_line(reader, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _sep, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST) from None
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+    body = await reader.readexactly(length) if length else b""
+
+    url = urlsplit(target)
+    params = dict(parse_qsl(url.query))
+    if body:
+        try:
+            data = json.loads(body)
+        except (ValueError, UnicodeDecodeError):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "请求体不是合法的 JSON") from None
+        if not isinstance(data, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "请求体应为 JSON 对象")
+        params.update(data)
+
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+    return method.upper(), url.path, params, keep_alive
+
+
+def write_response(writer, status, payload, keep_alive=True):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    connection = "" if keep_alive else "Connection: close\r\n"
+    head = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n{connection}\r\n"
+    )
+    writer.write(head.encode("ascii") + body)
+
+
+async def serve(server, host, port):
+    """运行服务直到被取消（Ctrl+C 或 SIGTERM）；退出前把未写入的进度写完"""
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except (NotImplementedError, AttributeError): # Windows 的事件循环不支持，只能用 Ctrl+C
+        pass
+    flusher = asyncio.ensure_future(server.flush_forever())
+    listener = await asyncio.start_server(server.handle_connection, host, port, backlog=1024)
+    addresses = ", ".join(str(sock.getsockname()) for sock in listener.sockets)
+    print(f"刷题服务已启动: {addresses}，共 {len(server.qids)} 道题目")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        flusher.cancel()
+        await server.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="灵感菇 多用户刷题服务（HTTP/JSON）")
+    parser.add_argument("--db", default=QuizEngine.DB_FILE_NAME, help="题库数据库路径（用桌面版或终端模式导入）")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args(argv)
+
+    engine = QuizEngine(db_path=args.db, legacy_pkl_path=None)
+    engine.load()
+    if not len(engine):
+        print("数据库中没有题目。请先用桌面版或 quiz_cli.py --import 导入题库。", file=sys.stderr)
+        engine.close()
+        return 1
+    questions = engine.pool.all_questions()
+    for q in questions:
+        normalize_judge_answer(q)
+    server = QuizServer(engine.store, questions)
+    try:
+        asyncio.run(serve(server, args.host, args.port))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    finally:
+        engine.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
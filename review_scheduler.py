@@ -0,0 +1,134 @@
+"""间隔重复（Leitner 盒子）调度：按到期时间组成的小顶堆取下一道题。
+
+* 每道题有一个复习状态：盒子编号、到期时间、复习次数、答错次数
+* 答对进入下一个盒子，间隔变长；答错回到第 1 个盒子，很快再次出现
+* 从未复习过的题目在第 0 个盒子，到期时间为 0，按随机顺序排在最前
+* 堆中的条目采用“标记删除”：重新排期时旧条目作废，取题时跳过，
+  每次取题/排期都是 O(log n)，与题库大小基本无关
+"""
+import heapq
+import itertools
+import random
+import time
+
+# 各盒子的复习间隔（秒）：盒子 0 为新题
+LEITNER_INTERVALS = (0, 10 * 60, 24 * 3600, 3 * 24 * 3600, 7 * 24 * 3600, 16 * 24 * 3600, 35 * 24 * 3600)
+SKIP_DELAY = 60 # 抽到后没有作答就换题时，这道题推迟多久再出现
+
+
+class ReviewState:
+    __slots__ = ("box", "due", "reviews", "lapses")
+
+    def __init__(self, box=0, due=0.0, reviews=0, lapses=0):
+        self.box = box
+        self.due = due
+        self.reviews = reviews
+        self.lapses = lapses
+
+    def as_row(self, qid):
+        return (qid, self.box, self.due, self.reviews, self.lapses)
+
+
+class ReviewScheduler:
+    def __init__(self, clock=time.time, rng=None):
+        self._clock = clock
+        self._rng = rng or random
+        self._states = {}   # qid -> ReviewState
+        self._entries = {}  # qid -> 堆中当前有效的条目 [due, 随机序, qid]
+        self._heap = []
+        self._counter = itertools.count() # 同一时刻到期时按入堆先后
+
+    # --- 构建 ---
+    def load(self, qids, rows=()):
+        """用题目编号和已保存的复习状态 (qid, box, due, reviews, lapses) 重建，一次 heapify"""
+        self._states = {qid: ReviewState() for qid in qids}
+        for qid, box, due, reviews, lapses in rows:
+            if qid in self._states:
+                self._states[qid] = ReviewState(box, due, reviews, lapses)
+        self._heap = []
+        self._entries = {}
+        for qid, state in self._states.items():
+            # 新题用随机数打乱顺序，已复习过的题按到期时间先后
+            tiebreak = self._rng.random() if state.box == 0 else next(self._counter)
+            entry = [state.due, tiebreak, qid]
+            self._entries[qid] = entry
+            self._heap.append(entry)
+        heapq.heapify(self._heap)
+
+    def __len__(self):
+        return len(self._states)
+
+    def __contains__(self, qid):
+        return qid in self._states
+
+    def state(self, qid):
+        return self._states.get(qid)
+
+    # --- 取题 ---
+    def next_due(self, now=None):
+        """到期最早的题目编号；没有已到期的题目时返回 None（不改变状态）"""
+        entry = self._peek()
+        if entry is None:
+            return None
+        now = self._clock() if now is None else now
+        return entry[2] if entry[0] <= now else None
+
+    def next_due_time(self):
+        """下一道题的到期时间，没有题目时返回 None"""
+        entry = self._peek()
+        return entry[0] if entry is not None else None
+
+    # --- 状态变化 ---
+    def record(self, qid, correct, now=None):
+        """记录一次作答并重新排期，返回新的 ReviewState"""
+        now = self._clock() if now is None else now
+        state = self._states[qid]
+        state.reviews += 1
+        if correct:
+            state.box = min(state.box + 1, len(LEITNER_INTERVALS) - 1)
+        else:
+            state.box = 1
+            state.lapses += 1
+        state.due = now + LEITNER_INTERVALS[state.box]
+        self._push(qid, state.due)
+        return state
+
+    def postpone(self, qid, now=None, delay=SKIP_DELAY):
+        """抽到后跳过：只推迟这一次，不计入复习记录，也不保存"""
+        if qid not in self._states:
+            return
+        now = self._clock() if now is None else now
+        self._push(qid, max(self._entries[qid][0], now + delay))
+
+    def add(self, qid):
+        self._states[qid] = ReviewState()
+        self._push(qid, 0.0, self._rng.random())
+
+    def reset(self, qid):
+        """回到新题状态（例如题目被移回未答）"""
+        if qid in self._states:
+            self.add(qid)
+
+    def remove(self, qid):
+        self._states.pop(qid, None)
+        entry = self._entries.pop(qid, None)
+        if entry is not None:
+            entry[2] = None # 标记删除，取题时跳过
+
+    # --- 内部 ---
+    def _push(self, qid, due, tiebreak=None):
+        old = self._entries.get(qid)
+        if old is not None:
+            old[2] = None
+        entry = [due, next(self._counter) if tiebreak is None else tiebreak, qid]
+        self._entries[qid] = entry
+        heapq.heappush(self._heap, entry)
+        if len(self._heap) > 2 * len(self._entries) + 64: # 作废条目太多时压缩一次，均摊 O(1)
+            self._heap = [e for e in self._heap if e[2] is not None]
+            heapq.heapify(self._heap)
+
+    def _peek(self):
+        heap = self._heap
+        while heap and heap[0][2] is None:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
@@ -0,0 +1,169 @@
+"""题库全文检索：内存中的倒排索引，中文按相邻两字（bigram）切分，不需要分词器。
+
+* 索引内容：题干、选项文本和答案
+* 词项：连续的汉字切成 bigram，另外每个汉字也单独作为词项（边输入边检索时最先查的就是单字），
+  字母数字按整词，统一小写
+* 倒排表：词项 -> array('I') 题目编号，可直接以二进制保存到数据库并快速读回
+* 查询：所有词项都要命中（AND），再按“整句出现在题干/选项中”等规则排序
+
+被删除的题目不会从倒排表中移除，查询时按题目池过滤；重新导入题库时整体重建，
+增量更新题库时只改动涉及的词项（见 QuizEngine.apply_update）。
+"""
+import heapq
+import re
+from array import array
+
+INDEX_VERSION = 2 # 切词规则或索引内容变化时加 1，使数据库中保存的索引失效
+DEFAULT_LIMIT = 200
+BUILD_PROGRESS_EVERY = 1000
+
+_TOKEN_RE = re.compile(r"[0-9a-z]+|[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+")
+
+
+def _is_cjk(ch):
+    return ch >= "\u3400"
+
+
+def tokenize(text, unigrams=False):
+    """切出词项（可能重复）；unigrams=True（建索引时）连续汉字中的每个字也作为词项"""
+    for run in _TOKEN_RE.findall(text.lower()):
+        if not _is_cjk(run[0]) or len(run) == 1:
+            yield run
+        else:
+            for i in range(len(run) - 1):
+                yield run[i:i + 2]
+            if unigrams:
+                yield from run
+
+
+def question_search_text(q):
+    """参与索引的全部文本：题干、选项、答案"""
+    parts = [q.text]
+    parts.extend(q.options.values())
+    if isinstance(q.answer, list):
+        parts.extend(q.answer)
+    elif q.answer:
+        parts.append(q.answer)
+    return "\n".join(parts)
+
+
+class SearchIndex:
+    def __init__(self, postings=None):
+        self.postings = postings if postings is not None else {} # 词项 -> array('I') 题目编号
+
+    @classmethod
+    def build(cls, questions, progress=None, ids=None):
+        """为全部题目建立索引；ids 为各题使用的编号（默认 q.qid），progress(已处理, 总数)"""
+        index = cls()
+        ids = ids if ids is not None else [q.qid for q in questions]
+        for i, (q, qid) in enumerate(zip(questions, ids)):
+            index.add(q, qid)
+            if progress is not None and i % BUILD_PROGRESS_EVERY == 0:
+                progress(i, len(questions))
+        return index
+
+    def add(self, q, qid=None):
+        """加入一道题，返回它的词项集合"""
+        postings = self.postings
+        qid = q.qid if qid is None else qid
+        tokens = set(tokenize(question_search_text(q), unigrams=True))
+        for token in tokens:
+            posting = postings.get(token)
+            if posting is None:
+                postings[token] = posting = array("I")
+            posting.append(qid)
+        return tokens
+
+    def remove(self, q):
+        """按题目当前的内容从倒排表中去掉它，返回涉及的词项集合"""
+        tokens = set(tokenize(question_search_text(q), unigrams=True))
+        for token in tokens:
+            posting = self.postings.get(token)
+            if posting is not None and q.qid in posting:
+                posting.remove(q.qid)
+                if not posting:
+                    del self.postings[token]
+        return tokens
+
+    def discard_ids(self, qids):
+        """去掉指向这些编号的全部条目（编号被新题目重新使用前调用），返回涉及的词项集合"""
+        qids = set(qids)
+        touched = set()
+        for token, posting in list(self.postings.items()):
+            if qids.isdisjoint(posting):
+                continue
+            touched.add(token)
+            kept = array("I", (qid for qid in posting if qid not in qids))
+            if kept:
+                self.postings[token] = kept
+            else:
+                del self.postings[token]
+        return touched
+
+    def remap(self, mapping):
+        """把索引中的编号 i 换成 mapping[i]（mapping 为列表或字典）"""
+        for token, posting in self.postings.items():
+            self.postings[token] = array("I", (mapping[qid] for qid in posting))
+
+    def __len__(self):
+        return len(self.postings)
+
+    # --- 保存 / 读取 ---
+    def to_rows(self):
+        """[(词项, 二进制题目编号)]，用于写入数据库"""
+        return [(token, posting.tobytes()) for token, posting in self.postings.items()]
+
+    def rows_for(self, tokens):
+        """只包含指定词项的 [(词项, 二进制题目编号或 None)]，None 表示该词项已被删除"""
+        rows = []
+        for token in tokens:
+            posting = self.postings.get(token)
+            rows.append((token, posting.tobytes() if posting is not None else None))
+        return rows
+
+    @classmethod
+    def from_rows(cls, rows):
+        postings = {}
+        for token, blob in rows:
+            posting = array("I")
+            posting.frombytes(blob)
+            postings[token] = posting
+        return cls(postings)
+
+    # --- 查询 ---
+    def candidates(self, query):
+        """命中全部查询词项的题目编号集合"""
+        tokens = set(tokenize(query))
+        if not tokens:
+            return set()
+        postings = []
+        for token in tokens:
+            posting = self.postings.get(token) # 单个汉字直接查单字词项
+            if not posting:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result.intersection_update(posting)
+            if not result:
+                break
+        return result
+
+    def search(self, query, lookup, limit=DEFAULT_LIMIT):
+        """返回按相关度排序的题目列表。lookup(qid) 返回 Question，已删除的题目返回 None"""
+        needle = query.strip().lower()
+        fold_case = needle != needle.upper() # 只有含字母时才需要逐题转小写
+        scored = []
+        for qid in self.candidates(query):
+            q = lookup(qid)
+            if q is None:
+                continue
+            text = q.text.lower() if fold_case else q.text
+            if needle in text:
+                score = 0 if text.startswith(needle) else 1
+            else:
+                options_text = "\n".join(q.options.values())
+                score = 2 if needle in (options_text.lower() if fold_case else options_text) else 3
+            scored.append((score, len(text), qid))
+        return [lookup(qid) for _score, _length, qid in heapq.nsmallest(limit, scored)]
@@ -0,0 +1,41 @@
+import os
+import sys
+
+import pytest
+
+# 各模块直接放在仓库根目录，没有打包
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from question_parser import iter_questions_from_paragraphs  # noqa: E402
+
+SAMPLE_BANK = """一、单选题
+1. 中国的首都是哪座城市
+A. 北京
+B. 上海
+C. 广州
+正确答案：A
+二、多选题
+2. 下列哪些城市是直辖市
+A. 北京
+B. 上海
+C. 广州
+D. 天津
+正确答案：ABD
+三、判断题
+3. 地球绕着太阳公转
+正确答案：正确
+四、填空题
+4. 水的化学式是___，常温下是___态
+正确答案：H2O 液
+"""
+
+
+def parse_bank(text):
+    """把题库文本（每行一个段落，格式同 Word 题库）解析成题目列表"""
+    return list(iter_questions_from_paragraphs(text.splitlines()))
+
+
+@pytest.fixture
+def sample_questions():
+    """每种题型各一道的小题库（每次都是新解析的对象）"""
+    return parse_bank(SAMPLE_BANK)
@@ -0,0 +1,61 @@
+from bank_diff import BankDiff, diff_banks
+from conftest import SAMPLE_BANK, parse_bank
+from quiz_engine import QuizEngine
+
+
+def numbered(questions):
+    for qid, q in enumerate(questions, 1):
+        q.qid = qid
+    return questions
+
+
+def test_identical_bank_is_unchanged(sample_questions):
+    diff = diff_banks(numbered(sample_questions), parse_bank(SAMPLE_BANK))
+    assert diff == BankDiff(len(sample_questions), [], [], [], [])
+
+
+def test_pairs_moved_edited_added_and_removed():
+    old = numbered(parse_bank(SAMPLE_BANK))
+    new_text = (SAMPLE_BANK
+                .replace("中国的首都是哪座城市", "中国的首都是哪一座城市")  # 改了一个字
+                .replace("4. 水的化学式是", "5. 水的化学式是")               # 只改题号
+                .replace("3. 地球绕着太阳公转\n正确答案：正确\n", "")     # 删除
+                + "五、单选题\n6. 一年有几个季节\nA. 三\nB. 四\n正确答案：B\n") # 新增
+    new = parse_bank(new_text)
+    diff = diff_banks(old, new)
+    assert diff.unchanged == 1
+    assert [(o.qid, n.original_num_text) for o, n in diff.moved] == [(4, "5. 水的化学式是___，常温下是___态")]
+    assert [(o.qid, n.text) for o, n in diff.edited] == [(1, "中国的首都是哪一座城市")]
+    assert [q.text for q in diff.added] == ["一年有几个季节"]
+    assert [q.qid for q in diff.removed] == [3]
+
+
+def test_questions_of_different_types_are_not_paired():
+    old = numbered(parse_bank("一、单选题\n1. 下列哪个是水果\nA. 苹果\nB. 白菜\n正确答案：A"))
+    new = parse_bank("一、多选题\n1. 下列哪个是水果\nA. 苹果\nB. 白菜\n正确答案：A")
+    diff = diff_banks(old, new)
+    assert (diff.edited, len(diff.added), len(diff.removed)) == ([], 1, 1)
+
+
+def test_update_never_reuses_a_deleted_qid(tmp_path):
+    db = str(tmp_path / "q.db")
+    engine = QuizEngine(db_path=db, legacy_pkl_path=None, cache_dir=None, autosave=False)
+    engine.load()
+    engine.install(engine.build_bank(parse_bank(SAMPLE_BANK), "题库.txt"))
+    last = max(q.qid for q in engine.pool.all_questions())
+    assert engine.grade(engine.pool.get(last), ["H2O", "液"]).correct
+    engine.delete([last])
+
+    added, = parse_bank("一、单选题\n9. 一年有几个季节\nA. 三\nB. 四\nC. 五\n正确答案：B")
+    engine.apply_update(BankDiff(0, [], [], [added], []), "题库.txt")
+    assert added.qid == last + 1
+    assert engine.grade(added, "B").correct # 不能沿用被删题目的答案
+    engine.close()
+
+    engine = QuizEngine(db_path=db, legacy_pkl_path=None, cache_dir=None, autosave=False)
+    engine.load()
+    engine.delete([added.qid])
+    again, = parse_bank("一、判断题\n10. 太阳从东方升起\n正确答案：正确")
+    engine.apply_update(BankDiff(0, [], [], [again], []), "题库.txt")
+    assert again.qid == added.qid + 1
+    engine.close()
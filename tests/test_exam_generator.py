@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from conftest import parse_bank
+from exam_generator import JUDGE_OPTIONS, paper_item, paper_paragraphs, parse_blueprint, shuffle_options, write_paper
+from importers import iter_questions_from_file
+from quiz_engine import normalize_judge_answer
+
+
+def correct_texts(options, answer):
+    texts = dict(options)
+    return sorted(texts[letter] for letter in answer)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_shuffle_options_remaps_answer(sample_questions, seed):
+    rng = random.Random(seed)
+    for q in sample_questions[:2]: # 单选题、多选题
+        options, answer, order = shuffle_options(q, rng)
+        original = q.options
+        assert [letter for letter, _text in options] == list("ABCD"[:len(original)])
+        assert correct_texts(options, answer) == sorted(original[letter] for letter in q.answer)
+        assert [text for _letter, text in options] == [original[old] for old in order]
+
+
+def test_options_referring_to_position_are_not_shuffled():
+    q, = parse_bank("一、单选题\n1. 下列说法正确的是\nA. 甲\nB. 乙\nC. 以上都对\n正确答案：C")
+    for seed in range(10):
+        options, answer, order = shuffle_options(q, random.Random(seed))
+        assert order == "ABC" and answer == "C"
+
+
+def test_judge_items_show_judge_options(sample_questions):
+    q = sample_questions[2]
+    normalize_judge_answer(q)
+    item = paper_item(q, random.Random(0))
+    assert item.options == sorted(JUDGE_OPTIONS.items())
+    assert item.answer == "A"
+
+
+def test_answer_paper_reimports_with_same_answers(tmp_path, sample_questions):
+    for qid, q in enumerate(sample_questions, 1):
+        q.qid = qid
+        normalize_judge_answer(q)
+    rng = random.Random(1)
+    sections = [(q.q_type, [paper_item(q, rng)]) for q in sample_questions]
+    assert "B. 否 (错误)" in list(paper_paragraphs("p", sections, with_answers=False))
+    write_paper((str(tmp_path), "p", sections))
+
+    reimported = list(iter_questions_from_file(str(tmp_path / "p_答案.docx")))
+    assert [q.q_type for q in reimported] == [q.q_type for q in sample_questions]
+    for new, old in zip(reimported, sample_questions):
+        if old.q_type in ["单选题", "多选题"]:
+            assert correct_texts(new.options.items(), new.answer) == sorted(old.options[a] for a in old.answer)
+        else:
+            assert new.answer == old.answer
+
+
+def test_parse_blueprint():
+    assert parse_blueprint("单选题=2，判断题=1,填空题=0") == [("单选题", 2), ("判断题", 1)]
+    for text in ["问答题=1", "单选题=x", "单选题=1,单选题=2", "单选题=0"]:
+        with pytest.raises(ValueError):
+            parse_blueprint(text)
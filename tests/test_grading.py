@@ -0,0 +1,85 @@
+import pytest
+
+from batch_grader import grade_sheet, read_sheet
+from grading import MULTI_PARTIAL_CREDIT, answer_key, grade_response, parse_response_text
+from quiz_engine import normalize_judge_answer
+
+
+@pytest.fixture
+def keys(sample_questions):
+    for q in sample_questions:
+        normalize_judge_answer(q)
+    return {q.q_type: answer_key(q) for q in sample_questions}
+
+
+@pytest.mark.parametrize("response, expected", [
+    ("A", (1.0, True)),
+    ("ａ", (1.0, True)), # 全角、小写
+    ("B", (0.0, False)),
+    (None, (0.0, False)),
+])
+def test_single_choice(keys, response, expected):
+    assert tuple(grade_response(keys["单选题"], response)) == expected
+
+
+@pytest.mark.parametrize("response, expected", [
+    (["A", "B", "D"], (1.0, True)),
+    ("DBA", (1.0, True)),
+    (["A", "B"], (MULTI_PARTIAL_CREDIT, False)), # 漏选
+    (["A", "B", "C"], (0.0, False)),             # 错选
+    ([], (0.0, False)),
+])
+def test_multi_choice(keys, response, expected):
+    assert tuple(grade_response(keys["多选题"], response)) == expected
+
+
+def test_judge_answer_is_normalized_to_letter(keys):
+    assert keys["判断题"].value == "A"
+    assert grade_response(keys["判断题"], "A").correct
+    assert not grade_response(keys["判断题"], "B").correct
+
+
+@pytest.mark.parametrize("response, expected", [
+    (["h2o", " 液。"], (1.0, True)), # 忽略大小写、空白和首尾标点
+    (["H2O", "固"], (0.5, False)),
+    (["H2O"], (0.5, False)),
+    (None, (0.0, False)),
+])
+def test_fill_in_blanks(keys, response, expected):
+    assert tuple(grade_response(keys["填空题"], response)) == expected
+
+
+def test_question_without_answer_is_ungraded():
+    assert grade_response(None, "A").correct is None
+
+
+@pytest.mark.parametrize("q_type, text, expected", [
+    ("单选题", " b ", "B"),
+    ("判断题", "错", "B"),
+    ("判断题", "√", "A"),
+    ("多选题", "A,B,D", ["A", "B", "D"]),
+    ("填空题", "H2O | 液", ["H2O", "液"]),
+    ("单选题", "  ", None),
+])
+def test_parse_response_text(q_type, text, expected):
+    assert parse_response_text(q_type, text) == expected
+
+
+def test_blank_cells_count_toward_max_score(tmp_path, sample_questions):
+    for qid, q in enumerate(sample_questions, 1):
+        q.qid = qid
+        normalize_judge_answer(q)
+    wide = tmp_path / "wide.csv"
+    wide.write_text("student,1,2,3\ns1,A,,对\ns2,B\n", encoding="utf-8")
+    students, per_question, unknown = grade_sheet(sample_questions, read_sheet(str(wide)))
+    assert unknown == 0
+    s1, s2 = students["s1"], students["s2"]
+    assert (s1.answered, s1.correct, s1.score, s1.max_score) == (2, 2, 2.0, 3)
+    assert (s2.answered, s2.correct, s2.score, s2.max_score) == (1, 0, 0.0, 3)
+    assert per_question[2].attempts == 2 and per_question[2].wrong_answers[""] == 2
+
+    long = tmp_path / "long.csv"
+    long.write_text("student,qid,answer\ns1,1,A\ns1,2,\ns1,9,A\n", encoding="utf-8")
+    students, per_question, unknown = grade_sheet(sample_questions, read_sheet(str(long)))
+    assert unknown == 1
+    assert (students["s1"].answered, students["s1"].max_score) == (1, 2)
@@ -0,0 +1,82 @@
+import io
+import random
+
+import pytest
+
+from conftest import SAMPLE_BANK, parse_bank
+from mapped_bank import MappedBank, build_from_files, drill, write_mapped_bank
+
+
+@pytest.fixture
+def bank_path(tmp_path, sample_questions):
+    path = str(tmp_path / "题库.qbank")
+    write_mapped_bank(path, iter(sample_questions))
+    return path
+
+
+def test_questions_round_trip(bank_path, sample_questions):
+    with MappedBank(bank_path) as bank:
+        assert len(bank) == len(sample_questions)
+        assert bank.type_counts == {"单选题": 1, "多选题": 1, "判断题": 1, "填空题": 1}
+        for i, expected in enumerate(sample_questions):
+            q = bank.question(i)
+            assert q.qid == i + 1
+            assert (q.q_type, q.text, q.options, q.answer) == \
+                (expected.q_type, expected.text, expected.options, expected.answer)
+            assert bank.q_type(i) == expected.q_type
+        with pytest.raises(IndexError):
+            bank.question(len(sample_questions))
+
+
+def test_draw_and_mark_answered_persist(bank_path):
+    rng = random.Random(0)
+    with MappedBank(bank_path) as bank:
+        drawn = set()
+        while (i := bank.draw(rng)) is not None:
+            assert i not in drawn
+            assert bank.mark_answered(i)
+            assert not bank.mark_answered(i)
+            drawn.add(i)
+            if len(drawn) == 2:
+                break
+        assert bank.answered_count == 2
+    with MappedBank(bank_path) as bank: # 进度保存在 .state 中
+        assert bank.answered_count == 2
+        assert {i for i in range(len(bank)) if bank.is_answered(i)} == drawn
+        while (i := bank.draw(rng)) is not None:
+            bank.mark_answered(i)
+        assert bank.unanswered_count == 0
+        bank.reset_progress()
+        assert bank.unanswered_count == len(bank)
+
+
+def test_rebuilding_invalidates_progress(tmp_path, bank_path):
+    with MappedBank(bank_path) as bank:
+        bank.mark_answered(0)
+    source = tmp_path / "题库.txt"
+    source.write_text(SAMPLE_BANK, encoding="utf-8")
+    assert build_from_files(bank_path, [str(source)]) == len(parse_bank(SAMPLE_BANK))
+    with MappedBank(bank_path) as bank:
+        assert bank.answered_count == 0
+        assert bank.question(0).source_file == "题库.txt"
+
+
+def test_rejects_empty_build_and_foreign_files(tmp_path):
+    with pytest.raises(ValueError):
+        write_mapped_bank(str(tmp_path / "empty.qbank"), [])
+    assert list(tmp_path.iterdir()) == [] # 失败时不留下临时文件
+    bad = tmp_path / "bad.qbank"
+    bad.write_bytes(b"not a bank" * 20)
+    with pytest.raises(ValueError):
+        MappedBank(str(bad))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_drill_marks_answered_questions(bank_path, seed):
+    out = io.StringIO()
+    with MappedBank(bank_path) as bank:
+        # 答完第一道题（填空题可能有多个空）后退出
+        answered = drill(bank, prompt=lambda _text: "q" if bank.answered_count else "A", out=out,
+                         rng=random.Random(seed))
+        assert answered == 1 and bank.answered_count == 1
+        assert "正确答案" in out.getvalue()
@@ -0,0 +1,31 @@
+from conftest import parse_bank
+from near_duplicates import deduplicate
+
+STEM = "一、单选题\n{n}. 中华人民共和国的首都是下列哪一座城市\n"
+
+
+def choice(n, options, answer):
+    return STEM.format(n=n) + "".join(f"{letter}. {text}\n" for letter, text in zip("ABCD", options)) + \
+        f"正确答案：{answer}\n"
+
+
+def test_reordered_options_with_same_answer_are_merged():
+    questions = parse_bank(choice(1, ["北京", "上海", "广州"], "A") + choice(2, ["上海", "广州", "北京"], "C"))
+    kept, groups = deduplicate(questions)
+    assert kept == questions[:1]
+    assert [(g.canonical, g.duplicates, g.conflicts) for g in groups] == [(questions[0], [questions[1]], [])]
+
+
+def test_similar_question_with_different_answer_is_a_conflict():
+    questions = parse_bank(choice(1, ["北京", "上海", "广州"], "A") + choice(2, ["北京", "上海", "广州"], "B")
+                           + choice(3, ["广州", "上海", "北京"], "B"))
+    kept, groups = deduplicate(questions)
+    assert kept == questions[:2] # 答案不同的题目保留，与它答案相同的第 3 题并入它
+    assert [(g.canonical, g.duplicates, g.conflicts) for g in groups] == \
+        [(questions[0], [], [questions[1]]), (questions[1], [questions[2]], [])]
+
+
+def test_questions_differing_only_in_a_number_are_kept():
+    questions = parse_bank("一、填空题\n1. 第3章的标题是___\n正确答案：绪论\n2. 第4章的标题是___\n正确答案：绪论\n")
+    kept, groups = deduplicate(questions)
+    assert kept == questions and groups == []
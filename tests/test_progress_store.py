@@ -0,0 +1,66 @@
+import pickle
+
+from progress_store import ProgressStore, load_legacy_pickle, open_store
+
+
+def write_legacy_pickle(path, questions, answered, module="question_parser"):
+    """写出旧版 quiz_progress.pkl；module 为 Question 在文件中记录的模块名"""
+    data = pickle.dumps({"all_questions": questions, "answered_questions": answered,
+                         "last_imported_docx": "题库.docx"}, protocol=0)
+    path.write_bytes(data.replace(b"cquestion_parser\n", f"c{module}\n".encode()))
+
+
+def test_replace_bank_round_trip(tmp_path, sample_questions):
+    store = ProgressStore(str(tmp_path / "q.db"))
+    store.replace_bank(sample_questions, "题库.docx", answered=[sample_questions[2], sample_questions[0]])
+    all_questions, unanswered, answered, last_imported = store.load()
+    store.close()
+    assert [q.qid for q in all_questions] == [q.qid for q in sample_questions]
+    assert [(q.q_type, q.text, q.options, q.answer) for q in all_questions] == \
+        [(q.q_type, q.text, q.options, q.answer) for q in sample_questions]
+    assert [q.qid for q in answered] == [sample_questions[2].qid, sample_questions[0].qid] # 最新的在前
+    assert {q.qid for q in unanswered} == {sample_questions[1].qid, sample_questions[3].qid}
+    assert last_imported == "题库.docx"
+
+
+def test_legacy_pickle_from_main_module_is_readable(tmp_path, sample_questions):
+    pkl = tmp_path / "quiz_progress.pkl"
+    write_legacy_pickle(pkl, sample_questions, [], module="__main__")
+    loaded = load_legacy_pickle(str(pkl))
+    assert [q.text for q in loaded["all_questions"]] == [q.text for q in sample_questions]
+
+
+def test_open_store_migrates_legacy_pickle(tmp_path, sample_questions):
+    pkl = tmp_path / "quiz_progress.pkl"
+    write_legacy_pickle(pkl, sample_questions, [sample_questions[1]])
+    store, migrated = open_store(str(tmp_path / "q.db"), str(pkl))
+    _all, _unanswered, answered, last_imported = store.load()
+    store.close()
+    assert migrated == len(sample_questions)
+    assert [q.text for q in answered] == [sample_questions[1].text]
+    assert last_imported == "题库.docx"
+
+
+def test_legacy_pickle_is_not_migrated_again_after_deleting_everything(tmp_path, sample_questions):
+    pkl = tmp_path / "quiz_progress.pkl"
+    write_legacy_pickle(pkl, sample_questions, [])
+    db = str(tmp_path / "q.db")
+    store, _migrated = open_store(db, str(pkl))
+    store.delete_questions(store.load()[0])
+    store.close()
+
+    store, migrated = open_store(db, str(pkl))
+    assert migrated is None
+    assert store.question_count() == 0
+    store.close()
+
+
+def test_deleting_questions_removes_their_progress(tmp_path, sample_questions):
+    store = ProgressStore(str(tmp_path / "q.db"))
+    store.replace_bank(sample_questions, answered=[sample_questions[0]])
+    store.delete_questions([sample_questions[0], sample_questions[3]])
+    all_questions, unanswered, answered, _last = store.load()
+    store.close()
+    assert [q.qid for q in all_questions] == [sample_questions[1].qid, sample_questions[2].qid]
+    assert answered == []
+    assert len(unanswered) == 2
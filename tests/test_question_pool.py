@@ -0,0 +1,47 @@
+import random
+
+from question_pool import QuestionPool
+
+
+class Item:
+    def __init__(self):
+        self.qid = None
+
+
+def test_answered_ids_range_matches_answer_order():
+    rng = random.Random(5)
+    pool = QuestionPool(rng)
+    pool.load([Item() for _ in range(200)])
+    expected = [] # 最新作答的在前
+    for _ in range(3000):
+        op = rng.random()
+        if op < 0.5:
+            q = pool.draw()
+            if q is not None and pool.mark_answered(q):
+                expected.insert(0, q.qid)
+        elif op < 0.7 and expected:
+            qids = rng.sample(expected, min(len(expected), 3))
+            pool.move_back(qids)
+            expected = [qid for qid in expected if qid not in qids]
+        elif op < 0.75 and expected:
+            qid = rng.choice(expected)
+            pool.delete([qid])
+            expected.remove(qid)
+            assert not pool.is_answered_id(qid)
+        else:
+            start = rng.randint(0, len(expected) + 5)
+            stop = start + rng.randint(0, 30)
+            assert pool.answered_ids_range(start, stop) == expected[start:stop]
+        assert pool.answered_count == len(expected)
+    assert [q.qid for q in pool.answered_questions()] == expected
+
+
+def test_load_keeps_answered_order_and_mark_answered_once():
+    items = [Item() for _ in range(5)]
+    pool = QuestionPool()
+    pool.load(items, [items[3], items[1]])
+    assert pool.answered_ids_range(0, 10) == [items[3].qid, items[1].qid]
+    assert pool.unanswered_count == 3
+    assert not pool.mark_answered(items[1])
+    assert pool.mark_answered(items[0])
+    assert pool.answered_ids_range(0, 1) == [items[0].qid]
@@ -0,0 +1,36 @@
+from conftest import SAMPLE_BANK, parse_bank
+from search_index import SearchIndex
+
+
+def build(questions):
+    for qid, q in enumerate(questions, 1):
+        q.qid = qid
+    by_id = {q.qid: q for q in questions}
+    return SearchIndex.build(questions), by_id.get
+
+
+def test_single_character_query_is_a_posting_lookup():
+    index, _lookup = build(parse_bank(SAMPLE_BANK))
+    assert set(index.postings["城"]) == {1, 2} # 题干或选项中含“城”
+    assert index.candidates("城") == {1, 2}
+    assert index.candidates("鲸") == set()
+
+
+def test_search_ranks_stem_matches_first():
+    index, lookup = build(parse_bank(SAMPLE_BANK))
+    assert [q.qid for q in index.search("北京", lookup)] == [1, 2] # 只在选项中出现
+    assert [q.qid for q in index.search("直辖市", lookup)] == [2]
+    assert [q.qid for q in index.search("h2o", lookup)] == [4]  # 答案也参与检索
+    assert index.search("首都 上海", lookup)[0].qid == 1
+
+
+def test_remove_and_add_keep_postings_in_sync():
+    questions = parse_bank(SAMPLE_BANK)
+    index, lookup = build(questions)
+    index.remove(questions[0])
+    assert index.candidates("首都") == set()
+    assert 1 not in index.candidates("城")
+    index.add(questions[0])
+    assert index.candidates("首都") == {1}
+    restored = SearchIndex.from_rows(index.to_rows())
+    assert restored.candidates("城") == {1, 2}
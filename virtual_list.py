@@ -0,0 +1,223 @@
+"""虚拟化列表控件：只把当前可见的几十行放进 tk.Listbox。
+
+数据由三个回调提供，控件本身不保存全部行：
+  row_count()            -> 总行数
+  row_ids(start, stop)   -> 第 start..stop-1 行的 id 列表
+  row_text(row_id)       -> 该行显示的文本
+  row_exists(row_id)     -> 该行是否仍然存在（refresh 时只检查选中的行，不取全部行 id）
+
+选中状态按行 id 保存（而不是行号），数据增删后已选中的题目不会错位。
+支持扩展选择：单击、Ctrl+单击、Shift+单击、拖动、Ctrl+A、方向键和翻页键。
+"""
+import tkinter as tk
+import tkinter.font as tkfont
+
+
+class VirtualListbox(tk.Frame):
+    WHEEL_ROWS = 3 # 鼠标滚轮每格滚动的行数
+
+    def __init__(self, master, row_count, row_ids, row_text, row_exists, **listbox_options):
+        super().__init__(master)
+        self._row_count = row_count
+        self._row_ids = row_ids
+        self._row_text = row_text
+        self._row_exists = row_exists
+
+        self._top = 0                # 第一可见行的行号
+        self._visible_rows = 20      # 可完整显示的行数，<Configure> 时重新计算
+        self._visible_ids = []       # 当前渲染在 Listbox 中的行 id
+        self._selected = set()       # 选中的行 id
+        self._anchor = None          # Shift 选择的起点（行号）
+        self.active_id = None        # 最近一次点击/键盘移动到的行 id
+
+        xscrollbar = tk.Scrollbar(self, orient=tk.HORIZONTAL)
+        xscrollbar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.yscrollbar = tk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_yscroll)
+        self.yscrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        listbox_options.setdefault("exportselection", False)
+        self.listbox = tk.Listbox(self, selectmode=tk.EXTENDED, xscrollcommand=xscrollbar.set, **listbox_options)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        xscrollbar.config(command=self.listbox.xview)
+
+        lb = self.listbox
+        lb.bind("<Configure>", self._on_configure)
+        lb.bind("<Button-1>", lambda e: self._on_click(e, "single"))
+        lb.bind("<Control-Button-1>", lambda e: self._on_click(e, "toggle"))
+        lb.bind("<Shift-Button-1>", lambda e: self._on_click(e, "range"))
+        lb.bind("<B1-Motion>", self._on_drag)
+        for sequence in ("<B1-Leave>", "<B1-Enter>", "<ButtonRelease-1>", "<Button-2>", "<B2-Motion>"):
+            lb.bind(sequence, lambda e: "break") # 屏蔽 Listbox 自带的自动滚动/拖拽浏览
+        lb.bind("<MouseWheel>", self._on_mousewheel)
+        lb.bind("<Button-4>", lambda e: self._scroll_by(-self.WHEEL_ROWS))
+        lb.bind("<Button-5>", lambda e: self._scroll_by(self.WHEEL_ROWS))
+        lb.bind("<Up>", lambda e: self._on_key_move(-1, False))
+        lb.bind("<Down>", lambda e: self._on_key_move(1, False))
+        lb.bind("<Shift-Up>", lambda e: self._on_key_move(-1, True))
+        lb.bind("<Shift-Down>", lambda e: self._on_key_move(1, True))
+        lb.bind("<Prior>", lambda e: self._on_key_move(-self._visible_rows, False))
+        lb.bind("<Next>", lambda e: self._on_key_move(self._visible_rows, False))
+        lb.bind("<Control-a>", self._on_select_all)
+
+    # --- 对外接口 ---
+    def refresh(self):
+        """数据变化后调用：丢弃已不存在的选中项并重绘可见行"""
+        if self._selected:
+            self._selected = {row_id for row_id in self._selected if self._row_exists(row_id)}
+        self._render()
+
+    def reset(self):
+        """整体替换数据后调用：清空选择并回到顶部"""
+        self._selected.clear()
+        self._anchor = None
+        self.active_id = None
+        self._top = 0
+        self._render()
+
+    def selected_ids(self):
+        return list(self._selected)
+
+    def has_selection(self):
+        return bool(self._selected)
+
+    # --- 渲染 ---
+    def _line_height(self):
+        font = tkfont.Font(font=self.listbox.cget("font"))
+        # 与 Tk Listbox 内部的行高计算一致
+        return font.metrics("linespace") + 1 + 2 * int(self.listbox.cget("selectborderwidth"))
+
+    def _on_configure(self, event):
+        border = 2 * (int(self.listbox.cget("borderwidth")) + int(self.listbox.cget("highlightthickness")))
+        rows = max(1, (event.height - border) // self._line_height())
+        if rows != self._visible_rows:
+            self._visible_rows = rows
+            self._render()
+
+    def _render(self):
+        count = self._row_count()
+        self._top = max(0, min(self._top, count - self._visible_rows))
+        # 多渲染一行，让底部被截断的那一行也能看到
+        ids = self._row_ids(self._top, min(count, self._top + self._visible_rows + 1))
+        self._visible_ids = ids
+        lb = self.listbox
+        lb.delete(0, tk.END)
+        if ids:
+            lb.insert(tk.END, *[self._row_text(row_id) for row_id in ids])
+            for i, row_id in enumerate(ids):
+                if row_id in self._selected:
+                    lb.selection_set(i)
+        lb.yview_moveto(0)
+        if count:
+            self.yscrollbar.set(self._top / count, min(1.0, (self._top + self._visible_rows) / count))
+        else:
+            self.yscrollbar.set(0.0, 1.0)
+
+    # --- 滚动 ---
+    def _scroll_to(self, top):
+        top = max(0, min(top, self._row_count() - self._visible_rows))
+        if top != self._top:
+            self._top = top
+            self._render()
+
+    def _scroll_by(self, rows):
+        self._scroll_to(self._top + rows)
+        return "break"
+
+    def _on_yscroll(self, *args):
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * self._row_count()))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            self._scroll_by(step * self._visible_rows if args[2] == "pages" else step)
+
+    def _on_mousewheel(self, event):
+        return self._scroll_by(-self.WHEEL_ROWS if event.delta > 0 else self.WHEEL_ROWS)
+
+    def _ensure_visible(self, index):
+        if index < self._top:
+            self._scroll_to(index)
+        elif index >= self._top + self._visible_rows:
+            self._scroll_to(index - self._visible_rows + 1)
+
+    # --- 选择 ---
+    def _index_at(self, y):
+        """窗口坐标 y 对应的行号，超出数据范围时返回 None"""
+        if not self._visible_ids:
+            return None
+        offset = self.listbox.nearest(y)
+        if offset < 0 or offset >= len(self._visible_ids):
+            return None
+        return self._top + offset
+
+    def _id_at(self, index):
+        offset = index - self._top
+        if 0 <= offset < len(self._visible_ids):
+            return self._visible_ids[offset]
+        ids = self._row_ids(index, index + 1)
+        return ids[0] if ids else None
+
+    def _select_range(self, first, last, add=False):
+        if first > last:
+            first, last = last, first
+        ids = self._row_ids(first, last + 1)
+        if add:
+            self._selected.update(ids)
+        else:
+            self._selected = set(ids)
+
+    def _notify(self):
+        self._render()
+        self.event_generate("<<ListboxSelect>>")
+
+    def _on_click(self, event, mode):
+        self.listbox.focus_set()
+        index = self._index_at(event.y)
+        if index is None:
+            return "break"
+        row_id = self._id_at(index)
+        if mode == "range" and self._anchor is not None:
+            self._select_range(self._anchor, index)
+        elif mode == "toggle":
+            self._selected.symmetric_difference_update((row_id,))
+            self._anchor = index
+        else:
+            self._selected = {row_id}
+            self._anchor = index
+        self.active_id = row_id
+        self._notify()
+        return "break"
+
+    def _on_drag(self, event):
+        if self._anchor is None:
+            return "break"
+        if event.y < 0:
+            self._scroll_by(-1)
+        elif event.y > self.listbox.winfo_height():
+            self._scroll_by(1)
+        index = self._index_at(max(0, min(event.y, self.listbox.winfo_height() - 1)))
+        if index is not None:
+            self._select_range(self._anchor, index)
+            self._notify()
+        return "break"
+
+    def _on_key_move(self, delta, extend):
+        count = self._row_count()
+        if not count:
+            return "break"
+        current = self._anchor if self._anchor is not None else self._top
+        if self.active_id is not None and self.active_id in self._visible_ids:
+            current = self._top + self._visible_ids.index(self.active_id)
+        index = max(0, min(count - 1, current + delta))
+        self._ensure_visible(index)
+        if extend and self._anchor is not None:
+            self._select_range(self._anchor, index)
+        else:
+            self._anchor = index
+            self._selected = {self._id_at(index)}
+        self.active_id = self._id_at(index)
+        self._notify()
+        return "break"
+
+    def _on_select_all(self, event):
+        self._selected = set(self._row_ids(0, self._row_count()))
+        self._notify()
+        return "break"